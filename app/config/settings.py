@@ -15,6 +15,10 @@ APP_DIR = PROJECT_ROOT / "app"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 CACHE_DIR = DATA_DIR / "cache"
+INDICATOR_CACHE_DIR = PROCESSED_DATA_DIR / "indicators"
+AGGREGATES_DIR = PROCESSED_DATA_DIR / "aggregates"
+FUNDAMENTALS_HISTORY_DIR = PROCESSED_DATA_DIR / "companyfacts"
+FEATURES_DIR = PROCESSED_DATA_DIR / "features"
 
 # Model directories
 TRAINED_MODELS_DIR = MODELS_DIR / "trained"
@@ -41,11 +45,42 @@ DATA_CONFIG = {
     "cache_ttl_hours": 24,
 }
 
+# SEC EDGAR access (SEC allows at most 10 requests per second)
+SEC_CONFIG = {
+    "max_workers": 4,
+    "requests_per_second": 8,
+}
+
 # Machine learning defaults
 ML_CONFIG = {
     "train_test_split": 0.2,
     "random_state": 42,
     "model_type": "random_forest",
+    "model_cache_size": 8,
+    "max_batch_size": 64,
+    "max_batch_wait_ms": 5,
+    "tuning": {
+        "n_candidates": 27,
+        "eta": 3,
+    },
+    "online": {
+        "window": 60,
+        "min_errors": 20,
+        "error_ratio": 1.5,
+        "feature_shift": 1.0,
+        "warm_start_estimators": 10,
+        "max_estimators": 500,
+        "epochs": 5,
+        "keep_versions": 10,
+    },
+    "streaming": {
+        "block_rows": 1024,
+        "buffer_blocks": 16,
+        "batch_size": 4096,
+    },
+    "training_jobs": {
+        "cancel_grace": 5.0,
+    },
     "neural_network": {
         "epochs": 50,
         "batch_size": 32,
@@ -67,6 +102,11 @@ TA_CONFIG = {
     "macd_signal": 9,
 }
 
+# Process pool defaults (n_jobs None or -1: every core)
+PARALLEL_CONFIG = {
+    "n_jobs": None,
+}
+
 # Parquet configuration
 PARQUET_CONFIG = {
     "compression": "snappy",
@@ -2,9 +2,13 @@
 Server-side handlers for Stock Analyzer
 """
 
+import pandas as pd
 from shiny import reactive, render, ui
-from utils.data_loader import fetch_stock_data
-from utils.analysis import analyze_fundamentals
+from utils.data_loader import fetch_stock_data, fetch_fundamental_data
+from utils.analysis import analyze_fundamentals, calculate_growth_rates
+from utils.peers import PEER_LABELS, describe_peer_rank, get_peer_ranks
+from utils.training_jobs import FINISHED, get_training_jobs
+from utils.valuation import growth_seed, simulate_intrinsic_value, valuation_inputs
 
 
 # ==================== HELPER FUNCTIONS ====================
@@ -50,6 +54,25 @@ def format_decimal(value, decimals=2, default="N/A"):
         return default
 
 
+def format_job_progress(job):
+    """Format a training job's latest progress, e.g. 'epoch 12/50'"""
+    if job["status"] == "error":
+        return job["error"] or "Failed"
+    if job["stage"] == "data":
+        return "Preparing data"
+    if job["stage"] is None:
+        return "—"
+    total = f"/{job['total']}" if job["total"] else ""
+    return f"{job['stage']} {job['step']}{total}"
+
+
+def format_job_metrics(job):
+    """Format a training job's latest metrics as 'name value' pairs"""
+    metrics = {name: value for name, value in (job["metrics"] or {}).items()
+               if name.endswith(("_score", "_loss")) or name in ("loss", "mae")}
+    return ", ".join(f"{name} {format_decimal(value, 4)}" for name, value in metrics.items()) or "—"
+
+
 # ==================== HANDLER SETUP ====================
 
 def setup_handlers(input, output, session):
@@ -58,6 +81,12 @@ def setup_handlers(input, output, session):
     # Reactive value to store analysis results
     analysis_results = reactive.Value(None)
     
+    # Reactive value to store the analyzed symbol's peer ranks
+    peer_results = reactive.Value(None)
+    
+    # Reactive value to store Monte Carlo valuation percentiles
+    simulation_results = reactive.Value(None)
+    
     @reactive.Effect
     @reactive.event(input.analyze_btn)
     def _on_analyze():
@@ -77,6 +106,7 @@ def setup_handlers(input, output, session):
                 
                 # Store results in reactive value
                 analysis_results.set(results)
+                peer_results.set(get_peer_ranks(symbol))
                     
             except Exception as e:
                 analysis_results.set({"error": str(e)})
@@ -212,6 +242,21 @@ def setup_handlers(input, output, session):
             return format_currency(ebitda)
         return "—"
     
+    @output
+    @render.text
+    def peer_comparison():
+        """Display peer percentile ranks, industry first, sector as fallback"""
+        ranks = peer_results()
+        if not ranks:
+            return "No peer ranks available for this symbol yet."
+        lines = []
+        for metric in PEER_LABELS:
+            levels = ranks.get(metric, {})
+            stats = levels.get("industry") or levels.get("sector")
+            if stats:
+                lines.append(describe_peer_rank(metric, stats))
+        return "\n".join(lines) or "No peer ranks available for this symbol yet."
+    
     # ==================== VALUATION OUTPUTS ====================
     
     @output
@@ -256,6 +301,105 @@ def setup_handlers(input, output, session):
             return format_currency(price)
         return "—"
     
+    # ==================== MONTE CARLO OUTPUTS ====================
+    
+    @reactive.Effect
+    @reactive.event(input.calculate_valuations_btn)
+    def _on_simulate_valuation():
+        """Handle valuation button click: simulate fair value percentiles"""
+        symbol = input.valuation_symbol()
+        if symbol:
+            try:
+                info = fetch_fundamental_data(symbol)["info"]
+                inputs = valuation_inputs(pd.DataFrame([info])).iloc[0]
+                
+                # Centre growth on EDGAR history, falling back to yfinance growth
+                growth_mean = growth_seed(calculate_growth_rates(symbol))
+                if growth_mean != growth_mean:
+                    growth_mean = inputs["growth_rate"]
+                
+                simulation_results.set(
+                    simulate_intrinsic_value(inputs["eps"], growth_mean, inputs["pe_ratio"])
+                )
+            except Exception as e:
+                print(f"Error simulating valuation for {symbol}: {e}")
+                simulation_results.set(None)
+    
+    @output
+    @render.table
+    def valuation_simulation():
+        """Display Monte Carlo fair value and buy price percentiles"""
+        results = simulation_results()
+        if results is None:
+            return None
+        return pd.DataFrame({
+            "Percentile": [f"P{percentile:g}" for percentile in results.index],
+            "Fair Market Value": results["fair_market_value"].map(format_currency),
+            "Price to Buy": results["price_to_buy"].map(format_currency),
+        })
+    
+    # ==================== MODEL TRAINING ====================
+    
+    # Ids of the training jobs started from this session
+    training_job_ids = reactive.Value([])
+    
+    def _start_training(model_type):
+        """Start a background training job on the symbol's features"""
+        symbol = input.model_symbol()
+        if symbol:
+            try:
+                # Neural network folds run one after another; score them on one holdout
+                validation = "holdout" if model_type == "neural_network" else "walk_forward"
+                job_id = get_training_jobs().submit(f"{symbol.upper()}_{model_type}", symbol=symbol,
+                                                    model_type=model_type, validation=validation)
+                training_job_ids.set(training_job_ids() + [job_id])
+            except Exception as e:
+                print(f"Error starting {model_type} training for {symbol}: {e}")
+    
+    @reactive.Effect
+    @reactive.event(input.train_rf)
+    def _on_train_rf():
+        """Handle random forest train button click"""
+        _start_training("random_forest")
+    
+    @reactive.Effect
+    @reactive.event(input.train_nn)
+    def _on_train_nn():
+        """Handle neural network train button click"""
+        _start_training("neural_network")
+    
+    @reactive.Effect
+    @reactive.event(input.train_gb)
+    def _on_train_gb():
+        """Handle gradient boosting train button click"""
+        _start_training("gradient_boosting")
+    
+    @reactive.Effect
+    @reactive.event(input.cancel_training)
+    def _on_cancel_training():
+        """Handle cancel button click: stop this session's running jobs"""
+        jobs = get_training_jobs()
+        for job in jobs.list_jobs(training_job_ids()):
+            if job["status"] not in FINISHED:
+                jobs.cancel(job["id"])
+    
+    @output
+    @render.table
+    def training_jobs():
+        """Display this session's training jobs, refreshing while any runs"""
+        jobs = get_training_jobs().list_jobs(training_job_ids())
+        if any(job["status"] not in FINISHED for job in jobs):
+            reactive.invalidate_later(1)
+        if not jobs:
+            return None
+        return pd.DataFrame({
+            "Model": [job["name"] for job in jobs],
+            "Status": [job["status"].capitalize() for job in jobs],
+            "Progress": [format_job_progress(job) for job in jobs],
+            "Metrics": [format_job_metrics(job) for job in jobs],
+            "Version": [job["version"] or "—" for job in jobs],
+        })
+    
     # ==================== OTHER HANDLERS ====================
     
     @reactive.Effect
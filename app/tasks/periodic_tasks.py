@@ -7,6 +7,10 @@ import schedule
 import threading
 import time
 from typing import Callable, Optional
+from utils.analysis import refresh_fundamentals
+from utils.feature_store import refresh_feature_store
+from utils.online import update_registered_models
+from utils.peers import update_peer_ranks
 from utils.ticker_manager import TickerManager
 
 
@@ -33,6 +37,66 @@ class TaskScheduler:
         
         schedule.every(interval_hours).hours.do(update_job)
     
+    def schedule_fundamentals_refresh(self, at: str = "02:00"):
+        """
+        Schedule the nightly fundamentals refresh
+        
+        Tickers of the universe without stored fundamentals are computed,
+        and of the others only companies that filed a 10-K or 10-Q since
+        the previous run are recomputed (see
+        utils.analysis.refresh_fundamentals); sector and industry peer
+        ranks are then rebuilt from the stored metrics.
+        
+        Args:
+            at: Time of day to run, "HH:MM" (default: "02:00")
+        """
+        # An exception would end the scheduler thread and every other job
+        def refresh_job():
+            print(f"Starting scheduled fundamentals refresh...")
+            try:
+                recomputed = refresh_fundamentals()
+                print(f"Fundamentals refresh completed: {len(recomputed)} companies recomputed")
+            except Exception as e:
+                print(f"Fundamentals refresh failed: {e}")
+            try:
+                rows = update_peer_ranks()
+                print(f"Peer ranks updated: {rows} rows")
+            except Exception as e:
+                print(f"Peer rank update failed: {e}")
+        
+        schedule.every().day.at(at).do(refresh_job)
+    
+    def schedule_feature_refresh(self, at: str = "01:00"):
+        """
+        Schedule the daily feature store build and model updates
+        
+        Features of every stored symbol, and of the symbols registered
+        models were trained on, are rebuilt once from the new bars (see
+        utils.feature_store.refresh_feature_store); training jobs and
+        experiments then only read them. Registered models are then
+        updated with the new rows (utils.online.update_registered_models).
+        
+        Args:
+            at: Time of day to run, "HH:MM" (default: "01:00")
+        """
+        # Errors are reported, never raised into the scheduler thread
+        def refresh_job():
+            print(f"Starting scheduled feature store refresh...")
+            try:
+                built = refresh_feature_store()
+                print(f"Feature store refresh completed: {sum(built.values())} of {len(built)} symbols rebuilt")
+            except Exception as e:
+                print(f"Feature store refresh failed: {e}")
+            try:
+                updates = update_registered_models()
+                actions = [result["action"] for result in updates.values()]
+                print(f"Model updates completed: {actions.count('incremental')} incremental, "
+                      f"{actions.count('retrain')} retrained of {len(actions)} models")
+            except Exception as e:
+                print(f"Model updates failed: {e}")
+        
+        schedule.every().day.at(at).do(refresh_job)
+    
     def schedule_custom_job(
         self, 
         job: Callable, 
@@ -97,6 +161,12 @@ def start_background_tasks(ticker_json_url: str):
     # Schedule ticker updates every 24 hours
     scheduler.schedule_ticker_update(ticker_manager, interval_hours=24)
     
+    # Build the day's features once, after new bars arrive
+    scheduler.schedule_feature_refresh()
+    
+    # Recompute fundamentals of companies with new filings every night
+    scheduler.schedule_fundamentals_refresh()
+    
     # Start scheduler
     scheduler.start()
 
@@ -165,6 +165,16 @@ def create_ui():
                             subtitle="Key performance indicators"
                         ),
                         
+                        # PEER COMPARISON CARD
+                        card(
+                            ui.div(
+                                ui.output_text_verbatim("peer_comparison"),
+                                style=f"padding: {SPACING['lg']};"
+                            ),
+                            title="Peer Comparison",
+                            subtitle="Percentile ranks within industry and sector"
+                        ),
+                        
                         # VALUATIONS - 4 Cards in a Grid
                         ui.div(
                             ui.h3("Valuation Analysis", style=f"margin-bottom: {SPACING['lg']}; margin-top: {SPACING['xl']};"),
@@ -356,6 +366,18 @@ def create_ui():
                             ),
                         ),
                         
+                        # MONTE CARLO SECTION
+                        ui.div(
+                            ui.h3("Monte Carlo Simulation", style=f"margin-bottom: {SPACING['lg']}; margin-top: {SPACING['xl']}; color: {COLORS['primary']};"),
+                            card(
+                                ui.div(
+                                    ui.p("Percentiles of fair value and buy price over 100,000 simulated growth, discount-rate and margin-of-safety paths, centred on historical EDGAR growth rates", style=f"color: {COLORS['gray']}; font-size: 0.85rem; margin-bottom: {SPACING['md']};"),
+                                    ui.output_table("valuation_simulation"),
+                                    style=f"padding: {SPACING['lg']};"
+                                ),
+                            ),
+                        ),
+                        
                         style=f"padding: {SPACING['lg']};"
                     )
                 )
@@ -370,6 +392,11 @@ def create_ui():
                     "Machine Learning Models",
                     "Train and evaluate predictive models"
                 ),
+                ui.input_text(
+                    "model_symbol",
+                    "Stock Symbol",
+                    placeholder="e.g., AAPL"
+                ),
                 metric_grid(
                     card(
                         ui.p("Random Forest"),
@@ -389,6 +416,12 @@ def create_ui():
                         button_primary("Train", "train_gb"),
                         title="Gradient Boosting"
                     ),
+                ),
+                card(
+                    ui.p("Models train in the background; progress updates every second", style=f"color: {COLORS['gray']};"),
+                    ui.output_table("training_jobs"),
+                    button_primary("Cancel Running", "cancel_training"),
+                    title="Training Jobs"
                 )
             )
         ),
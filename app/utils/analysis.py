@@ -1,15 +1,134 @@
 """
 Fundamental analysis utilities for Stock Analyzer
 """
-from edgar import Company, set_identity
+from edgar import Company, get_filings, set_identity
+from edgar.reference.tickers import find_cik
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from config.settings import DATA_CONFIG, SEC_CONFIG
+
+from .data_loader import fetch_fundamental_data
+from .database import (
+    clear_cache,
+    get_active_symbols,
+    get_cache,
+    get_financials,
+    get_fundamentals,
+    get_fundamentals_failures,
+    save_financials,
+    save_fundamentals,
+    save_fundamentals_failures,
+    set_cache,
+)
+from . import valuation
+from .screening import ScreeningIndex
+from .valuation import valuation_inputs
 
 # Initialize EdgarTools with SEC_EMAIL from environment variable
 SEC_EMAIL = os.getenv("SEC_EMAIL", "your-email@example.com")
 set_identity(SEC_EMAIL)
 
+# Output metric name -> yfinance ticker.info field
+METRIC_FIELDS = {
+    "market_cap": "marketCap",
+    "shares_outstanding": "sharesOutstanding",
+    "pe_ratio": "trailingPE",
+    "eps": "trailingEps",
+    "dividend_yield": "dividendYield",
+    "dividend_per_share": "dividendRate",
+    "sales_growth": "revenueGrowth",
+    "gross_profit_margin": "grossMargins",
+    "ebitda": "ebitda",
+    "pb_ratio": "priceToBook",
+    "debt_to_equity": "debtToEquity",
+    "current_ratio": "currentRatio",
+    "peg_ratio": "pegRatio",
+    "roe": "returnOnEquity",
+    "roa": "returnOnAssets",
+    "revenue_growth": "revenueGrowth",
+    "earnings_growth": "earningsGrowth",
+}
+
+# Default valuation assumptions
+DESIRED_ANNUAL_RETURN = 0.15
+PAYBACK_DISCOUNT_RATE = 0.05
+MARGIN_OF_SAFETY = 0.5
+
+
+def _info_column(info: pd.DataFrame, field: str, dtype=None) -> pd.Series:
+    """Column of an info frame, all missing if the field is absent"""
+    if field in info.columns:
+        column = info[field]
+    else:
+        column = pd.Series(None, index=info.index, dtype=object)
+    if dtype is not None:
+        column = pd.to_numeric(column, errors="coerce").astype(dtype)
+    return column
+
+
+def analyze_fundamentals_batch(
+    info: pd.DataFrame,
+    current_price: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """
+    Perform fundamental analysis for many stocks at once
+    
+    Args:
+        info: DataFrame of yfinance ticker.info snapshots, one row per symbol
+        current_price: Current price per row (optional, aligned with ``info``);
+                       missing prices fall back to currentPrice, then
+                       regularMarketPrice
+    
+    Returns:
+        DataFrame with one row per input row and (section, name) columns,
+        sections being "valuations", "metrics" and "summary"
+    """
+    price = _info_column(info, "currentPrice", float).fillna(
+        _info_column(info, "regularMarketPrice", float)
+    )
+    if current_price is not None:
+        price = pd.Series(current_price, index=info.index, dtype=float).fillna(price)
+    
+    # ==================== VALUATION CALCULATIONS ====================
+    inputs = valuation_inputs(info)
+    fair_value = valuation.fair_market_value(
+        inputs["eps"], inputs["growth_rate"], DESIRED_ANNUAL_RETURN, inputs["pe_ratio"]
+    )
+    valuations = pd.DataFrame({
+        "ten_year_cap_price": valuation.ten_year_cap_price(
+            inputs["eps"], inputs["growth_rate"], inputs["pe_ratio"]
+        ),
+        "fair_market_value": fair_value,
+        "discounted_cash_flow": valuation.payback_years(
+            price, inputs["fcf_per_share"], inputs["growth_rate"], PAYBACK_DISCOUNT_RATE
+        ),
+        "price_to_buy": valuation.price_to_buy(fair_value, MARGIN_OF_SAFETY),
+    }, index=info.index)
+    
+    # ==================== KEY METRICS ====================
+    metrics = pd.DataFrame({
+        name: _info_column(info, field, float) for name, field in METRIC_FIELDS.items()
+    }, index=info.index)
+    
+    # ==================== SUMMARY ====================
+    summary = pd.DataFrame({
+        "analysis_date": pd.Timestamp.now().strftime("%Y-%m-%d"),
+        "current_price": price,
+        "symbol": _info_column(info, "symbol").fillna("N/A"),
+        "company_name": _info_column(info, "longName").fillna("N/A"),
+    }, index=info.index)
+    
+    return pd.concat(
+        {"valuations": valuations, "metrics": metrics, "summary": summary}, axis=1
+    )
+
+
 def analyze_fundamentals(
     stock_data: Dict[str, Any],
     current_price: Optional[float|None] = None
@@ -17,6 +136,8 @@ def analyze_fundamentals(
     """
     Perform comprehensive fundamental analysis on stock
     
+    Single-symbol wrapper around analyze_fundamentals_batch.
+    
     Args:
         stock_data: Dictionary with stock fundamental data (from yfinance ticker.info)
         current_price: Current stock price (optional)
@@ -24,70 +145,30 @@ def analyze_fundamentals(
     Returns:
         Dictionary with analysis results including valuations and metrics
     """
-    
-    results = {
-        "valuations": {},
-        "metrics": {},
-        "summary": {}
+    prices = None if current_price is None else pd.Series([current_price])
+    row = analyze_fundamentals_batch(pd.DataFrame([stock_data]), prices).iloc[0]
+    
+    return {
+        section: {
+            name: None if pd.isna(value) else value
+            for name, value in row[section].items()
+        }
+        for section in ("valuations", "metrics", "summary")
     }
-    
-    # Convert stock_data to DataFrame 
-    stock_df = pd.DataFrame([stock_data])
-    
-    # Extract current price from stock_data if not provided
-    if current_price is None:
-        current_price = stock_data.get("currentPrice") or stock_data.get("regularMarketPrice")
-    
-    # ==================== VALUATION CALCULATIONS ====================
-    # 1. Calculate 10-Year Cap Price (TODO: Implement your logic)
-    results["valuations"]["ten_year_cap_price"] = calculate_ten_year_cap_price(stock_data)
-    
-    # 2. Calculate Fair Market Value (TODO: Implement your logic)
-    results["valuations"]["fair_market_value"] = calculate_fair_market_value(stock_data)
-    
-    # 3. Calculate Payback Period (Years until earnings pay back investor)
-    results["valuations"]["discounted_cash_flow"] = calculate_discounted_cash_flow(stock_data)
-    
-    # 4. Calculate Price to Buy (Target entry price)
-    results["valuations"]["price_to_buy"] = calculate_price_to_buy(stock_data)
-    
-    # ==================== KEY METRICS ====================
-    results["metrics"]["market_cap"] = stock_data.get("marketCap")
-    results["metrics"]["shares_outstanding"] = stock_data.get("sharesOutstanding")
-    results["metrics"]["pe_ratio"] = stock_data.get("trailingPE")
-    results["metrics"]["eps"] = stock_data.get("trailingEps")
-    results["metrics"]["dividend_yield"] = stock_data.get("dividendYield")
-    results["metrics"]["dividend_per_share"] = stock_data.get("dividendRate")
-    results["metrics"]["sales_growth"] = stock_data.get("revenueGrowth")
-    results["metrics"]["gross_profit_margin"] = stock_data.get("grossMargins")
-    results["metrics"]["ebitda"] = stock_data.get("ebitda")
-    results["metrics"]["pb_ratio"] = stock_data.get("priceToBook")
-    results["metrics"]["debt_to_equity"] = stock_data.get("debtToEquity")
-    results["metrics"]["current_ratio"] = stock_data.get("currentRatio")
-    results["metrics"]["peg_ratio"] = stock_data.get("pegRatio")
-    results["metrics"]["roe"] = stock_data.get("returnOnEquity")
-    results["metrics"]["roa"] = stock_data.get("returnOnAssets")
-    results["metrics"]["revenue_growth"] = stock_data.get("revenueGrowth")
-    results["metrics"]["earnings_growth"] = stock_data.get("earningsGrowth")
-    
-    # ==================== SUMMARY ====================
-    results["summary"]["analysis_date"] = pd.Timestamp.now().strftime("%Y-%m-%d")
-    results["summary"]["current_price"] = current_price
-    results["summary"]["symbol"] = stock_data.get("symbol", "N/A")
-    results["summary"]["company_name"] = stock_data.get("longName", "N/A")
-    
-    return results
+
+
+def _scalar(value) -> Optional[float]:
+    """Single model value as a float, None if undefined"""
+    value = float(np.asarray(value).reshape(-1)[0])
+    return None if np.isnan(value) else value
 
 
 def calculate_ten_year_cap_price(stock_data: Dict[str, Any]) -> Optional[float]:
     """
     Calculate the 10-year cap price for the stock
     
-    TODO: Implement your valuation logic here
-    Examples:
-    - PEG ratio based valuation
-    - Earnings growth projected over 10 years
-    - Discounted cash flow model
+    Trailing EPS grown for ten years at the earnings growth rate, times the
+    future P/E (see utils.valuation).
     
     Args:
         stock_data: Dictionary with stock data
@@ -95,71 +176,73 @@ def calculate_ten_year_cap_price(stock_data: Dict[str, Any]) -> Optional[float]:
     Returns:
         Calculated 10-year cap price or None
     """
-    # Placeholder - implement your calculation
-    pass
+    inputs = valuation_inputs(pd.DataFrame([stock_data]))
+    return _scalar(valuation.ten_year_cap_price(
+        inputs["eps"], inputs["growth_rate"], inputs["pe_ratio"]
+    ))
 
 
-def calculate_fair_market_value(stock_data: Dict[str, Any]) -> Optional[float]:
+def calculate_fair_market_value(stock_data: Dict[str, Any],
+                                desired_annual_return: float=DESIRED_ANNUAL_RETURN) -> Optional[float]:
     """
     Calculate the fair market value of the stock
     
-    TODO: Implement your valuation logic here
-    Examples:
-    - Graham number formula
-    - P/E ratio based on historical average
-    - PEG ratio analysis
-    - Intrinsic value models
+    The 10-year cap price discounted back at the desired annual return.
     
     Args:
         stock_data: Dictionary with stock data
+        desired_annual_return: Desired annual return rate
     
     Returns:
         Calculated fair market value or None
     """
-    # Placeholder - implement your calculation
-    pass
+    inputs = valuation_inputs(pd.DataFrame([stock_data]))
+    return _scalar(valuation.fair_market_value(
+        inputs["eps"], inputs["growth_rate"], desired_annual_return, inputs["pe_ratio"]
+    ))
 
 
 def calculate_discounted_cash_flow(stock_data: Dict[str, Any], 
-                                   discount_rate: float=0.05) -> Optional[float]:
+                                   discount_rate: float=PAYBACK_DISCOUNT_RATE) -> Optional[float]:
     """
     Calculate years until earnings pay back the investor
     
-    TODO: Implement your calculation here
-    Example formula: Current Price / EPS = Years for earnings to payback investment
+    Years of growing free cash flow per share, discounted at
+    ``discount_rate``, needed to pay back the current price.
     
     Args:
         stock_data: Dictionary with stock data
+        discount_rate: Annual discount rate
     
     Returns:
         Number of years or None
     """
-    # Placeholder - implement your calculation
-    pass
+    inputs = valuation_inputs(pd.DataFrame([stock_data]))
+    return _scalar(valuation.payback_years(
+        inputs["price"], inputs["fcf_per_share"], inputs["growth_rate"], discount_rate
+    ))
 
 
 def calculate_price_to_buy(stock_data: Dict[str, Any],
-                           desired_annual_return: float=0.15,
-                           discount_price: float=0.5) -> Optional[float]:
+                           desired_annual_return: float=DESIRED_ANNUAL_RETURN,
+                           discount_price: float=MARGIN_OF_SAFETY) -> Optional[float]:
     """
     Calculate the target price to buy the stock with a margin of safety
     
-    TODO: Implement your target price logic here
-    Examples:
-    - Fair market value with safety margin (e.g., 20% discount)
-    - Support level based on technical analysis
-    - Value that provides margin of safety
-    
     Args:
         stock_data: Dictionary with stock data
         desired_annual_return: Desired annual return rate
-        discount_percentage: Margin of safety percentage
+        discount_price: Margin of safety (fraction taken off fair value)
     
     Returns:
         Recommended buy price or None
     """
-    # Placeholder - implement your calculation
-    pass
+    fair_value = calculate_fair_market_value(stock_data, desired_annual_return)
+    if fair_value is None:
+        return None
+    return _scalar(valuation.price_to_buy(fair_value, discount_price))
+
+
 def calculate_rate(period: str="annual",
                    timeframe: int=10,
                    present_value: float=0.0,
@@ -183,6 +266,134 @@ def calculate_rate(period: str="annual",
     # Calcuate the growth rate
     return ((future_value / present_value) ** (1 / num_periods)) - 1
 
+def _parse_filing(filing) -> Dict[str, Any]:
+    """
+    Extract the growth-rate inputs from one filing's financial statements
+    
+    Args:
+        filing: EdgarTools filing
+    
+    Returns:
+        Dictionary keyed like the financials table
+    """
+    income_stmt = filing.income_statement()
+    balance_sheet = filing.balance_sheet()
+    cash_flow = filing.cash_flow()
+    
+    return {
+        "cik": int(filing.cik),
+        "accession_number": filing.accession_no,
+        "form": filing.form,
+        "period": str(filing.filing_date),
+        "revenue": income_stmt.get("revenues", 0) if income_stmt is not None else 0,
+        "net_income": income_stmt.get("net_income", 0) if income_stmt is not None else 0,
+        "total_assets": balance_sheet.get("assets", 0) if balance_sheet is not None else 0,
+        "total_liabilities": balance_sheet.get("liabilities", 0) if balance_sheet is not None else 0,
+        "operating_cash_flow": cash_flow.get("operating", 0) if cash_flow is not None else 0,
+    }
+
+
+def configure_sec_rate_limit(rate: Optional[float] = None) -> None:
+    """
+    Limit every EdgarTools HTTP request in this process to ``rate`` per second
+
+    One filing's statements take several SEC requests, so the limit is set
+    on EdgarTools' shared HTTP transport rather than per filing: it covers
+    every request from every thread, and responses served from EdgarTools'
+    cache do not count.
+
+    Args:
+        rate: Requests per second (default: SEC_CONFIG['requests_per_second'])
+    """
+    from edgar.httpclient import HTTP_MGR
+
+    rate = rate if rate is not None else SEC_CONFIG["requests_per_second"]
+    HTTP_MGR.update_rate_limiter(max(int(rate), 1))
+
+
+configure_sec_rate_limit()
+
+
+def _parse_filings(filings: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Download and parse filings concurrently
+    
+    Filings are parsed on a bounded thread pool (SEC_CONFIG['max_workers']);
+    their HTTP requests share the process-wide SEC rate limit (see
+    configure_sec_rate_limit). A filing that fails is reported and skipped;
+    the others are unaffected.
+    
+    Args:
+        filings: EdgarTools filings
+    
+    Returns:
+        Parsed financials of the filings that succeeded, in input order
+    """
+    def parse(filing):
+        try:
+            return _parse_filing(filing)
+        except Exception as e:
+            print(f"Error extracting data from filing {filing.accession_no}: {e}")
+            return None
+    
+    if not filings:
+        return []
+    
+    max_workers = min(SEC_CONFIG["max_workers"], len(filings))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(parse, filings))
+    
+    return [record for record in results if record is not None]
+
+
+def get_company_financials(company_ticker: str,
+                           form: str = "10-K",
+                           timeframe: int = 10) -> List[Dict[str, Any]]:
+    """
+    Financials of a company's latest filings, parsed at most once per filing
+    
+    Parsed filings are kept in the financials table keyed by CIK and
+    accession number. The list of a company's latest accession numbers is
+    cached for DATA_CONFIG['cache_ttl_hours'], so a repeated request for a
+    known company is a local lookup; only filings not in the store are
+    downloaded and parsed, concurrently (see _parse_filings).
+    
+    Args:
+        company_ticker: Ticker symbol of the company
+        form: Filing form type
+        timeframe: Number of latest filings
+    
+    Returns:
+        List of financials dictionaries sorted by period (oldest first)
+    """
+    cache_key = f"edgar_filings:{company_ticker.upper()}:{form}:{timeframe}"
+    cached = get_cache(cache_key)
+    if cached:
+        accession_numbers = json.loads(cached)
+        stored = get_financials(accession_numbers)
+        if len(stored) == len(accession_numbers):
+            return sorted(stored, key=lambda x: x["period"])
+    
+    company = Company(company_ticker)
+    filings = company.get_filings(form=form).latest(timeframe)
+    
+    stored = {
+        record["accession_number"]: record
+        for record in get_financials([filing.accession_no for filing in filings])
+    }
+    
+    missing = [filing for filing in filings if filing.accession_no not in stored]
+    parsed = _parse_filings(missing)
+    
+    save_financials(parsed)
+    financials = sorted(list(stored.values()) + parsed, key=lambda x: x["period"])
+    set_cache(cache_key,
+              json.dumps([record["accession_number"] for record in financials]),
+              DATA_CONFIG["cache_ttl_hours"])
+    
+    return financials
+
+
 def calculate_growth_rates(company_ticker: str|None=None, 
                           period: str="annual",
                           currency: str="USD",
@@ -202,39 +413,14 @@ def calculate_growth_rates(company_ticker: str|None=None,
         print("Company ticker is required for growth rate calculation.")
         return {}
     
-    # Intialize Edgartools
+    growth_rates = {"growth_rates": {}}
+    
     try:
-        company = Company(company_ticker)
-        
-        # Fetch 10-K filings (annual reports)
-        ten_ks = company.get_filings(form="10-K").latest(timeframe)
-        
-        # Extract financial data from filings
-        financials = []
-        for filing in ten_ks:
-            try:
-                income_stmt = filing.income_statement()
-                balance_sheet = filing.balance_sheet()
-                cash_flow = filing.cash_flow()
-                
-                # Calculate metrics from financial statements
-                financials.append({
-                    "period": filing.filing_date,
-                    "revenue": income_stmt.get("revenues", 0) if income_stmt is not None else 0,
-                    "net_income": income_stmt.get("net_income", 0) if income_stmt is not None else 0,
-                    "total_assets": balance_sheet.get("assets", 0) if balance_sheet is not None else 0,
-                    "total_liabilities": balance_sheet.get("liabilities", 0) if balance_sheet is not None else 0,
-                    "operating_cash_flow": cash_flow.get("operating", 0) if cash_flow is not None else 0,
-                })
-            except Exception as e:
-                print(f"Error extracting data from filing: {e}")
-                continue
+        # 10-K filings (annual reports), from the local store where possible
+        financials = get_company_financials(company_ticker, form="10-K", timeframe=timeframe)
         
         # Calculate growth rates from historical data
         if len(financials) >= 2:
-            # Sort by period (oldest first)
-            financials = sorted(financials, key=lambda x: x["period"])
-            
             # Calculate year-over-year growth rates
             growth_rates["growth_rates"]["sales"] = calculate_growth_rate(
                 financials[-1]["revenue"], 
@@ -293,6 +479,181 @@ def calculate_growth_rate(current_value: float, prior_value: float, years: int)
     except (ValueError, ZeroDivisionError):
         return 0.0
 
+
+# ==================== INCREMENTAL RECOMPUTE ====================
+
+# Filing forms that trigger a recompute of a company's fundamentals
+TRACKED_FORMS = ["10-K", "10-Q"]
+
+REFRESH_CACHE_KEY = "fundamentals_refresh:last_run"
+
+
+def latest_filed_accessions(since: str, forms: List[str] = TRACKED_FORMS) -> Dict[int, str]:
+    """
+    Latest accession number per company among filings made since a date
+    
+    Reads SEC's filing index (one request for the whole market), so the
+    cost follows the number of filings, not the number of companies.
+    
+    Args:
+        since: First filing date, 'YYYY-MM-DD'
+        forms: Filing forms to include
+    
+    Returns:
+        Dictionary mapping CIK to its most recent accession number
+    """
+    filings = get_filings(form=forms, filing_date=f"{since}:")
+    if filings is None or filings.empty:
+        return {}
+    
+    index = filings.to_pandas("cik", "accession_number", "filing_date")
+    latest = index.sort_values(["filing_date", "accession_number"]).groupby("cik").last()
+    return {int(cik): accession for cik, accession in latest["accession_number"].items()}
+
+
+def stale_symbols(latest: Dict[int, str], symbols: Optional[List[str]] = None) -> List[str]:
+    """
+    Symbols whose stored fundamentals predate their company's latest filing
+    
+    A symbol whose last recompute failed (see refresh_fundamentals) waits
+    for a new filing in the same way, so companies that never produce
+    fundamentals (funds, foreign filers) are not retried every night.
+    
+    Args:
+        latest: CIK -> latest accession number (see latest_filed_accessions)
+        symbols: Symbols to check (default: every stored symbol); symbols
+                 without stored fundamentals or a failed attempt are stale
+    
+    Returns:
+        Stale symbols
+    """
+    stored = get_fundamentals(symbols)
+    candidates = list(stored) if symbols is None else [symbol.upper() for symbol in symbols]
+    failed = get_fundamentals_failures(candidates)
+    
+    stale = []
+    for symbol in candidates:
+        record = failed.get(symbol) or stored.get(symbol)
+        if record is None:
+            stale.append(symbol)
+        elif record["cik"] in latest and latest[record["cik"]] != record["accession_number"]:
+            stale.append(symbol)
+    return stale
+
+
+def lookup_cik(symbol: str) -> Optional[int]:
+    """CIK of a ticker from SEC's ticker list (None if it has none)"""
+    try:
+        cik = find_cik(symbol)
+    except Exception:
+        return None
+    return int(cik) if cik else None
+
+
+def recompute_fundamentals(symbol: str, accession_number: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Recompute and store a company's growth rates and fundamental analysis
+    
+    The cached list of the company's filings is dropped first, so the new
+    filing is picked up; filings already parsed are not parsed again.
+    
+    Args:
+        symbol: Ticker symbol
+        accession_number: Filing the outputs reflect (default: latest
+                          stored annual report)
+    
+    Returns:
+        Stored record with growth_rates and analysis dictionaries
+    """
+    symbol = symbol.upper()
+    clear_cache(f"edgar_filings:{symbol}:10-K:10")
+    
+    financials = get_company_financials(symbol, form="10-K", timeframe=10)
+    growth_rates = calculate_growth_rates(symbol)
+    analysis = analyze_fundamentals(fetch_fundamental_data(symbol)["info"])
+    
+    latest = financials[-1] if financials else {}
+    record = {
+        "symbol": symbol,
+        "cik": latest.get("cik"),
+        "accession_number": accession_number or latest.get("accession_number"),
+        "growth_rates": growth_rates,
+        "analysis": analysis,
+    }
+    save_fundamentals([{**record,
+                        "growth_rates": json.dumps(growth_rates, default=float),
+                        "analysis": json.dumps(analysis, default=str)}])
+    return record
+
+
+def get_cached_fundamentals(symbol: str) -> Dict[str, Any]:
+    """
+    Stored growth rates and fundamental analysis, computed on first use
+    
+    Stored outputs do not expire; refresh_fundamentals() replaces them when
+    the company files a new report.
+    
+    Args:
+        symbol: Ticker symbol
+    
+    Returns:
+        Record with growth_rates and analysis dictionaries
+    """
+    record = get_fundamentals([symbol.upper()]).get(symbol.upper())
+    if record is None:
+        return recompute_fundamentals(symbol)
+    return {**record,
+            "growth_rates": json.loads(record["growth_rates"]),
+            "analysis": json.loads(record["analysis"])}
+
+
+def refresh_fundamentals(symbols: Optional[List[str]] = None,
+                         since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Nightly job: recompute fundamentals only for companies with new filings
+    
+    Companies that filed a tracked form since the last run, and whose stored
+    outputs reflect an older filing, are recomputed; every other company
+    keeps its stored outputs. A failing company is reported and recorded
+    with its latest filing, and is only retried once it files again.
+    
+    Args:
+        symbols: Symbols to track (default: every active ticker of the
+                 universe plus every stored symbol); symbols without stored
+                 fundamentals are computed, so the first run fills the
+                 table for the whole universe
+        since: First filing date to consider (default: date of the last
+               run, or yesterday)
+    
+    Returns:
+        Dictionary mapping each recomputed symbol to its record
+    """
+    today = date.today().isoformat()
+    since = since or get_cache(REFRESH_CACHE_KEY) or (date.today() - timedelta(days=1)).isoformat()
+    
+    latest = latest_filed_accessions(since)
+    stored = get_fundamentals()
+    if symbols is None:
+        symbols = sorted(set(get_active_symbols()) | set(stored))
+    
+    stale = stale_symbols(latest, symbols)
+    failed = get_fundamentals_failures(stale)
+    recomputed, failures = {}, []
+    for symbol in stale:
+        cik = (failed.get(symbol) or stored.get(symbol) or {}).get("cik")
+        try:
+            recomputed[symbol] = recompute_fundamentals(symbol, latest.get(cik))
+        except Exception as e:
+            print(f"Error recomputing fundamentals for {symbol}: {e}")
+            cik = cik or lookup_cik(symbol)
+            failures.append({"symbol": symbol, "cik": cik, "accession_number": latest.get(cik),
+                             "error": f"{type(e).__name__}: {e}"})
+    save_fundamentals_failures(failures)
+    
+    set_cache(REFRESH_CACHE_KEY, today, ttl_hours=None)
+    return recomputed
+
+
 def calculate_financial_ratios(income_stmt: pd.DataFrame, balance_sheet: pd.DataFrame) -> Dict[str, float]:
     """
     Calculate key financial ratios
@@ -317,24 +678,42 @@ def calculate_financial_ratios(income_stmt: pd.DataFrame, balance_sheet: pd.Data
     return ratios
 
 
-def screen_stocks(data: pd.DataFrame, criteria: Dict[str, Any]) -> pd.DataFrame:
+def screen_stocks(data: pd.DataFrame,
+                  criteria: Dict[str, Any] | str,
+                  index: Optional[ScreeningIndex] = None,
+                  nan_policy: str = "exclude",
+                  sort_by: Optional[str] = None,
+                  ascending: bool = True,
+                  top_k: Optional[int] = None) -> pd.DataFrame:
     """
     Filter stocks based on fundamental criteria
     
     Args:
         data: DataFrame with stock data
-        criteria: Dictionary with screening criteria
+        criteria: Dictionary with screening criteria, column -> (low, high)
+                  with None for an open bound (unknown columns are ignored),
+                  or a screening expression such as
+                  "pe_ratio < 15 and (roe > 0.12 or current_ratio > 2)"
+        index: ScreeningIndex over ``data`` to reuse across screens
+               (default: built for this call)
+        nan_policy: 'exclude' (NaN fails a criterion) or 'include'
+                    (dictionary criteria only)
+        sort_by: Column to order the result by
+        ascending: Sort direction
+        top_k: Return at most this many rows
     
     Returns:
         Filtered DataFrame
     """
-    filtered = data
-    
-    for key, value in criteria.items():
-        if key in filtered.columns:
-            if isinstance(value, tuple):
-                filtered = filtered[
-                    (filtered[key] >= value[0]) & (filtered[key] <= value[1])
-                ]
+    index = index if index is not None else ScreeningIndex(data)
+    if isinstance(criteria, str):
+        return index.screen_expression(criteria, sort_by=sort_by,
+                                       ascending=ascending, top_k=top_k)
+    
+    criteria = {
+        key: value for key, value in criteria.items()
+        if key in data.columns and isinstance(value, (tuple, dict))
+    }
     
-    return filtered
+    return index.screen(criteria, nan_policy=nan_policy, sort_by=sort_by,
+                        ascending=ascending, top_k=top_k)
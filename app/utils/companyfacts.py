@@ -0,0 +1,323 @@
+"""
+Bulk ingestion of SEC companyfacts into a columnar fundamentals history
+
+SEC publishes every company's XBRL facts as one JSON file per CIK inside
+companyfacts.zip. ingest_companyfacts() streams the members straight out
+of the archive (nothing is extracted to disk), keeps a standard set of
+us-gaap concepts under normalized names and writes them as a Parquet
+dataset partitioned by concept:
+
+    cik, concept, period_start, period_end, fiscal_year, fiscal_period,
+    value, form, accession_number, filed
+
+Universe-wide calculations (e.g. universe_growth_rates) then run as
+grouped vectorized queries over this history, without calling EDGAR.
+"""
+
+import json
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import FUNDAMENTALS_HISTORY_DIR, PARQUET_CONFIG
+
+# Normalized concept -> (us-gaap tags in priority order, unit)
+CONCEPTS = {
+    "revenue": ([
+        "Revenues",
+        "RevenueFromContractWithCustomerExcludingAssessedTax",
+        "SalesRevenueNet",
+    ], "USD"),
+    "net_income": (["NetIncomeLoss"], "USD"),
+    "operating_income": (["OperatingIncomeLoss"], "USD"),
+    "total_assets": (["Assets"], "USD"),
+    "total_liabilities": (["Liabilities"], "USD"),
+    "stockholders_equity": (["StockholdersEquity"], "USD"),
+    "operating_cash_flow": (["NetCashProvidedByUsedInOperatingActivities"], "USD"),
+    "eps_diluted": (["EarningsPerShareDiluted"], "USD/shares"),
+}
+
+HISTORY_SCHEMA = pa.schema([
+    ("cik", pa.int64()),
+    ("concept", pa.string()),
+    ("period_start", pa.timestamp("ns")),
+    ("period_end", pa.timestamp("ns")),
+    ("fiscal_year", pa.int64()),
+    ("fiscal_period", pa.string()),
+    ("value", pa.float64()),
+    ("form", pa.string()),
+    ("accession_number", pa.string()),
+    ("filed", pa.timestamp("ns")),
+])
+
+
+def iter_companyfacts(zip_path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream (cik, companyfacts JSON) pairs out of companyfacts.zip
+
+    Args:
+        zip_path: Path to SEC's companyfacts.zip
+
+    Yields:
+        CIK and parsed JSON document of one company at a time
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.endswith(".json"):
+                continue
+            with archive.open(member) as f:
+                try:
+                    document = json.load(f)
+                except ValueError as e:
+                    print(f"Error parsing {member.filename}: {e}")
+                    continue
+            cik = document.get("cik")
+            if cik is not None:
+                yield int(cik), document
+
+
+def _first_reported(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Give every fact the fiscal year and period of its period's first filing
+
+    A fact's fy/fp describe the filing it appears in, so a prior-year
+    comparative in a later 10-K (or a year-end balance in the next 10-Q)
+    carries that filing's year and period. The filing that first reported
+    a period is the one about it.
+    """
+    keys = ["start", "end"] if "start" in frame.columns else ["end"]
+    order = pd.to_datetime(frame["filed"], errors="coerce").sort_values(kind="stable").index
+    first = frame.loc[order].groupby(keys, dropna=False)
+    frame = frame.copy()
+    for column in ("fy", "fp"):
+        if column in frame.columns:
+            frame[column] = first[column].transform("first").reindex(frame.index)
+    return frame
+
+
+def _fiscal_period(frame: pd.DataFrame) -> pd.Series:
+    """
+    Label each fact with the period it covers
+
+    Instant facts (balance sheet) keep the fiscal period of the first filing
+    reporting them (see _first_reported). Duration facts are labelled 'FY'
+    for about a year and with that filing's quarter for about three
+    months; year-to-date values (6 or 9 months) are dropped (None).
+    """
+    fp = frame["fp"].astype(object) if "fp" in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+    if "start" not in frame.columns:
+        return fp
+
+    days = (frame["end"] - frame["start"]).dt.days
+    quarter = np.where(fp.astype(str).str.startswith("Q"), fp, "Q4")
+    labels = np.select(
+        [days.isna(), days.between(350, 380), days.between(80, 100)],
+        [fp, "FY", quarter],
+        default=None,
+    )
+    return pd.Series(labels, index=frame.index, dtype=object)
+
+
+def normalize_companyfacts(cik: int, document: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Extract the standard concepts of one company as long-format rows
+
+    Facts of every candidate us-gaap tag of a concept are merged, since
+    companies switch tags over time (e.g. SalesRevenueNet before 2018).
+    Where tags overlap on a period the highest-priority tag wins, and facts
+    reported again in later filings (comparatives, restatements) are
+    collapsed to the most recently filed value per period, keeping the
+    fiscal year and period of the filing that first reported it.
+
+    Args:
+        cik: Company CIK
+        document: companyfacts JSON document
+
+    Returns:
+        DataFrame with the HISTORY_SCHEMA columns
+    """
+    us_gaap = document.get("facts", {}).get("us-gaap", {})
+    frames = []
+
+    for concept, (tags, unit) in CONCEPTS.items():
+        tagged = []
+        for priority, tag in enumerate(tags):
+            facts = us_gaap.get(tag, {}).get("units", {}).get(unit)
+            if facts:
+                tagged.append(pd.DataFrame(facts).assign(priority=priority))
+        if not tagged:
+            continue
+
+        frame = pd.concat(tagged, ignore_index=True)
+        frame["end"] = pd.to_datetime(frame["end"], errors="coerce")
+        if "start" in frame.columns:
+            frame["start"] = pd.to_datetime(frame["start"], errors="coerce")
+        frame["concept"] = concept
+        if "filed" in frame.columns:
+            frame = _first_reported(frame)
+        frame["fiscal_period"] = _fiscal_period(frame)
+        frames.append(frame[frame["fiscal_period"].notna() & frame["end"].notna()])
+
+    if not frames:
+        return pd.DataFrame({field.name: pd.Series(dtype=field.type.to_pandas_dtype())
+                             for field in HISTORY_SCHEMA})
+
+    facts = pd.concat(frames, ignore_index=True)
+    history = pd.DataFrame({
+        "cik": np.int64(cik),
+        "concept": facts["concept"],
+        "period_start": facts["start"] if "start" in facts.columns else pd.NaT,
+        "period_end": facts["end"],
+        "fiscal_year": pd.to_numeric(facts.get("fy"), errors="coerce").astype("Int64"),
+        "fiscal_period": facts["fiscal_period"],
+        "value": pd.to_numeric(facts["val"], errors="coerce").astype(np.float64),
+        "form": facts.get("form"),
+        "accession_number": facts.get("accn"),
+        "filed": pd.to_datetime(facts.get("filed"), errors="coerce"),
+    })
+
+    # Last per period: highest-priority tag, then most recently filed
+    history["priority"] = facts["priority"]
+    history = history.sort_values(["priority", "filed"], ascending=[False, True]).drop_duplicates(
+        ["concept", "period_end", "fiscal_period"], keep="last"
+    )
+    return history.drop(columns="priority").sort_values(["concept", "period_end"], ignore_index=True)
+
+
+def ingest_companyfacts(zip_path: Path,
+                        output_dir: Optional[Path] = None,
+                        batch_size: int = 500) -> int:
+    """
+    Build the fundamentals history from companyfacts.zip
+
+    Companies are normalized one at a time and written in batches, so
+    memory stays bounded by ``batch_size`` companies. The existing history
+    in ``output_dir`` is replaced.
+
+    Args:
+        zip_path: Path to SEC's companyfacts.zip
+        output_dir: Parquet dataset directory (default: FUNDAMENTALS_HISTORY_DIR)
+        batch_size: Companies per written batch
+
+    Returns:
+        Number of rows written
+    """
+    output_dir = Path(output_dir) if output_dir is not None else FUNDAMENTALS_HISTORY_DIR
+    staging_dir = output_dir.with_name(output_dir.name + ".staging")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    batch: List[pd.DataFrame] = []
+    batch_number = 0
+    rows = 0
+
+    def flush():
+        nonlocal batch, batch_number, rows
+        frames = [frame for frame in batch if len(frame)]
+        if frames:
+            table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True),
+                                         schema=HISTORY_SCHEMA, preserve_index=False)
+            pq.write_to_dataset(table, staging_dir, partition_cols=["concept"],
+                                basename_template=f"part-{batch_number:05d}-{{i}}.parquet",
+                                compression=PARQUET_CONFIG["compression"])
+            rows += table.num_rows
+        batch = []
+        batch_number += 1
+
+    for cik, document in iter_companyfacts(zip_path):
+        batch.append(normalize_companyfacts(cik, document))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    # Swap in the new history only once it is complete
+    shutil.rmtree(output_dir, ignore_errors=True)
+    if staging_dir.exists():
+        staging_dir.rename(output_dir)
+    return rows
+
+
+def load_fundamentals_history(concepts: Optional[List[str]] = None,
+                              ciks: Optional[List[int]] = None,
+                              base_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Read the fundamentals history, pruning partitions and rows on the way
+
+    Args:
+        concepts: Normalized concepts to read (default: all)
+        ciks: CIKs to read (default: all)
+        base_dir: Parquet dataset directory (default: FUNDAMENTALS_HISTORY_DIR)
+
+    Returns:
+        Long-format DataFrame with the HISTORY_SCHEMA columns
+    """
+    base_dir = Path(base_dir) if base_dir is not None else FUNDAMENTALS_HISTORY_DIR
+
+    filters = []
+    if concepts is not None:
+        filters.append(("concept", "in", list(concepts)))
+    if ciks is not None:
+        filters.append(("cik", "in", [int(cik) for cik in ciks]))
+
+    history = pq.read_table(base_dir, filters=filters or None).to_pandas()
+    history["concept"] = history["concept"].astype(str)
+    return history
+
+
+def universe_growth_rates(history: pd.DataFrame,
+                          concept: str = "revenue",
+                          years: int = 10) -> pd.DataFrame:
+    """
+    Compound annual growth rate of a concept for every company at once
+
+    Uses fiscal-year values only: for each CIK the latest FY value is
+    compared with the earliest FY value at most ``years`` years before it.
+
+    Args:
+        history: Fundamentals history (see load_fundamentals_history)
+        concept: Normalized concept, e.g. 'revenue'
+        years: Maximum span in years
+
+    Returns:
+        DataFrame indexed by CIK with first/last period end and value,
+        span in years and CAGR (NaN where it is undefined)
+    """
+    annual = history[(history["concept"] == concept) & (history["fiscal_period"] == "FY")]
+    annual = annual.sort_values(["cik", "period_end"])
+
+    last = annual.groupby("cik")[["period_end", "value"]].last()
+    window_start = annual["cik"].map(last["period_end"]) - pd.DateOffset(years=years, days=15)
+    in_window = annual[annual["period_end"] >= window_start]
+    first = in_window.groupby("cik")[["period_end", "value"]].first()
+
+    result = pd.DataFrame({
+        "first_period_end": first["period_end"],
+        "first_value": first["value"],
+        "last_period_end": last["period_end"],
+        "last_value": last["value"],
+    })
+    result["years"] = ((result["last_period_end"] - result["first_period_end"]).dt.days / 365.25).round()
+
+    valid = (result["years"] > 0) & (result["first_value"] > 0) & (result["last_value"] > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = (result["last_value"] / result["first_value"]) ** (1 / result["years"]) - 1
+    result["cagr"] = cagr.where(valid)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest SEC companyfacts.zip")
+    parser.add_argument("zip_path", type=Path, help="Path to companyfacts.zip")
+    parser.add_argument("--output-dir", type=Path, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = ingest_companyfacts(args.zip_path, args.output_dir, args.batch_size)
+    print(f"Wrote {count} rows to {args.output_dir or FUNDAMENTALS_HISTORY_DIR}")
@@ -5,12 +5,16 @@ Database initialization and management for Stock Analyzer
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional
 from config.settings import PROCESSED_DATA_DIR
 
 
 DB_PATH = PROCESSED_DATA_DIR / "stock_analyzer.db"
 
+# Bound parameters per IN (...) query, below SQLite's variable limit (999
+# in older builds)
+MAX_QUERY_VARIABLES = 900
+
 
 def get_db_connection():
     """Get a database connection"""
@@ -69,6 +73,71 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_cache_key ON cache(key)
     ''')
     
+    # Create financials table for values parsed from SEC filings
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS financials (
+            cik INTEGER NOT NULL,
+            accession_number TEXT NOT NULL,
+            form TEXT,
+            period TEXT,
+            revenue REAL,
+            net_income REAL,
+            total_assets REAL,
+            total_liabilities REAL,
+            operating_cash_flow REAL,
+            parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (cik, accession_number)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_financials_accession ON financials(accession_number)
+    ''')
+    
+    # Create fundamentals table for computed outputs and the filing they reflect
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fundamentals (
+            symbol TEXT PRIMARY KEY,
+            cik INTEGER,
+            accession_number TEXT,
+            growth_rates TEXT,
+            analysis TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fundamentals_cik ON fundamentals(cik)
+    ''')
+    
+    # Create fundamentals failures table: symbols whose last recompute failed,
+    # with the latest filing at the time, so they wait for a new one
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fundamentals_failures (
+            symbol TEXT PRIMARY KEY,
+            cik INTEGER,
+            accession_number TEXT,
+            error TEXT,
+            attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create peer ranks table (see utils.peers), clustered by symbol
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS peer_ranks (
+            symbol TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            level TEXT NOT NULL,
+            group_name TEXT,
+            value REAL,
+            percentile REAL,
+            median REAL,
+            zscore REAL,
+            peers INTEGER,
+            PRIMARY KEY (symbol, metric, level)
+        ) WITHOUT ROWID
+    ''')
+    
     conn.commit()
     conn.close()
 
@@ -121,6 +190,162 @@ def clear_cache(key: Optional[str] = None) -> None:
     conn.close()
 
 
+FINANCIAL_COLUMNS = [
+    "cik",
+    "accession_number",
+    "form",
+    "period",
+    "revenue",
+    "net_income",
+    "total_assets",
+    "total_liabilities",
+    "operating_cash_flow",
+]
+
+
+def _chunks(values: List[Any], size: int = MAX_QUERY_VARIABLES) -> Iterator[List[Any]]:
+    """Consecutive slices of at most ``size`` values, one per IN (...) query"""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def get_financials(accession_numbers: List[str]) -> List[Dict[str, Any]]:
+    """Retrieve stored filing financials by accession number"""
+    if not accession_numbers:
+        return []
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    rows = []
+    for chunk in _chunks(accession_numbers):
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f'''
+            SELECT {", ".join(FINANCIAL_COLUMNS)} FROM financials
+            WHERE accession_number IN ({placeholders})
+        ''', chunk)
+        rows.extend(dict(row) for row in cursor.fetchall())
+    conn.close()
+    
+    return rows
+
+
+def save_financials(records: List[Dict[str, Any]]) -> None:
+    """Store financials parsed from filings, keyed by CIK and accession number"""
+    if not records:
+        return
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO financials ({", ".join(FINANCIAL_COLUMNS)}, parsed_at)
+        VALUES ({", ".join("?" * len(FINANCIAL_COLUMNS))}, datetime('now'))
+    ''', [[record.get(column) for column in FINANCIAL_COLUMNS] for record in records])
+    
+    conn.commit()
+    conn.close()
+
+
+FUNDAMENTAL_COLUMNS = [
+    "symbol",
+    "cik",
+    "accession_number",
+    "growth_rates",
+    "analysis",
+]
+
+
+def get_active_symbols() -> List[str]:
+    """Symbols of every active ticker in the universe (tickers table)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT symbol FROM tickers WHERE is_active = 1 ORDER BY symbol')
+    symbols = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return symbols
+
+
+def _select_by_symbol(query: str, symbols: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+    """Rows of a per-symbol table keyed by symbol (all rows if symbols is None)"""
+    if symbols is not None and not symbols:
+        return {}
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    if symbols is None:
+        cursor.execute(query)
+        rows = {row["symbol"]: dict(row) for row in cursor.fetchall()}
+    else:
+        rows = {}
+        for chunk in _chunks(symbols):
+            cursor.execute(f'{query} WHERE symbol IN ({", ".join("?" * len(chunk))})', chunk)
+            rows.update((row["symbol"], dict(row)) for row in cursor.fetchall())
+    conn.close()
+    
+    return rows
+
+
+def get_fundamentals(symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Retrieve stored fundamentals outputs by symbol (all symbols if None)"""
+    return _select_by_symbol(
+        f'SELECT {", ".join(FUNDAMENTAL_COLUMNS)}, updated_at FROM fundamentals', symbols
+    )
+
+
+def save_fundamentals(records: List[Dict[str, Any]]) -> None:
+    """Store computed fundamentals outputs, one row per symbol, clearing their failures"""
+    if not records:
+        return
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO fundamentals ({", ".join(FUNDAMENTAL_COLUMNS)}, updated_at)
+        VALUES ({", ".join("?" * len(FUNDAMENTAL_COLUMNS))}, datetime('now'))
+    ''', [[record.get(column) for column in FUNDAMENTAL_COLUMNS] for record in records])
+    cursor.executemany('DELETE FROM fundamentals_failures WHERE symbol = ?',
+                       [[record["symbol"]] for record in records])
+    
+    conn.commit()
+    conn.close()
+
+
+FAILURE_COLUMNS = [
+    "symbol",
+    "cik",
+    "accession_number",
+    "error",
+]
+
+
+def get_fundamentals_failures(symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Retrieve the last failed recompute by symbol (all symbols if None)"""
+    return _select_by_symbol(
+        f'SELECT {", ".join(FAILURE_COLUMNS)}, attempted_at FROM fundamentals_failures', symbols
+    )
+
+
+def save_fundamentals_failures(records: List[Dict[str, Any]]) -> None:
+    """Store failed recomputes, keyed by symbol with the latest filing at the time"""
+    if not records:
+        return
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO fundamentals_failures ({", ".join(FAILURE_COLUMNS)}, attempted_at)
+        VALUES ({", ".join("?" * len(FAILURE_COLUMNS))}, datetime('now'))
+    ''', [[record.get(column) for column in FAILURE_COLUMNS] for record in records])
+    
+    conn.commit()
+    conn.close()
+
+
 if __name__ == "__main__":
     init_db()
     print(f"Database initialized at {DB_PATH}")
@@ -0,0 +1,409 @@
+"""
+On-disk feature store for model training and inference
+
+Engineered features (returns, lagged returns, technical indicators and
+fundamentals joined as of their filing date) are materialized once per
+(symbol, feature definition) and stored as a float32 matrix in column-major
+order, so every feature is one contiguous column on disk:
+
+    FEATURES_DIR/<definition key>/<SYMBOL>/features.npy   rows x columns
+                                          /dates.npy      datetime64[ns]
+                                          /meta.json      columns, definition,
+                                                          input data fingerprint
+
+Reads are memory-mapped: training slices a date range without loading the
+file, inference reads just the latest row. A definition is keyed by its
+version and content, so changing it writes a new store next to the old one
+instead of mixing features built under different definitions.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import FEATURES_DIR, FUNDAMENTALS_HISTORY_DIR
+
+from .indicator_cache import _digest, _row_hashes, data_fingerprint, spec_key
+from .technical_analysis import calculate_indicators
+
+FEATURE_DTYPE = np.float32
+
+# Indicator columns that are price levels (stored as distance from the
+# close) or price differences (stored as a fraction of the close)
+PRICE_LEVEL_PREFIXES = ("SMA_", "EMA_", "BBL", "BBM", "BBU")
+PRICE_UNIT_PREFIXES = ("ATR_", "MACD")
+
+# Default feature definition; bump the version when feature semantics
+# change without the definition itself changing (e.g. a kernel fix)
+DEFAULT_FEATURES: Dict[str, Any] = {
+    "version": 3,
+    "returns": [1, 5, 20],
+    "lags": [1, 2, 3, 5],
+    "indicators": {
+        "add_moving_averages": {"short_window": 20, "long_window": 50},
+        "add_rsi": {"period": 14},
+        "add_macd": {},
+        "add_bollinger_bands": {},
+        "add_atr": {},
+    },
+    "fundamentals": ["revenue", "net_income", "eps_diluted", "stockholders_equity"],
+    "targets": [5],
+}
+
+
+def definition_key(definition: Dict[str, Any]) -> str:
+    """Directory name of a feature definition: version and content hash"""
+    return f"v{definition.get('version', 0)}-{spec_key(definition)}"
+
+
+def _dates(data: pd.DataFrame) -> pd.DatetimeIndex:
+    """Bar timestamps from a Date column or the index"""
+    dates = data["Date"] if "Date" in data.columns else data.index
+    return pd.DatetimeIndex(pd.to_datetime(dates))
+
+
+def _fundamentals_asof(dates: pd.DatetimeIndex, history: pd.DataFrame,
+                       concepts: List[str]) -> pd.DataFrame:
+    """
+    Latest annual value of each concept known before every bar
+
+    Facts are aligned on their filing date, strictly before the bar, so a
+    bar never sees a report filed later the same day or after it.
+    """
+    annual = history[history["concept"].isin(concepts) & (history["fiscal_period"] == "FY")]
+    frame = pd.DataFrame(index=dates)
+    if annual.empty:
+        return frame.reindex(columns=[f"fund_{concept}" for concept in concepts])
+
+    # One row per filing date: the latest period reported in each filing
+    known = (annual.sort_values(["filed", "period_end"])
+             .pivot_table(index="filed", columns="concept", values="value", aggfunc="last")
+             .reindex(columns=concepts)
+             .ffill())
+    known.columns = [f"fund_{concept}" for concept in concepts]
+
+    bars = pd.DataFrame({"bar": dates}).sort_values("bar")
+    joined = pd.merge_asof(bars, known.rename_axis("filed").reset_index(),
+                           left_on="bar", right_on="filed", allow_exact_matches=False)
+    return joined.drop(columns=["bar", "filed"]).set_index(dates)
+
+
+def build_features(data: pd.DataFrame,
+                   definition: Dict[str, Any] = DEFAULT_FEATURES,
+                   fundamentals: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Engineered features for one symbol, one row per bar
+
+    Args:
+        data: Daily OHLCV data (Date column or DatetimeIndex), oldest first
+        definition: Feature definition (see DEFAULT_FEATURES)
+        fundamentals: The company's fundamentals history in the
+                      companyfacts format (see load_fundamentals_history)
+
+    Returns:
+        DataFrame indexed by date with float32 feature columns; target
+        columns (forward returns) are prefixed 'target_' and come last
+    """
+    dates = _dates(data)
+    close = pd.Series(data["Close"].to_numpy(dtype=np.float64), index=dates)
+    columns: Dict[str, pd.Series] = {}
+
+    for period in definition.get("returns", []):
+        columns[f"return_{period}"] = close.pct_change(period)
+
+    daily_return = close.pct_change()
+    for lag in definition.get("lags", []):
+        columns[f"return_1_lag_{lag}"] = daily_return.shift(lag)
+
+    indicators = calculate_indicators(data, definition.get("indicators", {}))
+    added = [column for column in indicators.columns
+             if column not in data.columns and pd.api.types.is_numeric_dtype(indicators[column])]
+    for column in added:
+        values = pd.Series(indicators[column].to_numpy(dtype=np.float64), index=dates)
+        # Indicators in price units relative to the close, so they compare across symbols
+        if column.startswith(PRICE_LEVEL_PREFIXES):
+            values = values / close - 1.0
+        elif column.startswith(PRICE_UNIT_PREFIXES):
+            values = values / close
+        columns[column] = values
+
+    features = pd.DataFrame(columns, index=dates)
+
+    concepts = definition.get("fundamentals", [])
+    if concepts:
+        history = fundamentals if fundamentals is not None else pd.DataFrame(
+            columns=["concept", "fiscal_period", "filed", "period_end", "value"]
+        )
+        features = features.join(_fundamentals_asof(dates, history, concepts))
+
+    for horizon in definition.get("targets", []):
+        features[f"target_return_{horizon}"] = close.shift(-horizon) / close - 1.0
+
+    features.index.name = "Date"
+    return features.astype(FEATURE_DTYPE)
+
+
+class FeatureStore:
+    """Memory-mapped float32 feature matrices keyed by symbol and definition"""
+
+    def __init__(self, base_dir: Optional[Path] = None,
+                 definition: Optional[Dict[str, Any]] = None):
+        """
+        Initialize FeatureStore
+
+        Args:
+            base_dir: Root directory of the store (default: FEATURES_DIR)
+            definition: Feature definition (default: DEFAULT_FEATURES)
+        """
+        self.base_dir = Path(base_dir) if base_dir is not None else FEATURES_DIR
+        self.definition = definition if definition is not None else DEFAULT_FEATURES
+        self.root = self.base_dir / definition_key(self.definition)
+
+    def get_path(self, symbol: str) -> Path:
+        """Get the directory of a symbol's features"""
+        return self.root / symbol.upper()
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored features for this definition"""
+        if not self.root.exists():
+            return []
+        return sorted(path.name for path in self.root.iterdir() if (path / "meta.json").exists())
+
+    def build(self, symbol: str, data: pd.DataFrame,
+              fundamentals: Optional[pd.DataFrame] = None) -> bool:
+        """
+        Materialize a symbol's features unless they match the input data
+
+        Run once a day after new bars arrive (see refresh_feature_store);
+        experiments then only read.
+
+        Args:
+            symbol: Stock ticker symbol
+            data: Daily OHLCV data
+            fundamentals: The company's fundamentals history (optional)
+
+        Returns:
+            True if the features were (re)built, False if already current
+        """
+        fingerprint = data_fingerprint(data)
+        if fundamentals is not None:
+            fingerprint["fundamentals"] = _digest(_row_hashes(fundamentals))
+        meta = self.metadata(symbol)
+        if meta is not None and meta.get("fingerprint") == fingerprint:
+            return False
+
+        features = build_features(data, self.definition, fundamentals)
+        self._write(symbol, features, fingerprint)
+        return True
+
+    def metadata(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Stored metadata of a symbol (columns, definition, fingerprint), or None"""
+        path = self.get_path(symbol) / "meta.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def columns(self, symbol: str) -> List[str]:
+        """Stored column names of a symbol"""
+        meta = self.metadata(symbol)
+        if meta is None:
+            raise KeyError(f"No features stored for {symbol}")
+        return meta["columns"]
+
+    def read(self, symbol: str, start=None, end=None,
+             columns: Optional[List[str]] = None) -> Tuple[np.ndarray, pd.DatetimeIndex, List[str]]:
+        """
+        Memory-mapped slice of a symbol's features
+
+        Args:
+            symbol: Stock ticker symbol
+            start: First date (inclusive, default: first row)
+            end: Last date (inclusive, default: last row)
+            columns: Columns to read (default: all); a contiguous run of
+                     columns stays a view of the file
+
+        Returns:
+            Tuple of (rows x columns float32 array, dates, column names)
+        """
+        path = self.get_path(symbol)
+        names = self.columns(symbol)
+        matrix = np.load(path / "features.npy", mmap_mode="r")
+        dates = pd.DatetimeIndex(np.load(path / "dates.npy"))
+
+        first = 0 if start is None else int(dates.searchsorted(pd.Timestamp(start), side="left"))
+        last = len(dates) if end is None else int(dates.searchsorted(pd.Timestamp(end), side="right"))
+        rows = matrix[first:last]
+
+        if columns is None:
+            return rows, dates[first:last], names
+
+        positions = [names.index(column) for column in columns]
+        if positions == list(range(positions[0], positions[0] + len(positions))):
+            rows = rows[:, positions[0]:positions[0] + len(positions)]
+        else:
+            rows = rows[:, positions]
+        return rows, dates[first:last], list(columns)
+
+    def training_data(self, symbol: str, start=None, end=None,
+                      target: Optional[str] = None,
+                      features: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray, pd.DatetimeIndex]:
+        """
+        Feature matrix and target for train_model
+
+        Rows with an undefined target (the last bars before the horizon) are
+        dropped; feature NaNs (warm-up bars, missing fundamentals) are kept
+        for the caller to handle.
+
+        Args:
+            symbol: Stock ticker symbol
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            target: Target column (default: the first 'target_' column)
+            features: Feature columns, in order (default: every feature)
+
+        Returns:
+            Tuple of (X, y, dates)
+        """
+        names = self.columns(symbol)
+        features = features or [name for name in names if not name.startswith("target_")]
+        target = target or next(name for name in names if name.startswith("target_"))
+
+        X, dates, _ = self.read(symbol, start, end, features)
+        y, _, _ = self.read(symbol, start, end, [target])
+        y = np.asarray(y[:, 0])
+
+        # Undefined targets sit at the end; trimming them keeps X a memmap view
+        valid = ~np.isnan(y)
+        end = len(y) - int(np.argmax(valid[::-1])) if valid.any() else 0
+        X, y, dates, valid = X[:end], y[:end], dates[:end], valid[:end]
+        if valid.all():
+            return X, y, dates
+        return X[valid], y[valid], dates[valid]
+
+    def latest(self, symbol: str) -> pd.Series:
+        """Latest feature row of a symbol for inference (targets excluded)"""
+        names = self.columns(symbol)
+        features = [name for name in names if not name.startswith("target_")]
+        rows, dates, _ = self.read(symbol, columns=features)
+        return pd.Series(np.asarray(rows[-1]), index=features, name=dates[-1])
+
+    def invalidate(self, symbol: str) -> None:
+        """Remove a symbol's stored features for this definition"""
+        shutil.rmtree(self.get_path(symbol), ignore_errors=True)
+
+    def _write(self, symbol: str, features: pd.DataFrame, fingerprint: Dict[str, Any]) -> None:
+        """Write matrix, dates and metadata, replacing the old files at once"""
+        path = self.get_path(symbol)
+        staging = path.with_name(path.name + ".staging")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        # Column-major: each feature is contiguous on disk
+        np.save(staging / "features.npy", np.asfortranarray(features.to_numpy(dtype=FEATURE_DTYPE)))
+        np.save(staging / "dates.npy", features.index.to_numpy(dtype="datetime64[ns]"))
+        (staging / "meta.json").write_text(json.dumps({
+            "columns": list(features.columns),
+            "definition": self.definition,
+            "fingerprint": fingerprint,
+        }, default=str))
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging, path)
+
+
+def load_symbol_fundamentals(symbols: List[str], concepts: Optional[List[str]] = None,
+                             base_dir: Optional[Path] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Companyfacts history of each symbol, for FeatureStore.build
+
+    CIKs come from the stored fundamentals (see analysis.refresh_fundamentals).
+    Symbols without a known CIK, and every symbol while no history has been
+    ingested (see companyfacts.ingest_companyfacts), get none.
+
+    Args:
+        symbols: Stock ticker symbols
+        concepts: Normalized concepts to read (default: all)
+        base_dir: Parquet dataset directory (default: FUNDAMENTALS_HISTORY_DIR)
+
+    Returns:
+        Dictionary mapping symbols to their history in the companyfacts format
+    """
+    from .companyfacts import load_fundamentals_history
+    from .database import get_fundamentals
+
+    base_dir = Path(base_dir) if base_dir is not None else FUNDAMENTALS_HISTORY_DIR
+    if not symbols or not base_dir.exists():
+        return {}
+    ciks = {symbol: int(record["cik"])
+            for symbol, record in get_fundamentals([symbol.upper() for symbol in symbols]).items()
+            if record.get("cik") is not None}
+    if not ciks:
+        return {}
+
+    history = load_fundamentals_history(concepts, sorted(set(ciks.values())), base_dir)
+    by_cik = {int(cik): frame for cik, frame in history.groupby("cik")}
+    return {symbol: by_cik[cik] for symbol, cik in ciks.items() if cik in by_cik}
+
+
+def _build_symbol(symbol: str, base_dir: Path, definition: Dict[str, Any], period: str,
+                  fundamentals: Optional[pd.DataFrame] = None) -> bool:
+    """Worker of refresh_feature_store: build one symbol from fresh bars"""
+    from .data_loader import fetch_stock_data
+
+    store = FeatureStore(base_dir, definition)
+    return store.build(symbol, fetch_stock_data(symbol, period=period), fundamentals)
+
+
+def refresh_feature_store(symbols: Optional[List[str]] = None,
+                          store: Optional[FeatureStore] = None,
+                          period: str = "10y",
+                          n_jobs: Optional[int] = None) -> Dict[str, bool]:
+    """
+    Daily job: rebuild the features of every tracked symbol from fresh bars
+
+    Each symbol's companyfacts history is joined as of its filing dates
+    (see load_symbol_fundamentals). Symbols whose price data and
+    fundamentals did not change keep their stored features (see
+    FeatureStore.build). Symbols are fetched and built on a process pool
+    (see parallel.run_per_symbol); a failing symbol is reported and skipped.
+
+    Args:
+        symbols: Symbols to build (default: every symbol already in the
+                 store plus the symbols registered models were trained on)
+        store: Feature store (default: FeatureStore())
+        period: Price history to build from
+        n_jobs: Worker processes (default: PARALLEL_CONFIG, all cores)
+
+    Returns:
+        Dictionary mapping each symbol to True if rebuilt, False if current
+    """
+    from .model_registry import get_registry
+    from .parallel import run_per_symbol
+
+    store = store if store is not None else FeatureStore()
+    if symbols is None:
+        registry = get_registry()
+        trained_on = {registry.metadata(name).get("symbol") for name in registry.names()}
+        symbols = sorted(set(store.symbols()) | {symbol for symbol in trained_on if symbol})
+
+    symbols = [symbol.upper() for symbol in symbols]
+    fundamentals = {}
+    if store.definition.get("fundamentals"):
+        try:
+            fundamentals = load_symbol_fundamentals(symbols, store.definition["fundamentals"])
+        except Exception as e:
+            print(f"Error loading fundamentals history: {e}")
+
+    built, errors = run_per_symbol(
+        _build_symbol, symbols, n_jobs=n_jobs,
+        per_symbol={symbol: {"fundamentals": frame} for symbol, frame in fundamentals.items()},
+        base_dir=store.base_dir, definition=store.definition, period=period,
+    )
+    for symbol, error in errors.items():
+        print(f"Error building features for {symbol}: {error}")
+    return built
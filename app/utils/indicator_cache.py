@@ -0,0 +1,190 @@
+"""
+Persistent cache for technical indicator results
+
+Indicator frames are stored as Parquet next to the price store, one file
+per (symbol, indicator spec). Each file carries a fingerprint of the price
+data it was computed from (row count, last bar, hash of all rows) in its
+Arrow schema metadata, so a cache hit is a single file read.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import INDICATOR_CACHE_DIR, PARQUET_CONFIG
+
+FINGERPRINT_KEY = b"indicator_fingerprint"
+SPEC_KEY = b"indicator_spec"
+
+
+def spec_key(spec: Dict[str, Any]) -> str:
+    """
+    Build a stable key for an indicator spec
+
+    Args:
+        spec: Indicator spec, e.g. {"add_rsi": {"period": 14}}
+
+    Returns:
+        Short hex digest of the canonical JSON form of the spec
+    """
+    canonical = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def _row_hashes(data: pd.DataFrame) -> np.ndarray:
+    """Hash every row (values and index) of a price frame"""
+    return pd.util.hash_pandas_object(data, index=True).to_numpy()
+
+
+def _digest(row_hashes: np.ndarray) -> str:
+    """Combine row hashes into one order-sensitive digest"""
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def _last_bar(data: pd.DataFrame, row: int) -> str:
+    """Timestamp (or index label) of a bar as a string"""
+    if "Date" in data.columns:
+        return str(data["Date"].iloc[row])
+    return str(data.index[row])
+
+
+def data_fingerprint(data: pd.DataFrame,
+                     row_hashes: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Fingerprint a price frame
+
+    Args:
+        data: DataFrame with OHLCV data
+        row_hashes: Precomputed row hashes of ``data`` (optional)
+
+    Returns:
+        Dictionary with row count, last bar timestamp and content hash
+    """
+    if row_hashes is None:
+        row_hashes = _row_hashes(data)
+
+    return {
+        "rows": len(data),
+        "last_bar": _last_bar(data, -1) if len(data) else None,
+        "hash": _digest(row_hashes),
+    }
+
+
+class IndicatorCache:
+    """Parquet-backed cache of indicator frames keyed by symbol, spec and data"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Initialize IndicatorCache
+
+        Args:
+            cache_dir: Directory for cached Parquet files
+                      (default: INDICATOR_CACHE_DIR next to the price store)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else INDICATOR_CACHE_DIR
+
+    def get_path(self, symbol: str, spec: Dict[str, Any]) -> Path:
+        """Get the cache file path for a symbol and indicator spec"""
+        return self.cache_dir / symbol.upper() / f"{spec_key(spec)}.parquet"
+
+    def get_or_compute(self,
+                       symbol: str,
+                       data: pd.DataFrame,
+                       spec: Dict[str, Any],
+                       compute: Callable[[pd.DataFrame], pd.DataFrame],
+                       lookback: int = 0) -> pd.DataFrame:
+        """
+        Return cached indicators for the data, computing only what is missing
+
+        - Same fingerprint: the cached frame is returned as is.
+        - New bars appended to the cached data: ``compute`` runs on the new
+          bars plus ``lookback`` preceding bars, and only the new rows are
+          appended to the cached frame.
+        - Anything else (history revised, spec changed): full recompute.
+
+        Args:
+            symbol: Stock ticker symbol
+            data: DataFrame with OHLCV data
+            spec: Indicator spec the result is computed from
+            compute: Function that adds the indicator columns to a frame
+            lookback: Bars before the first new bar to feed to ``compute``
+                      when extending, so rolling and recursive indicators
+                      are warmed up
+
+        Returns:
+            DataFrame with indicator columns, aligned with ``data``
+        """
+        path = self.get_path(symbol, spec)
+        row_hashes = _row_hashes(data)
+        fingerprint = data_fingerprint(data, row_hashes)
+
+        cached, cached_fp = self._read(path)
+        if cached is not None and cached_fp is not None:
+            if cached_fp == fingerprint:
+                return cached
+
+            cached_rows = cached_fp.get("rows", 0)
+            if (0 < cached_rows < len(data)
+                    and len(cached) == cached_rows
+                    and _last_bar(data, cached_rows - 1) == cached_fp.get("last_bar")
+                    and _digest(row_hashes[:cached_rows]) == cached_fp.get("hash")):
+                start = max(cached_rows - lookback, 0)
+                tail = compute(data.iloc[start:])
+                result = pd.concat([cached, tail.iloc[cached_rows - start:]])
+                self._write(path, result, fingerprint, spec)
+                return result
+
+        result = compute(data)
+        self._write(path, result, fingerprint, spec)
+        return result
+
+    def invalidate(self, symbol: str, spec: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Remove cached indicator files
+
+        Args:
+            symbol: Stock ticker symbol
+            spec: Indicator spec to remove (default: all specs for the symbol)
+        """
+        if spec is not None:
+            self.get_path(symbol, spec).unlink(missing_ok=True)
+            return
+
+        symbol_dir = self.cache_dir / symbol.upper()
+        if symbol_dir.exists():
+            for path in symbol_dir.glob("*.parquet"):
+                path.unlink()
+
+    def _read(self, path: Path):
+        """Read a cached frame and its fingerprint, or (None, None)"""
+        if not path.exists():
+            return None, None
+
+        try:
+            table = pq.read_table(path)
+            metadata = table.schema.metadata or {}
+            fingerprint = json.loads(metadata[FINGERPRINT_KEY]) if FINGERPRINT_KEY in metadata else None
+            return table.to_pandas(), fingerprint
+        except Exception as e:
+            print(f"Error reading indicator cache {path}: {e}")
+            return None, None
+
+    def _write(self, path: Path, df: pd.DataFrame,
+               fingerprint: Dict[str, Any], spec: Dict[str, Any]) -> None:
+        """Write a frame with its fingerprint and spec in the schema metadata"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            metadata = dict(table.schema.metadata or {})
+            metadata[FINGERPRINT_KEY] = json.dumps(fingerprint).encode()
+            metadata[SPEC_KEY] = json.dumps(spec, sort_keys=True, default=str).encode()
+            pq.write_table(table.replace_schema_metadata(metadata), path,
+                           compression=PARQUET_CONFIG["compression"])
+        except Exception as e:
+            print(f"Error writing indicator cache {path}: {e}")
@@ -0,0 +1,573 @@
+"""
+Pure-NumPy kernels for the core technical indicators
+
+Each kernel works on a contiguous 1-D float array and reproduces the
+pandas_ta definition of the indicator (same seeding and warm-up), so
+``technical_analysis`` can use them as a drop-in default backend with
+pandas_ta kept as the reference implementation.
+
+Conventions:
+    - Leading NaNs are skipped; the indicator warms up from the first
+      valid value. Inputs are expected to be gap-free after that.
+    - Rolling sums come from a single cumulative sum; rolling min/max use
+      strided window views (no copies). Every kernel writes into a
+      preallocated output that callers may pass as ``out``.
+    - Multi-line indicators (MACD, BBANDS, STOCH) return one 2-D block
+      with one row per line.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional
+
+# Rows per block in the blocked linear recursion. Per-column decays need
+# one weight matrix per column, where smaller blocks are cheaper.
+BLOCK_SIZE = 32
+PER_COLUMN_BLOCK_SIZE = 8
+
+
+def _column_recursion(u: np.ndarray, decay: np.ndarray, block_size: int) -> np.ndarray:
+    """
+    Blocked recursion with one decay per row of a (columns, rows) array
+
+    Same scheme as linear_recursion, laid out column-major so the batched
+    per-column block products run on contiguous memory.
+    """
+    n_cols, n_rows = u.shape
+    n_blocks = -(-n_rows // block_size)
+    blocks = np.zeros((n_cols, n_blocks * block_size))
+    blocks[:, :n_rows] = u
+    blocks = blocks.reshape(n_cols, n_blocks, block_size)
+
+    lags = np.arange(block_size)
+    diff = lags[:, None] - lags[None, :]
+    weights = np.where(diff >= 0, decay[:, None, None] ** np.maximum(diff, 0), 0.0)
+    out = np.matmul(blocks, weights.transpose(0, 2, 1))
+
+    if n_blocks > 1:
+        ends = _column_recursion(out[:, :, -1], decay ** block_size, block_size)
+        carry = np.zeros((n_cols, n_blocks))
+        carry[:, 1:] = ends[:, :-1]
+        out += (decay[:, None] ** (lags + 1)[None, :])[:, None, :] * carry[:, :, None]
+
+    return out.reshape(n_cols, -1)[:, :n_rows]
+
+
+def linear_recursion(u: np.ndarray, decay, block_size: Optional[int] = None) -> np.ndarray:
+    """
+    Solve y[t] = u[t] + decay * y[t - 1] (y[-1] = 0) along axis 0
+
+    The first axis is cut into blocks. Inside a block the recursion is a
+    lower-triangular matrix product that runs for all blocks at once. The
+    block end values obey the same recursion with ``decay ** block_size``,
+    so they are solved by recursing on the much shorter sequence of block
+    ends; no Python loop runs over individual rows.
+
+    Args:
+        u: 1-D or 2-D input (rows along axis 0), without NaNs
+        decay: Recursion coefficient (1 - alpha for an EMA), either a
+               scalar or one value per column of a 2-D ``u``
+        block_size: Rows per block (default: BLOCK_SIZE, or
+                    PER_COLUMN_BLOCK_SIZE for per-column decays)
+
+    Returns:
+        Array with the same shape as ``u``
+    """
+    u = np.asarray(u, dtype=np.float64)
+    decay = np.asarray(decay, dtype=np.float64)
+
+    if decay.ndim == 1:
+        if u.ndim != 2 or len(decay) != u.shape[1]:
+            raise ValueError(f"Got {len(decay)} decay values for input of shape {u.shape}")
+        result = _column_recursion(np.ascontiguousarray(u.T), decay,
+                                   block_size or PER_COLUMN_BLOCK_SIZE)
+        return np.ascontiguousarray(result.T)
+
+    block_size = block_size or BLOCK_SIZE
+    squeeze = u.ndim == 1
+    if squeeze:
+        u = u[:, None]
+
+    n_rows, n_cols = u.shape
+    n_blocks = -(-n_rows // block_size)
+    if n_blocks * block_size == n_rows:
+        blocks = u.reshape(n_blocks, block_size, n_cols)
+    else:
+        blocks = np.zeros((n_blocks * block_size, n_cols))
+        blocks[:n_rows] = u
+        blocks = blocks.reshape(n_blocks, block_size, n_cols)
+
+    lags = np.arange(block_size)
+    diff = lags[:, None] - lags[None, :]
+    weights = np.where(diff >= 0, decay ** np.maximum(diff, 0), 0.0)
+
+    # Zero-start response of every block
+    out = np.matmul(weights, blocks)
+
+    if n_blocks > 1:
+        # Value carried into each block from the end of the previous one
+        ends = linear_recursion(out[:, -1], decay ** block_size, block_size)
+        carry = np.zeros((n_blocks, n_cols))
+        carry[1:] = ends[:-1]
+        out += (decay ** (lags + 1))[None, :, None] * carry[:, None, :]
+
+    out = out.reshape(-1, n_cols)[:n_rows]
+    return out[:, 0] if squeeze else out
+
+
+def _as_array(values) -> np.ndarray:
+    """Convert input to a contiguous 1-D float64 array"""
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    if arr.ndim != 1:
+        raise ValueError(f"Expected a 1-D array, got shape {arr.shape}")
+    return arr
+
+
+def _first_valid(x: np.ndarray) -> int:
+    """Index of the first non-NaN value (len(x) if there is none)"""
+    valid = ~np.isnan(x)
+    return int(valid.argmax()) if valid.any() else len(x)
+
+
+def _output(shape, out: Optional[np.ndarray]) -> np.ndarray:
+    """Return a NaN-filled output buffer, reusing ``out`` if given"""
+    if out is None:
+        return np.full(shape, np.nan)
+    if out.shape != tuple(np.atleast_1d(shape)):
+        raise ValueError(f"Output buffer has shape {out.shape}, expected {shape}")
+    out.fill(np.nan)
+    return out
+
+
+def _smooth(x: np.ndarray, alpha: float, out: np.ndarray,
+            presma_length: Optional[int] = None) -> np.ndarray:
+    """
+    Exponential smoothing of x[f:] into out[f:] (f = first valid index)
+
+    Args:
+        x: Input array
+        alpha: Smoothing factor
+        out: NaN-filled output buffer
+        presma_length: Seed with the mean of the first ``presma_length``
+            values (EMA, ATR); if None seed with the first value
+    """
+    start = _first_valid(x)
+    seed_at = start if presma_length is None else start + presma_length - 1
+    if seed_at >= len(x):
+        return out
+
+    values = x[seed_at:]
+    u = alpha * values
+    u[0] = x[seed_at] if presma_length is None else x[start:seed_at + 1].mean()
+    out[seed_at:] = linear_recursion(u, 1.0 - alpha)
+    return out
+
+
+def _rolling_sums(x: np.ndarray, length: int, power: int = 1) -> np.ndarray:
+    """
+    Sums of x ** power over every full window, via one cumulative sum
+
+    Returns an array of len(x) - length + 1 window sums.
+    """
+    csum = np.empty(len(x) + 1)
+    csum[0] = 0.0
+    np.cumsum(x if power == 1 else x ** power, out=csum[1:])
+    return csum[length:] - csum[:-length]
+
+
+def sma(close, length: int = 10, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Simple Moving Average
+
+    Args:
+        close: Close prices
+        length: Window length
+        out: Optional preallocated output array
+
+    Returns:
+        SMA array (NaN during warm-up)
+    """
+    x = _as_array(close)
+    out = _output(len(x), out)
+    start = _first_valid(x)
+    if len(x) - start >= length:
+        # Center on the first value to keep the cumulative sum small
+        ref = x[start]
+        np.divide(_rolling_sums(x[start:] - ref, length), length, out=out[start + length - 1:])
+        out[start + length - 1:] += ref
+    return out
+
+
+def ema(close, length: int = 10, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Exponential Moving Average seeded with the SMA of the first window
+
+    Args:
+        close: Close prices
+        length: Span of the EMA
+        out: Optional preallocated output array
+
+    Returns:
+        EMA array (NaN during warm-up)
+    """
+    x = _as_array(close)
+    return _smooth(x, 2.0 / (length + 1), _output(len(x), out), presma_length=length)
+
+
+def rma(close, length: int = 10, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Wilder's Moving Average as pandas_ta defines it
+
+    ``ewm(alpha=1 / length, adjust=True, min_periods=length).mean()``: the
+    EMA started from zero, divided by the total weight of the values seen.
+
+    Args:
+        close: Input values
+        length: Smoothing period
+        out: Optional preallocated output array
+
+    Returns:
+        RMA array (NaN for the first ``length - 1`` values)
+    """
+    x = _as_array(close)
+    out = _output(len(x), out)
+    start = _first_valid(x)
+    if len(x) - start < length:
+        return out
+
+    alpha = 1.0 / length
+    values = x[start:]
+    out[start:] = linear_recursion(alpha * values, 1.0 - alpha)
+    # Total weight 1 - (1 - alpha) ** count of the values seen
+    with np.errstate(divide='ignore'):
+        out[start:] /= -np.expm1(np.arange(1, len(values) + 1) * np.log1p(-alpha))
+    out[:start + length - 1] = np.nan
+    return out
+
+
+def rsi(close, length: int = 14, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Relative Strength Index
+
+    Args:
+        close: Close prices
+        length: RSI period
+        out: Optional preallocated output array
+
+    Returns:
+        RSI array (0-100, NaN for the first ``length`` bars)
+    """
+    x = _as_array(close)
+    out = _output(len(x), out)
+    start = _first_valid(x)
+    if len(x) - start <= length:
+        return out
+
+    change = np.empty_like(x)
+    change[0] = np.nan
+    np.subtract(x[1:], x[:-1], out=change[1:])
+
+    gain = rma(np.clip(change, 0.0, None), length)
+    loss = rma(np.clip(-change, 0.0, None), length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(100.0 * gain, gain + loss, out=out)
+    # Warm-up: the first ``length`` changes only seed the averages
+    out[:start + length] = np.nan
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9,
+         out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Moving Average Convergence Divergence
+
+    Args:
+        close: Close prices
+        fast: Fast EMA period
+        slow: Slow EMA period
+        signal: Signal line period
+        out: Optional preallocated (3, n) output array
+
+    Returns:
+        (3, n) array with rows macd, histogram, signal
+    """
+    if slow < fast:
+        fast, slow = slow, fast
+
+    x = _as_array(close)
+    out = _output((3, len(x)), out)
+    line, histogram, signal_line = out
+
+    np.subtract(ema(x, fast), ema(x, slow), out=line)
+    _smooth(line, 2.0 / (signal + 1), signal_line, presma_length=signal)
+    np.subtract(line, signal_line, out=histogram)
+    return out
+
+
+def bbands(close, length: int = 5, lower_std: float = 2.0, upper_std: float = 2.0,
+           ddof: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Bollinger Bands
+
+    Args:
+        close: Close prices
+        length: MA period
+        lower_std: Standard deviations below the mid band
+        upper_std: Standard deviations above the mid band
+        ddof: Delta degrees of freedom of the rolling standard deviation
+        out: Optional preallocated (5, n) output array
+
+    Returns:
+        (5, n) array with rows lower, mid, upper, bandwidth, percent
+    """
+    x = _as_array(close)
+    out = _output((5, len(x)), out)
+    lower, mid, upper, bandwidth, percent = out
+
+    start = _first_valid(x)
+    if len(x) - start < length:
+        return out
+
+    first = start + length - 1
+    centered = x[start:] - x[start]
+    sum1 = _rolling_sums(centered, length)
+    sum2 = _rolling_sums(centered, length, power=2)
+    np.divide(sum1, length, out=mid[first:])
+    std = np.sqrt(np.maximum(sum2 - sum1 * sum1 / length, 0.0) / (length - ddof))
+    mid[first:] += x[start]
+
+    np.subtract(mid[first:], lower_std * std, out=lower[first:])
+    np.add(mid[first:], upper_std * std, out=upper[first:])
+    width = upper[first:] - lower[first:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(100.0 * width, mid[first:], out=bandwidth[first:])
+        np.divide(x[first:] - lower[first:], width, out=percent[first:])
+    return out
+
+
+def true_range(high, low, close, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    True Range
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+        out: Optional preallocated output array
+
+    Returns:
+        True range array (NaN on bars without a previous close)
+    """
+    h, l, c = _as_array(high), _as_array(low), _as_array(close)
+    out = _output(len(c), out)
+    if len(c) > 1:
+        prev = c[:-1]
+        np.subtract(h[1:], l[1:], out=out[1:])
+        np.maximum(out[1:], np.abs(h[1:] - prev), out=out[1:])
+        np.maximum(out[1:], np.abs(prev - l[1:]), out=out[1:])
+    return out
+
+
+def atr(high, low, close, length: int = 14, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Average True Range (Wilder smoothing seeded with the SMA of the first
+    ``length`` true ranges, so the first value is on bar ``length``)
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+        length: ATR period
+        out: Optional preallocated output array
+
+    Returns:
+        ATR array (NaN during warm-up)
+    """
+    tr = true_range(high, low, close)
+    return _smooth(tr, 1.0 / length, _output(len(tr), out), presma_length=length)
+
+
+def stoch(high, low, close, k: int = 14, d: int = 3, smooth_k: int = 3,
+          out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Stochastic Oscillator
+
+    Args:
+        high: High prices
+        low: Low prices
+        close: Close prices
+        k: Lookback period of the highest high / lowest low
+        d: SMA period of the %D signal line
+        smooth_k: SMA period applied to the raw %K
+        out: Optional preallocated (3, n) output array
+
+    Returns:
+        (3, n) array with rows %K, %D, histogram (%K - %D)
+    """
+    h, l, c = _as_array(high), _as_array(low), _as_array(close)
+    out = _output((3, len(c)), out)
+    stoch_k, stoch_d, histogram = out
+
+    start = max(_first_valid(h), _first_valid(l), _first_valid(c))
+    if len(c) - start < k:
+        return out
+
+    first = start + k - 1
+    lowest = sliding_window_view(l[start:], k).min(axis=1)
+    highest = sliding_window_view(h[start:], k).max(axis=1)
+    raw = np.full(len(c), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw[first:] = 100.0 * (c[first:] - lowest) / (highest - lowest)
+
+    if smooth_k == 1:
+        stoch_k[:] = raw
+    else:
+        sma(raw, smooth_k, out=stoch_k)
+    sma(stoch_k, d, out=stoch_d)
+    np.subtract(stoch_k, stoch_d, out=histogram)
+    return out
+
+
+def _lengths(lengths) -> np.ndarray:
+    """Validate sweep lengths as a 1-D array of positive integers"""
+    lengths = np.atleast_1d(np.asarray(lengths, dtype=np.int64))
+    if lengths.ndim != 1 or len(lengths) == 0 or (lengths < 1).any():
+        raise ValueError("lengths must be a non-empty sequence of positive integers")
+    return lengths
+
+
+def _window_means(x: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Trailing means of x for every length from one cumulative sum
+
+    Returns:
+        (n_lengths, n) array, NaN where the window is not full yet
+    """
+    n = len(x)
+    out = np.full((len(lengths), n), np.nan)
+    if n == 0:
+        return out
+
+    # Center on the first value to keep the cumulative sum small
+    ref = x[0]
+    csum = np.empty(n + 1)
+    csum[0] = 0.0
+    np.cumsum(x - ref, out=csum[1:])
+
+    for row, length in zip(out, lengths):
+        if length <= n:
+            window = row[length - 1:]
+            np.subtract(csum[length:], csum[:-length], out=window)
+            window /= length
+            window += ref
+    return out
+
+
+def _smooth_sweep(x: np.ndarray, alphas: np.ndarray, seed_rows: np.ndarray,
+                  seeds: np.ndarray) -> np.ndarray:
+    """
+    Exponential smoothing of one series for many alphas in one recursion
+
+    Line i is seeded with ``seeds[i]`` at row ``seed_rows[i]`` and NaN
+    before it.
+
+    Returns:
+        (n_alphas, n) array
+    """
+    n = len(x)
+    rows = np.arange(n)[None, :]
+    lines = np.arange(len(alphas))
+
+    seeded = seed_rows < n
+    u = np.where(rows > seed_rows[:, None], alphas[:, None] * np.nan_to_num(x)[None, :], 0.0)
+    u[lines[seeded], seed_rows[seeded]] = seeds[seeded]
+
+    out = _column_recursion(u, 1.0 - alphas, PER_COLUMN_BLOCK_SIZE)
+    out[rows < seed_rows[:, None]] = np.nan
+    return out
+
+
+def sma_sweep(close, lengths) -> np.ndarray:
+    """
+    Simple Moving Average for many window lengths at once
+
+    Args:
+        close: Close prices
+        lengths: Window lengths
+
+    Returns:
+        (n, n_lengths) array, one column per length
+    """
+    x = _as_array(close)
+    lengths = _lengths(lengths)
+    out = np.full((len(lengths), len(x)), np.nan)
+    start = _first_valid(x)
+    if start < len(x):
+        out[:, start:] = _window_means(x[start:], lengths)
+    return out.T
+
+
+def ema_sweep(close, lengths) -> np.ndarray:
+    """
+    Exponential Moving Average for many spans at once
+
+    Every span is seeded with the SMA of its first window (as ``ema``) and
+    all spans run through one batched recursion.
+
+    Args:
+        close: Close prices
+        lengths: EMA spans
+
+    Returns:
+        (n, n_lengths) array, one column per span
+    """
+    x = _as_array(close)
+    lengths = _lengths(lengths)
+    out = np.full((len(lengths), len(x)), np.nan)
+    start = _first_valid(x)
+    values = x[start:]
+    if len(values) == 0:
+        return out.T
+
+    seed_rows = lengths - 1
+    means = _window_means(values, lengths)
+    seeds = means[np.arange(len(lengths)), np.minimum(seed_rows, len(values) - 1)]
+    out[:, start:] = _smooth_sweep(values, 2.0 / (lengths + 1), seed_rows, seeds)
+    return out.T
+
+
+def rsi_sweep(close, lengths) -> np.ndarray:
+    """
+    Relative Strength Index for many periods at once
+
+    Args:
+        close: Close prices
+        lengths: RSI periods
+
+    Returns:
+        (n, n_lengths) array, one column per period
+    """
+    x = _as_array(close)
+    lengths = _lengths(lengths)
+    out = np.full((len(lengths), len(x)), np.nan)
+    start = _first_valid(x)
+    values = x[start:]
+    if len(values) < 2:
+        return out.T
+
+    # Averages as in rma, started from zero; both carry the same total
+    # weight, which cancels in the ratio
+    change = np.empty_like(values)
+    change[0] = np.nan
+    np.subtract(values[1:], values[:-1], out=change[1:])
+    gain = np.clip(change, 0.0, None)
+    loss = np.clip(-change, 0.0, None)
+
+    alphas = 1.0 / lengths
+    seed_rows = np.ones(len(lengths), dtype=np.int64)
+    avg_gain = _smooth_sweep(gain, alphas, seed_rows, alphas * gain[1])
+    avg_loss = _smooth_sweep(loss, alphas, seed_rows, alphas * loss[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, start:] = 100.0 * avg_gain / (avg_gain + avg_loss)
+    out[np.arange(len(x)) < (start + lengths)[:, None]] = np.nan
+    return out.T
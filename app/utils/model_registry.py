@@ -0,0 +1,269 @@
+"""
+Registry of trained models with an in-memory cache of loaded models
+
+Models are saved under TRAINED_MODELS_DIR (see config.settings
+get_model_path), one directory per model name and one file per version:
+
+    <name>/v<version>.pkl     scikit-learn models (joblib)
+    <name>/v<version>.keras   Keras models
+    <name>/v<version>.json    metadata: features, metrics, training window
+
+A version number is claimed with an exclusively created <name>/v<version>.claim
+file before anything is written (kept until the version is pruned), so
+processes registering the same name (training jobs, the daily model
+updates) never get the same version.
+
+Loading is lazy: a model is deserialized on its first request and then
+kept in a bounded LRU cache, so later predictions use the live object.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import keras
+import numpy as np
+
+from config.settings import ML_CONFIG, get_model_path
+
+KERAS_SUFFIX = ".keras"
+
+
+class ModelRegistry:
+    """Versioned model store with a thread-safe LRU of loaded models"""
+
+    def __init__(self, base_dir: Optional[Path] = None,
+                 cache_size: Optional[int] = None):
+        """
+        Initialize ModelRegistry
+
+        Args:
+            base_dir: Directory of the registry (default: the directory of
+                      get_model_path, TRAINED_MODELS_DIR)
+            cache_size: Loaded models kept in memory
+                        (default: ML_CONFIG['model_cache_size'])
+        """
+        self.base_dir = Path(base_dir) if base_dir is not None else get_model_path("_").parent
+        self.cache_size = cache_size if cache_size is not None else ML_CONFIG["model_cache_size"]
+        self._cache: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+        self._latest: Dict[str, int] = {}
+        self._loading: Dict[Tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get_path(self, name: str, version: int) -> Path:
+        """Get the metadata file path of a model version"""
+        return self.base_dir / name / f"v{version}.json"
+
+    def names(self) -> List[str]:
+        """Names of all registered models"""
+        if not self.base_dir.exists():
+            return []
+        return sorted(path.name for path in self.base_dir.iterdir()
+                      if path.is_dir() and any(path.glob("v*.json")))
+
+    def versions(self, name: str) -> List[int]:
+        """Registered versions of a model, oldest first"""
+        model_dir = self.base_dir / name
+        if not model_dir.exists():
+            return []
+        return sorted(int(path.stem[1:]) for path in model_dir.glob("v*.json"))
+
+    def latest_version(self, name: str) -> int:
+        """Latest registered version of a model (remembered after the first lookup)"""
+        version = self._latest.get(name)
+        if version is None:
+            versions = self.versions(name)
+            if not versions:
+                raise KeyError(f"No registered model named {name}")
+            version = self._latest[name] = versions[-1]
+        return version
+
+    def register(self, name: str, model: Any,
+                 features: Optional[List[str]] = None,
+                 metrics: Optional[Dict[str, Any]] = None,
+                 training_window: Optional[Tuple[Any, Any]] = None,
+                 **metadata) -> int:
+        """
+        Save a trained model as the next version
+
+        Args:
+            name: Model name, e.g. 'AAPL_random_forest'
+            model: Fitted scikit-learn estimator or Keras model
+            features: Feature column names, in input order
+            metrics: Validation metrics (e.g. from train_model)
+            training_window: (first, last) date of the training data
+            **metadata: Any other JSON-serializable details
+
+        Returns:
+            The new version number
+        """
+        version = self._claim_version(name)
+        path = self.get_path(name, version)
+
+        is_keras = isinstance(model, keras.Model)
+        model_path = path.with_suffix(KERAS_SUFFIX if is_keras else ".pkl")
+        if is_keras:
+            model.save(model_path)
+        else:
+            joblib.dump(model, model_path)
+
+        record = {
+            "name": name,
+            "version": version,
+            "model_file": model_path.name,
+            "model_class": type(model).__name__,
+            "features": list(features) if features is not None else None,
+            "metrics": metrics or {},
+            "training_window": [str(value) for value in training_window] if training_window else None,
+            "created_at": datetime.now().isoformat(),
+            **metadata,
+        }
+        # Metadata last: a version is visible once its model file exists
+        staging = path.with_name(f"{path.name}.tmp")
+        staging.write_text(json.dumps(record, indent=2, default=str))
+        os.replace(staging, path)
+
+        with self._lock:
+            self._latest[name] = version
+            self._cache[(name, version)] = model
+            self._evict()
+        return version
+
+    def _claim_version(self, name: str) -> int:
+        """
+        Reserve the next version number of a model, atomically across processes
+
+        The claim file is created exclusively (O_CREAT | O_EXCL), so of two
+        registrants picking the same number one fails and moves on to the
+        next. Claims stay until the version is pruned, so the highest
+        claim is always the highest version taken (metadata files cover
+        versions registered before claims existed).
+        """
+        model_dir = self.base_dir / name
+        model_dir.mkdir(parents=True, exist_ok=True)
+        while True:
+            taken = [int(path.stem[1:]) for pattern in ("v*.claim", "v*.json")
+                     for path in model_dir.glob(pattern)]
+            version = max(taken, default=0) + 1
+            try:
+                os.close(os.open(model_dir / f"v{version}.claim", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return version
+            except FileExistsError:
+                continue
+
+    def metadata(self, name: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """Metadata of a model version (default: latest)"""
+        version = version or self.latest_version(name)
+        path = self.get_path(name, version)
+        if not path.exists():
+            raise KeyError(f"No version {version} of model {name}")
+        return json.loads(path.read_text())
+
+    def load(self, name: str, version: Optional[int] = None) -> Any:
+        """
+        Get a model, deserializing it only if it is not in the cache
+
+        Cache hits never wait for another model being deserialized; two
+        requests for the same uncached model load it once.
+
+        Args:
+            name: Model name
+            version: Model version (default: latest)
+
+        Returns:
+            Fitted model
+        """
+        key = (name, version or self.latest_version(name))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    return self._cache[key]
+
+            record = self.metadata(*key)
+            model_path = self.get_path(*key).with_name(record["model_file"])
+            if model_path.suffix == KERAS_SUFFIX:
+                model = keras.models.load_model(model_path)
+            else:
+                model = joblib.load(model_path)
+
+            with self._lock:
+                self.loads += 1
+                self._cache[key] = model
+                self._loading.pop(key, None)
+                self._evict()
+            return model
+
+    def predict(self, name: str, features: np.ndarray, version: Optional[int] = None) -> np.ndarray:
+        """Predict with a registered model (loaded through the cache)"""
+        model = self.load(name, version)
+        if isinstance(model, keras.Model):
+            # Direct batch call: no per-call progress bar or dataset setup
+            predictions = np.asarray(model.predict_on_batch(np.asarray(features)))
+        else:
+            predictions = np.asarray(model.predict(features))
+        if predictions.ndim == 2 and predictions.shape[1] == 1:
+            return predictions[:, 0]
+        return predictions
+
+    def prune(self, name: str, keep: int) -> List[int]:
+        """
+        Delete all but the newest versions of a model
+
+        Args:
+            name: Model name
+            keep: Number of newest versions kept
+
+        Returns:
+            Deleted version numbers
+        """
+        removed = self.versions(name)[:-keep] if keep > 0 else []
+        for version in removed:
+            path = self.get_path(name, version)
+            model_file = path.with_name(json.loads(path.read_text())["model_file"])
+            # Metadata first: a version disappears before its model file
+            path.unlink()
+            model_file.unlink(missing_ok=True)
+            path.with_suffix(".claim").unlink(missing_ok=True)
+            with self._lock:
+                self._cache.pop((name, version), None)
+        return removed
+
+    def refresh(self, name: str) -> None:
+        """Forget the remembered latest version of a model (e.g. registered by another process)"""
+        with self._lock:
+            self._latest.pop(name, None)
+
+    def clear_cache(self) -> None:
+        """Drop every loaded model and remembered latest version"""
+        with self._lock:
+            self._cache.clear()
+            self._latest.clear()
+
+    def _evict(self) -> None:
+        """Drop least recently used models beyond cache_size (lock held)"""
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+# Process-wide registry used by predict_stock_price
+_REGISTRY: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """Shared registry in TRAINED_MODELS_DIR, created on first use"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = ModelRegistry()
+    return _REGISTRY
@@ -2,60 +2,299 @@
 Machine learning models for Stock Analyzer
 """
 
+from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import TimeSeriesSplit, train_test_split
 import tensorflow as tf
 import keras
-from typing import Tuple, Dict, Any
+from joblib import Parallel, delayed
+from typing import Callable, Tuple, Dict, Any, List, Optional
+import time
 import numpy as np
+import pandas as pd
 
+from config.settings import ML_CONFIG
 
-def create_sklearn_model(model_type: str = "random_forest"):
+from .model_registry import get_registry
+from .parallel import resolve_n_jobs
+from .prediction_queue import get_prediction_queue
+
+
+class IncrementalRegressor(RegressorMixin, BaseEstimator):
+    """
+    Standardized linear model trained by SGD, updatable with partial_fit
+    
+    The scaler and the regressor both learn incrementally, so new rows (or
+    chunks of a dataset too large for memory) update the model without a
+    refit on the full history.
+    """
+    
+    def __init__(self, alpha: float = 0.0001, eta0: float = 0.01,
+                 learning_rate: str = "invscaling", max_iter: int = 1000,
+                 random_state: Optional[int] = 42):
+        self.alpha = alpha
+        self.eta0 = eta0
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.random_state = random_state
+    
+    def _regressor(self, **kwargs) -> SGDRegressor:
+        return SGDRegressor(alpha=self.alpha, eta0=self.eta0, learning_rate=self.learning_rate,
+                            random_state=self.random_state, **kwargs)
+    
+    def fit(self, X, y):
+        """Fit scaler and regressor on all rows"""
+        self.scaler_ = StandardScaler().fit(X)
+        self.regressor_ = self._regressor(max_iter=self.max_iter).fit(self.scaler_.transform(X), y)
+        return self
+    
+    def partial_fit(self, X, y):
+        """Update scaler statistics and take one SGD pass over new rows"""
+        if not hasattr(self, "scaler_"):
+            self.scaler_ = StandardScaler()
+            self.regressor_ = self._regressor()
+        self.scaler_.partial_fit(X)
+        self.regressor_.partial_fit(self.scaler_.transform(X), y)
+        return self
+    
+    def predict(self, X):
+        return self.regressor_.predict(self.scaler_.transform(X))
+
+
+class ProgressCallback(keras.callbacks.Callback):
+    """Report each finished epoch to a train_model progress function"""
+    
+    def __init__(self, progress: Callable[[Dict[str, Any]], None]):
+        super().__init__()
+        self.progress = progress
+    
+    def on_epoch_end(self, epoch, logs=None):
+        self.progress({
+            "stage": "epoch",
+            "step": epoch + 1,
+            "total": self.params.get("epochs"),
+            "metrics": {name: float(value) for name, value in (logs or {}).items()},
+        })
+
+
+def create_sklearn_model(model_type: str = "random_forest", n_jobs: Optional[int] = None,
+                         **params):
     """
     Create a scikit-learn model for stock prediction
     
     Args:
-        model_type: Type of model ('random_forest' or 'gradient_boosting')
+        model_type: Type of model ('random_forest', 'gradient_boosting' or
+                    'sgd', an incrementally updatable linear model)
+        n_jobs: Cores used by models that fit in parallel (random forest);
+                None uses one
+        **params: Hyperparameters overriding the defaults, e.g. max_depth=6
     
     Returns:
         Scikit-learn model instance
     """
     if model_type == "random_forest":
-        return RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
+        return RandomForestRegressor(**{"n_estimators": 100, "max_depth": 10, "random_state": 42,
+                                        "n_jobs": n_jobs, **params})
     elif model_type == "gradient_boosting":
-        return GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42)
+        return GradientBoostingRegressor(**{"n_estimators": 100, "max_depth": 5, "random_state": 42,
+                                            **params})
+    elif model_type == "sgd":
+        return IncrementalRegressor(**params)
     else:
         raise ValueError(f"Unknown model type: {model_type}")
 
 
-def create_neural_network(input_shape: int, output_shape: int = 1) -> keras.Model:
+def create_neural_network(input_shape: int, output_shape: int = 1,
+                          dropout_rate: float = 0.2,
+                          learning_rate: float = 0.001,
+                          mean: Optional[np.ndarray] = None,
+                          variance: Optional[np.ndarray] = None) -> keras.Model:
     """
     Create a TensorFlow/Keras neural network for stock prediction
     
     Args:
         input_shape: Number of input features
         output_shape: Number of output features
+        dropout_rate: Dropout after the first two hidden layers
+        learning_rate: Adam learning rate
+        mean: Feature means of a Normalization input layer, so the network
+              standardizes raw feature rows itself (NaN: never observed)
+        variance: Feature variances of the Normalization layer
     
     Returns:
         Keras Sequential model
     """
-    model = keras.Sequential([
-        keras.layers.Dense(128, activation='relu', input_shape=(input_shape,)),
-        keras.layers.Dropout(0.2),
+    layers: List[Any] = [keras.Input(shape=(input_shape,))]
+    if mean is not None and variance is not None:
+        layers.append(keras.layers.Normalization(mean=np.nan_to_num(mean),
+                                                 variance=np.nan_to_num(variance, nan=1.0)))
+    model = keras.Sequential(layers + [
+        keras.layers.Dense(128, activation='relu'),
+        keras.layers.Dropout(dropout_rate),
         keras.layers.Dense(64, activation='relu'),
-        keras.layers.Dropout(0.2),
+        keras.layers.Dropout(dropout_rate),
         keras.layers.Dense(32, activation='relu'),
         keras.layers.Dense(output_shape)
     ])
     
-    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate), loss='mse', metrics=['mae'])
     
     return model
 
 
+def _fit(X_train: np.ndarray, y_train: np.ndarray, model_type: str,
+         n_jobs: Optional[int] = None, verbose: int = 1,
+         params: Optional[Dict[str, Any]] = None,
+         callbacks: Optional[List[Any]] = None) -> Any:
+    """
+    Fit a model on raw feature rows
+    
+    Neural networks standardize inside the model (a Normalization layer
+    with the training statistics), so every fitted model, registered or
+    not, is served the same unscaled rows it was given here.
+    """
+    params = dict(params or {})
+    if model_type == "neural_network":
+        scaler = StandardScaler().fit(X_train)
+        epochs = params.pop("epochs", ML_CONFIG["neural_network"]["epochs"])
+        batch_size = params.pop("batch_size", ML_CONFIG["neural_network"]["batch_size"])
+        model = create_neural_network(X_train.shape[1], mean=scaler.mean_, variance=scaler.var_,
+                                      **params)
+        model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=verbose, # type: ignore
+                  callbacks=callbacks)
+        return model
+    
+    model = create_sklearn_model(model_type, n_jobs=n_jobs, **params)
+    model.fit(X_train, y_train)
+    return model
+
+
+def _fit_and_score(X_train: np.ndarray, y_train: np.ndarray,
+                   X_test: np.ndarray, y_test: np.ndarray,
+                   model_type: str, n_jobs: Optional[int] = None,
+                   verbose: int = 1,
+                   params: Optional[Dict[str, Any]] = None,
+                   callbacks: Optional[List[Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Fit a model on one training set and score it on both sets"""
+    model = _fit(X_train, y_train, model_type, n_jobs, verbose, params, callbacks)
+    
+    if model_type == "neural_network":
+        metrics = {
+            "train_loss": float(model.evaluate(X_train, y_train, verbose=verbose)[0]), # type: ignore
+            "test_loss": float(model.evaluate(X_test, y_test, verbose=verbose)[0]), # type: ignore
+        }
+    else:
+        metrics = {
+            "train_score": float(model.score(X_train, y_train)),
+            "test_score": float(model.score(X_test, y_test)),
+            "test_mse": float(np.mean((model.predict(X_test) - y_test) ** 2)),
+        }
+    
+    return model, metrics
+
+
+def walk_forward_splits(n_samples: int, n_splits: int = 5,
+                        window: Optional[int] = None,
+                        test_size: Optional[int] = None,
+                        gap: int = 0) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Chronological train/test folds: every test block follows its training data
+    
+    Args:
+        n_samples: Number of rows, oldest first
+        n_splits: Number of folds
+        window: Rolling training window in rows; None expands the training
+                set to every row before the test block
+        test_size: Rows per test block (default: n_samples // (n_splits + 1))
+        gap: Rows dropped between training and test data, e.g. the target
+             horizon, so overlapping targets do not leak
+    
+    Returns:
+        List of (train indices, test indices) per fold
+    """
+    splitter = TimeSeriesSplit(n_splits=n_splits, max_train_size=window,
+                               test_size=test_size, gap=gap)
+    return list(splitter.split(np.empty((n_samples, 1))))
+
+
+def _run_fold(fold: int, X: np.ndarray, y: np.ndarray,
+              train_index: np.ndarray, test_index: np.ndarray,
+              model_type: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fit and score one walk-forward fold, with timings"""
+    start = time.perf_counter()
+    _, metrics = _fit_and_score(X[train_index], y[train_index], X[test_index], y[test_index],
+                                model_type, n_jobs=1, verbose=0, params=params)
+    return {
+        "fold": fold,
+        "train_start": int(train_index[0]),
+        "train_end": int(train_index[-1]),
+        "test_start": int(test_index[0]),
+        "test_end": int(test_index[-1]),
+        **metrics,
+        "fold_time": time.perf_counter() - start,
+    }
+
+
+def walk_forward_validate(X: np.ndarray, y: np.ndarray, model_type: str = "random_forest",
+                          n_splits: int = 5, window: Optional[int] = None,
+                          test_size: Optional[int] = None, gap: int = 0,
+                          n_jobs: Optional[int] = None,
+                          params: Optional[Dict[str, Any]] = None,
+                          progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> pd.DataFrame:
+    """
+    Walk-forward validation with the folds fitted in parallel
+    
+    Each fold trains a fresh model on data before its test block (expanding
+    or rolling window, see walk_forward_splits), so no future rows leak into
+    training. Folds are independent and run on a joblib process pool; large
+    arrays are memory-mapped into the workers rather than copied per fold.
+    Every fold fits its model on one core, so the pool is not oversubscribed.
+    Neural network folds run one after another.
+    
+    Args:
+        X: Feature matrix, rows in time order
+        y: Target vector
+        model_type: Type of model to train
+        n_splits: Number of folds
+        window: Rolling training window in rows (None: expanding)
+        test_size: Rows per test block
+        gap: Rows dropped between training and test data
+        n_jobs: Worker processes (default: PARALLEL_CONFIG, all cores)
+        params: Hyperparameters overriding the model defaults
+        progress: Called with each finished fold, in fold order:
+                  {'stage': 'fold', 'step', 'total', 'metrics'}
+    
+    Returns:
+        DataFrame with one row per fold: index ranges, train/test scores
+        (losses for neural networks) and fold_time in seconds
+    """
+    X, y = np.asarray(X), np.asarray(y)
+    folds = walk_forward_splits(len(X), n_splits, window, test_size, gap)
+    # Keras already uses every core per fit
+    n_jobs = 1 if model_type == "neural_network" else min(resolve_n_jobs(n_jobs), len(folds))
+    
+    # Folds come back in order as they finish (loky workers are fresh processes)
+    results = []
+    for result in Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_run_fold)(fold, X, y, train_index, test_index, model_type, params)
+        for fold, (train_index, test_index) in enumerate(folds)
+    ):
+        results.append(result)
+        if progress is not None:
+            progress({"stage": "fold", "step": len(results), "total": len(folds),
+                      "metrics": result})
+    return pd.DataFrame(results).set_index("fold")
+
+
 def train_model(X: np.ndarray, y: np.ndarray, model_type: str = "random_forest", 
-                test_size: float = 0.2) -> Tuple[Any, Dict[str, Any]]:
+                test_size: float = 0.2, validation: str = "holdout",
+                n_splits: int = 5, window: Optional[int] = None, gap: int = 0,
+                n_jobs: Optional[int] = None,
+                params: Optional[Dict[str, Any]] = None,
+                progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                verbose: int = 1) -> Tuple[Any, Dict[str, Any]]:
     """
     Train a machine learning model
     
@@ -64,47 +303,75 @@ def train_model(X: np.ndarray, y: np.ndarray, model_type: str = "random_forest",
         y: Target vector
         model_type: Type of model to train
         test_size: Test set size
+        validation: 'holdout' (shuffled train/test split) or 'walk_forward'
+                    (chronological folds, use for price series)
+        n_splits: Number of walk-forward folds
+        window: Rolling walk-forward training window (None: expanding)
+        gap: Rows dropped between walk-forward training and test data
+        n_jobs: Cores for walk-forward folds and the final sklearn fit
+        params: Hyperparameters overriding the model defaults (e.g. the
+                best_params of tune_model); neural networks also take
+                epochs and batch_size
+        progress: Called with progress events, each a dictionary with
+                  stage ('fold' or 'epoch'), step, total and metrics;
+                  raising from it aborts training
+        verbose: Keras progress output of the holdout fit (0: silent)
     
     Returns:
-        Tuple of (trained model, metrics dictionary)
+        Tuple of (trained model, metrics dictionary). Walk-forward metrics
+        hold the mean fold scores and the per-fold 'folds' records; the
+        returned model is refitted on all rows.
     """
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=42
-    )
+    callbacks = [ProgressCallback(progress)] if progress is not None else None
     
-    if model_type == "neural_network":
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+    if validation == "walk_forward":
+        start = time.perf_counter()
+        folds = walk_forward_validate(X, y, model_type, n_splits=n_splits, window=window,
+                                      gap=gap, n_jobs=n_jobs, params=params, progress=progress)
+        validation_time = time.perf_counter() - start
         
-        model = create_neural_network(X_train_scaled.shape[1])
-        model.fit(X_train_scaled, y_train, epochs=50, batch_size=32, verbose=1) # type: ignore
+        model = _fit(np.asarray(X), np.asarray(y), model_type,
+                     n_jobs=resolve_n_jobs(n_jobs), verbose=0, params=params,
+                     callbacks=callbacks)
         
-        metrics = {
-            "train_loss": float(model.evaluate(X_train_scaled, y_train, verbose=1)[0]), # type: ignore
-            "test_loss": float(model.evaluate(X_test_scaled, y_test, verbose=1)[0]), # type: ignore
-        }
-    else:
-        model = create_sklearn_model(model_type)
-        model.fit(X_train, y_train)
-        
-        metrics = {
-            "train_score": float(model.score(X_train, y_train)),
-            "test_score": float(model.score(X_test, y_test)),
-        }
+        score_columns = [column for column in folds.columns
+                         if column.endswith(("_score", "_loss", "_mse"))]
+        metrics = {column: float(folds[column].mean()) for column in score_columns}
+        metrics.update(folds=folds.reset_index().to_dict("records"),
+                       validation_time=validation_time)
+        return model, metrics
     
-    return model, metrics
+    if validation != "holdout":
+        raise ValueError(f"Unknown validation: {validation}")
+    
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=42
+    )
+    
+    return _fit_and_score(X_train, y_train, X_test, y_test, model_type, verbose=verbose,
+                          params=params, callbacks=callbacks)
 
 
-def predict_stock_price(model: Any, features: np.ndarray) -> np.ndarray:
+def predict_stock_price(model: Any, features: np.ndarray,
+                        version: Optional[int] = None,
+                        batched: bool = False) -> np.ndarray:
     """
     Make predictions using trained model
     
     Args:
-        model: Trained model
+        model: Trained model, or the name of a model in the model registry
+               (loaded once, then served from the registry's cache)
         features: Feature matrix for prediction
+        version: Registry version when model is a name (default: latest)
+        batched: For registry models, join concurrent requests into one
+                 batched predict (see prediction_queue); use when many
+                 sessions predict a row at a time
     
     Returns:
         Predictions array
     """
+    if isinstance(model, str):
+        if batched:
+            return get_prediction_queue().predict(model, features, version)
+        return get_registry().predict(model, features, version)
     return model.predict(features)
@@ -0,0 +1,313 @@
+"""
+Incremental updates of registered models as new rows arrive
+
+Refitting a model on its whole history every day is wasteful when a day
+adds one row per symbol. update_model() instead updates the latest version
+of a registered model with the new rows and registers the result as the
+next version:
+
+- 'sgd' models (IncrementalRegressor): partial_fit on the new rows
+- gradient boosting / random forest: warm start, adding a few trees fitted
+  on the recent window
+- Keras networks: a few more epochs on the recent window
+
+Before updating, the model's errors on the new rows (out of sample, they
+were not seen yet) and the recent feature means are compared with the
+reference recorded at the last full fit (see make_reference). A full
+retrain on the whole history runs only when either has drifted, or when a
+tree ensemble has grown past ML_CONFIG['online']['max_estimators']. Only
+the newest ML_CONFIG['online']['keep_versions'] versions are kept.
+
+update_registered_models() runs the update for every registered model
+trained on one symbol, after the daily feature store build.
+"""
+
+import copy
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import keras
+import numpy as np
+import pandas as pd
+
+from config.settings import ML_CONFIG
+
+from .feature_store import FeatureStore
+from .model_registry import ModelRegistry, get_registry
+from .models import _fit
+
+# model_type of registered models that do not record one
+MODEL_TYPES = {
+    "RandomForestRegressor": "random_forest",
+    "GradientBoostingRegressor": "gradient_boosting",
+    "IncrementalRegressor": "sgd",
+}
+
+# Metadata written by register() or by update_model itself; every other key
+# (e.g. the symbol of a training job) is carried forward to the next version
+RESERVED_METADATA = {
+    "name", "version", "model_file", "model_class", "features", "metrics",
+    "training_window", "created_at", "model_type", "params", "reference",
+    "recent_errors", "update",
+}
+
+
+def _predict(model: Any, X: np.ndarray) -> np.ndarray:
+    """Predictions as a flat array"""
+    if isinstance(model, keras.Model):
+        return np.asarray(model.predict_on_batch(X)).reshape(-1)
+    return np.asarray(model.predict(X)).reshape(-1)
+
+
+def _feature_stats(X: np.ndarray) -> Dict[str, List[float]]:
+    """Column means and standard deviations of the training rows"""
+    return {
+        "mean": np.nanmean(X, axis=0).tolist(),
+        "std": np.nanstd(X, axis=0).tolist(),
+    }
+
+
+def make_reference(X: np.ndarray, mse: Optional[float]) -> Dict[str, Any]:
+    """
+    Drift reference of a newly trained model, saved with it in the registry
+
+    Args:
+        X: Training feature rows
+        mse: MSE on rows the model was not fitted on (e.g. test_mse or
+             test_loss of train_model); None skips the error check until
+             enough out-of-sample errors have been seen
+
+    Returns:
+        Dictionary with feature 'mean'/'std' and 'mse'
+    """
+    return {**_feature_stats(np.asarray(X)), "mse": mse}
+
+
+def check_drift(reference: Dict[str, Any], X_recent: np.ndarray, errors: List[float],
+                error_ratio: Optional[float] = None,
+                feature_shift: Optional[float] = None,
+                min_errors: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compare recent data and errors with the reference of the last full fit
+
+    Args:
+        reference: 'mean'/'std' of the training features and 'mse' of the
+                   model on held-out rows
+        X_recent: Recent feature rows
+        errors: Squared out-of-sample errors on the rows since the last fit
+        error_ratio: Drift if the mean recent error exceeds the reference
+                     MSE by this factor (default: ML_CONFIG['online'])
+        feature_shift: Drift if a feature's recent mean moved by more than
+                       this many training standard deviations
+        min_errors: Errors needed before the error check applies
+
+    Returns:
+        Dictionary with error_ratio, feature_shift, the drifting feature
+        index and drifted
+    """
+    settings = ML_CONFIG["online"]
+    error_ratio = error_ratio or settings["error_ratio"]
+    feature_shift = feature_shift or settings["feature_shift"]
+    min_errors = min_errors or settings["min_errors"]
+
+    ratio = np.nan
+    if len(errors) >= min_errors and reference.get("mse"):
+        ratio = float(np.mean(errors) / reference["mse"])
+
+    std = np.asarray(reference["std"], dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shifts = np.abs(np.nanmean(X_recent, axis=0) - np.asarray(reference["mean"], dtype=float)) / std
+    shifts = np.where(np.isfinite(shifts), shifts, 0.0)
+
+    return {
+        "error_ratio": ratio,
+        "feature_shift": float(shifts.max()) if len(shifts) else 0.0,
+        "feature": int(shifts.argmax()) if len(shifts) else None,
+        "drifted": bool((np.isfinite(ratio) and ratio > error_ratio) or shifts.max(initial=0.0) > feature_shift),
+    }
+
+
+def _copy(model: Any) -> Any:
+    """Independent copy, so the cached previous version stays unchanged"""
+    if isinstance(model, keras.Model):
+        clone = keras.models.clone_model(model)
+        clone.set_weights(model.get_weights())
+        clone.compile(optimizer=keras.optimizers.Adam(), loss="mse", metrics=["mae"])
+        return clone
+    return copy.deepcopy(model)
+
+
+def _update(model: Any, X: np.ndarray, y: np.ndarray, new_rows: int,
+            settings: Dict[str, Any]) -> Optional[Any]:
+    """Update a copy of a model with the newest rows (None: needs a full retrain)"""
+    window = settings["window"]
+    model = _copy(model)
+
+    if isinstance(model, keras.Model):
+        model.fit(X[-window:], y[-window:], epochs=settings["epochs"], verbose=0) # type: ignore
+    elif hasattr(model, "partial_fit"):
+        model.partial_fit(X[-new_rows:], y[-new_rows:])
+    elif hasattr(model, "warm_start"):
+        n_estimators = model.n_estimators + settings["warm_start_estimators"]
+        if n_estimators > settings["max_estimators"]:
+            return None
+        model.set_params(warm_start=True, n_estimators=n_estimators)
+        model.fit(X[-window:], y[-window:])
+    else:
+        return None
+    return model
+
+
+def _retrain(model_type: str, params: Dict[str, Any], X: np.ndarray, y: np.ndarray,
+             window: int) -> Tuple[Any, Dict[str, Any]]:
+    """Full fit on all rows, with a reference MSE from a fit holding out the window"""
+    def fit(X_train, y_train):
+        return _fit(X_train, y_train, model_type, verbose=0, params=params)
+
+    split = max(1, len(X) - window)
+    holdout = fit(X[:split], y[:split])
+    reference = make_reference(X[:split], float(np.mean((_predict(holdout, X[split:]) - y[split:]) ** 2)))
+    return fit(X, y), reference
+
+
+def update_model(name: str, X: np.ndarray, y: np.ndarray,
+                 dates: Optional[pd.DatetimeIndex] = None,
+                 new_rows: Optional[int] = None,
+                 registry: Optional[ModelRegistry] = None,
+                 force_retrain: bool = False) -> Dict[str, Any]:
+    """
+    Bring a registered model up to date with new rows
+
+    Args:
+        name: Registered model name
+        X: Full feature history, oldest first (a feature store memmap is fine)
+        y: Target history
+        dates: Dates of the rows; rows after the end of the model's
+               training window are new
+        new_rows: Number of new rows at the end of X (instead of dates)
+        registry: Model registry (default: get_registry())
+        force_retrain: Skip the incremental update and refit on all rows
+
+    Returns:
+        Dictionary with action ('none', 'incremental' or 'retrain'),
+        version, new_rows, drift checks and update_time in seconds
+    """
+    registry = registry or get_registry()
+    settings = ML_CONFIG["online"]
+    meta = registry.metadata(name)
+    model = registry.load(name, meta["version"])
+    model_type = meta.get("model_type") or MODEL_TYPES.get(meta["model_class"], "neural_network")
+
+    X, y = np.asarray(X), np.asarray(y)
+    window = settings["window"]
+    if new_rows is None:
+        if dates is None or not meta.get("training_window"):
+            raise ValueError("Pass new_rows, or dates for a model with a training window")
+        new_rows = int((dates > pd.Timestamp(meta["training_window"][1])).sum())
+    if new_rows == 0 and not force_retrain:
+        return {"action": "none", "version": meta["version"], "new_rows": 0}
+
+    start = time.perf_counter()
+    reference = meta.get("reference")
+    if reference is None:
+        # Registered without one: feature statistics of the rows before the
+        # new ones. Errors on those rows are in sample, so no reference MSE.
+        reference = make_reference(X[:len(X) - new_rows], None)
+
+    errors = list(meta.get("recent_errors", []))
+    if new_rows:
+        errors += ((_predict(model, X[-new_rows:]) - y[-new_rows:]) ** 2).tolist()
+    errors = errors[-window:]
+    if not reference.get("mse") and len(errors) >= settings["min_errors"]:
+        # The first out-of-sample errors become the reference MSE
+        reference = {**reference, "mse": float(np.mean(errors))}
+    drift = check_drift(reference, X[-window:], errors)
+
+    updated = None
+    if not (force_retrain or drift["drifted"]):
+        updated = _update(model, X, y, new_rows, settings)
+    if updated is None:
+        action = "retrain"
+        updated, reference = _retrain(model_type, meta.get("params") or {}, X, y, window)
+        errors = []
+    else:
+        action = "incremental"
+    update_time = time.perf_counter() - start
+
+    training_window = meta.get("training_window")
+    if dates is not None:
+        training_window = (training_window[0] if training_window else dates[0], dates[-1])
+    lineage = {key: value for key, value in meta.items() if key not in RESERVED_METADATA}
+    version = registry.register(
+        name, updated, features=meta.get("features"),
+        metrics={**meta.get("metrics", {}), "recent_mse": float(np.mean(errors)) if errors else None},
+        training_window=training_window,
+        model_type=model_type, params=meta.get("params"),
+        reference=reference, recent_errors=errors,
+        update={"action": action, "parent_version": meta["version"], "new_rows": new_rows,
+                "drift": drift, "update_time": update_time},
+        **lineage,
+    )
+    registry.prune(name, settings["keep_versions"])
+    return {"action": action, "version": version, "new_rows": new_rows,
+            "drift": drift, "update_time": update_time}
+
+
+def update_from_store(name: str, symbol: str, store: Optional[FeatureStore] = None,
+                      target: Optional[str] = None,
+                      registry: Optional[ModelRegistry] = None, **kwargs) -> Dict[str, Any]:
+    """
+    Update a registered model with a symbol's new feature store rows
+
+    Rows count as new once their target is known, i.e. the target horizon
+    after the bar. The model's saved features are read, and rows missing
+    one of them are dropped, like the training jobs do.
+
+    Args:
+        name: Registered model name
+        symbol: Stock ticker symbol
+        store: Feature store (default: FeatureStore())
+        target: Target column (default: the store's first target)
+        registry: Model registry (default: get_registry())
+        **kwargs: Passed to update_model
+
+    Returns:
+        update_model result
+    """
+    registry = registry or get_registry()
+    features = registry.metadata(name).get("features")
+    X, y, dates = (store or FeatureStore()).training_data(symbol, target=target, features=features)
+    rows = ~np.isnan(np.asarray(X)).any(axis=1)
+    if not rows.all():
+        X, y, dates = np.asarray(X)[rows], y[rows], dates[rows]
+    return update_model(name, X, y, dates=dates, registry=registry, **kwargs)
+
+
+def update_registered_models(registry: Optional[ModelRegistry] = None,
+                             store: Optional[FeatureStore] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Daily job: update every registered model trained on a stored symbol
+
+    Models registered with a 'symbol' (training jobs) are brought up to
+    date with update_from_store. A failing model is reported and skipped.
+
+    Args:
+        registry: Model registry (default: get_registry())
+        store: Feature store (default: FeatureStore())
+
+    Returns:
+        Dictionary mapping each updated model name to its update_model result
+    """
+    registry = registry or get_registry()
+    store = store if store is not None else FeatureStore()
+
+    results = {}
+    for name in registry.names():
+        symbol = registry.metadata(name).get("symbol")
+        if not symbol or store.metadata(symbol) is None:
+            continue
+        try:
+            results[name] = update_from_store(name, symbol, store=store, registry=registry)
+        except Exception as e:
+            print(f"Error updating model {name}: {e}")
+    return results
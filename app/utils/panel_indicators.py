@@ -0,0 +1,408 @@
+"""
+Universe-wide technical indicators over a price panel
+
+A panel is a 2-D array of dates x symbols (one column per symbol). Every
+indicator is computed for all columns at once with NumPy, so a nightly
+recompute of the whole universe is a handful of array operations instead
+of a per-symbol pandas_ta loop.
+
+NaN handling:
+    - Leading NaNs mark a symbol that was not trading yet; each column
+      warms up from its own first valid bar.
+    - Gaps between the first and last valid bar are forward-filled
+      (a halted symbol keeps its last price).
+    - Trailing NaNs (delisted symbols) stay NaN in every output.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple, Union
+
+from .indicator_kernels import linear_recursion
+
+PanelLike = Union[np.ndarray, pd.DataFrame]
+
+
+def _as_panel(values: PanelLike) -> np.ndarray:
+    """Convert input to a float64 (dates, symbols) array"""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        arr = arr[:, None]
+    if arr.ndim != 2:
+        raise ValueError(f"Expected a 2-D (dates, symbols) panel, got shape {arr.shape}")
+    return arr
+
+
+def _valid_span(panel: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get first and last valid row per column
+
+    Columns without any valid value get first = T and last = -1.
+    """
+    n_rows = panel.shape[0]
+    valid = ~np.isnan(panel)
+    has_valid = valid.any(axis=0)
+    first = np.where(has_valid, valid.argmax(axis=0), n_rows)
+    last = np.where(has_valid, n_rows - 1 - valid[::-1].argmax(axis=0), -1)
+    return first, last
+
+
+def _fill_gaps(panel: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Forward-fill NaN gaps inside each column's valid span
+
+    Returns:
+        Tuple of (filled panel, first valid row, last valid row)
+    """
+    first, last = _valid_span(panel)
+    valid = ~np.isnan(panel)
+    if valid.all():
+        return panel, first, last
+
+    rows = np.arange(panel.shape[0])[:, None]
+    idx = np.where(valid, rows, 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = np.take_along_axis(panel, idx, axis=0)
+    filled[rows > last] = np.nan
+    return filled, first, last
+
+
+def _span_mask(n_rows: int, start: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Boolean mask of rows outside [start, last] per column"""
+    rows = np.arange(n_rows)[:, None]
+    return (rows < start) | (rows > last)
+
+
+def _rolling_sum(panel: np.ndarray, length: int) -> np.ndarray:
+    """
+    Rolling window sum along the date axis via cumulative sums
+
+    NaNs count as zero; callers mask rows without a full window.
+    """
+    csum = np.cumsum(np.nan_to_num(panel), axis=0)
+    out = np.empty_like(csum)
+    out[:length] = csum[:length]
+    np.subtract(csum[length:], csum[:-length], out=out[length:])
+    return out
+
+
+def _ema_core(panel: np.ndarray, alpha: float,
+              presma_length: Optional[int] = None,
+              adjust: bool = False) -> np.ndarray:
+    """
+    Exponential smoothing with per-column seeding
+
+    Args:
+        panel: (dates, symbols) array
+        alpha: Smoothing factor
+        presma_length: Seed with the SMA of the first ``presma_length``
+            valid values (pandas_ta/TA-Lib EMA). If None, seed with the
+            first valid value.
+        adjust: Weights of pandas ``ewm(adjust=True)`` (pandas_ta's RMA, as
+            used by RSI): start from zero and divide by the total weight
+            of the values seen (ignores presma_length)
+
+    Returns:
+        Smoothed panel, NaN before the seed row and after the last valid row
+    """
+    filled, first, last = _fill_gaps(panel)
+    n_rows, n_cols = filled.shape
+    cols = np.arange(n_cols)
+
+    if presma_length is None or adjust:
+        seed_row = first
+    else:
+        seed_row = first + presma_length - 1
+    has_seed = seed_row <= last
+    seed_row = np.where(has_seed, seed_row, n_rows)
+
+    # Seed value per column: first valid value or mean of the first window
+    if adjust:
+        seed = alpha * filled[np.minimum(seed_row, n_rows - 1), cols]
+    elif presma_length is None:
+        seed = filled[np.minimum(seed_row, n_rows - 1), cols]
+    else:
+        window = np.minimum(first + np.arange(presma_length)[:, None], n_rows - 1)
+        seed = np.take_along_axis(filled, window, axis=0).mean(axis=0)
+
+    # Recursion input: alpha * x after the seed row, the seed itself on it
+    u = np.multiply(filled, alpha)
+    outside = _span_mask(n_rows, seed_row, last)
+    u[outside] = 0.0
+    u[seed_row[has_seed], cols[has_seed]] = seed[has_seed]
+
+    out = linear_recursion(u, 1.0 - alpha)
+    if adjust:
+        count = np.arange(1, n_rows + 1)[:, None] - seed_row[None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out /= -np.expm1(np.maximum(count, 0) * np.log1p(-alpha))
+    out[outside] = np.nan
+    return out
+
+
+def sma_panel(close: PanelLike, length: int = 20) -> np.ndarray:
+    """
+    Simple moving average for every column of a price panel
+
+    Args:
+        close: (dates, symbols) close prices
+        length: SMA period
+
+    Returns:
+        (dates, symbols) array of SMA values
+    """
+    filled, first, last = _fill_gaps(_as_panel(close))
+    out = _rolling_sum(filled, length) / length
+    out[_span_mask(filled.shape[0], first + length - 1, last)] = np.nan
+    return out
+
+
+def ema_panel(close: PanelLike, length: int = 20) -> np.ndarray:
+    """
+    Exponential moving average for every column of a price panel
+
+    Seeded with the SMA of the first ``length`` bars, like pandas_ta.
+
+    Args:
+        close: (dates, symbols) close prices
+        length: EMA period
+
+    Returns:
+        (dates, symbols) array of EMA values
+    """
+    return _ema_core(_as_panel(close), 2.0 / (length + 1), presma_length=length)
+
+
+def rsi_panel(close: PanelLike, length: int = 14) -> np.ndarray:
+    """
+    Relative Strength Index for every column of a price panel
+
+    Gains and losses are smoothed with Wilder's moving average (pandas_ta's
+    RMA, see indicator_kernels.rma). The first
+    ``length`` bars of each column are warm-up and left as NaN.
+
+    Args:
+        close: (dates, symbols) close prices
+        length: RSI period
+
+    Returns:
+        (dates, symbols) array of RSI values (0-100)
+    """
+    filled, first, last = _fill_gaps(_as_panel(close))
+    change = np.full_like(filled, np.nan)
+    change[1:] = np.diff(filled, axis=0)
+
+    alpha = 1.0 / length
+    gain = _ema_core(np.clip(change, 0.0, None), alpha, adjust=True)
+    loss = _ema_core(np.clip(-change, 0.0, None), alpha, adjust=True)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 * gain / (gain + loss)
+    out[_span_mask(filled.shape[0], first + length, last)] = np.nan
+    return out
+
+
+def atr_panel(high: PanelLike, low: PanelLike, close: PanelLike,
+              length: int = 14) -> np.ndarray:
+    """
+    Average True Range for every column of a price panel
+
+    Args:
+        high: (dates, symbols) high prices
+        low: (dates, symbols) low prices
+        close: (dates, symbols) close prices
+        length: ATR period
+
+    Returns:
+        (dates, symbols) array of ATR values
+    """
+    high, _, _ = _fill_gaps(_as_panel(high))
+    low, _, _ = _fill_gaps(_as_panel(low))
+    close, _, _ = _fill_gaps(_as_panel(close))
+
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    # NaN on each column's first bar, which has no previous close
+    true_range = np.maximum(
+        high - low,
+        np.maximum(np.abs(high - prev_close), np.abs(prev_close - low))
+    )
+    return _ema_core(true_range, 1.0 / length, presma_length=length)
+
+
+def bollinger_panel(close: PanelLike, length: int = 20,
+                    std_dev: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    Bollinger Bands for every column of a price panel
+
+    Rolling mean and sample standard deviation come from cumulative sums
+    of the de-meaned prices, so there is no per-window loop.
+
+    Args:
+        close: (dates, symbols) close prices
+        length: MA period
+        std_dev: Standard deviation multiplier
+
+    Returns:
+        Dictionary with 'lower', 'mid', 'upper', 'bandwidth' and 'percent' arrays
+    """
+    filled, first, last = _fill_gaps(_as_panel(close))
+    n_rows, n_cols = filled.shape
+
+    # Shift each column by its first price to keep the cumulative sums small
+    ref = filled[np.minimum(first, n_rows - 1), np.arange(n_cols)]
+    centered = filled - np.nan_to_num(ref)
+    sum1 = _rolling_sum(centered, length)
+    sum2 = _rolling_sum(centered * centered, length)
+
+    mid = sum1 / length + np.nan_to_num(ref)
+    var = (sum2 - sum1 * sum1 / length) / (length - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+
+    mask = _span_mask(n_rows, first + length - 1, last)
+    mid[mask] = np.nan
+    std[mask] = np.nan
+
+    lower = mid - std_dev * std
+    upper = mid + std_dev * std
+    width = upper - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bandwidth = 100.0 * width / mid
+        percent = (filled - lower) / width
+
+    return {
+        'lower': lower,
+        'mid': mid,
+        'upper': upper,
+        'bandwidth': bandwidth,
+        'percent': percent,
+    }
+
+
+def macd_panel(close: PanelLike, fast: int = 12, slow: int = 26,
+               signal: int = 9) -> Dict[str, np.ndarray]:
+    """
+    MACD for every column of a price panel
+
+    Args:
+        close: (dates, symbols) close prices
+        fast: Fast EMA period
+        slow: Slow EMA period
+        signal: Signal line period
+
+    Returns:
+        Dictionary with 'macd', 'histogram' and 'signal' arrays
+    """
+    panel = _as_panel(close)
+    macd = ema_panel(panel, fast) - ema_panel(panel, slow)
+    signal_line = _ema_core(macd, 2.0 / (signal + 1), presma_length=signal)
+
+    return {
+        'macd': macd,
+        'histogram': macd - signal_line,
+        'signal': signal_line,
+    }
+
+
+def calculate_panel_indicators(close: PanelLike,
+                               high: Optional[PanelLike] = None,
+                               low: Optional[PanelLike] = None,
+                               short_window: int = 20,
+                               long_window: int = 50,
+                               rsi_period: int = 14,
+                               macd_fast: int = 12,
+                               macd_slow: int = 26,
+                               macd_signal: int = 9,
+                               bollinger_period: int = 20,
+                               bollinger_std: float = 2.0,
+                               atr_period: int = 14) -> Dict[str, PanelLike]:
+    """
+    Calculate the standard indicator set for a whole universe at once
+
+    Output keys use the same column names as the per-symbol ``add_*``
+    functions in ``technical_analysis``.
+
+    Args:
+        close: (dates, symbols) close prices
+        high: (dates, symbols) high prices, needed for ATR
+        low: (dates, symbols) low prices, needed for ATR
+        short_window: Short MA period
+        long_window: Long MA period
+        rsi_period: RSI period
+        macd_fast: MACD fast EMA period
+        macd_slow: MACD slow EMA period
+        macd_signal: MACD signal line period
+        bollinger_period: Bollinger Bands MA period
+        bollinger_std: Bollinger Bands standard deviation multiplier
+        atr_period: ATR period
+
+    Returns:
+        Dictionary of indicator name to (dates, symbols) panel. If ``close``
+        is a DataFrame, each panel is a DataFrame with the same index and
+        columns.
+    """
+    panel = _as_panel(close)
+    results: Dict[str, np.ndarray] = {}
+
+    for window in (short_window, long_window):
+        results[f'SMA_{window}'] = sma_panel(panel, window)
+        results[f'EMA_{window}'] = ema_panel(panel, window)
+
+    results[f'RSI_{rsi_period}'] = rsi_panel(panel, rsi_period)
+
+    macd = macd_panel(panel, macd_fast, macd_slow, macd_signal)
+    props = f'_{macd_fast}_{macd_slow}_{macd_signal}'
+    results['MACD' + props] = macd['macd']
+    results['MACDh' + props] = macd['histogram']
+    results['MACDs' + props] = macd['signal']
+
+    bands = bollinger_panel(panel, bollinger_period, bollinger_std)
+    props = f'_{bollinger_period}_{float(bollinger_std)}_{float(bollinger_std)}'
+    for prefix, key in (('BBL', 'lower'), ('BBM', 'mid'), ('BBU', 'upper'),
+                        ('BBB', 'bandwidth'), ('BBP', 'percent')):
+        results[prefix + props] = bands[key]
+
+    if high is not None and low is not None:
+        results[f'ATR_{atr_period}'] = atr_panel(high, low, panel, atr_period)
+
+    if isinstance(close, pd.DataFrame):
+        return {
+            name: pd.DataFrame(values, index=close.index, columns=close.columns)
+            for name, values in results.items()
+        }
+
+    return results
+
+
+def latest_values(panels: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Collect each symbol's latest valid value of every panel
+
+    Turns the output of ``calculate_panel_indicators`` (plus a 'Close'
+    panel) into one row per symbol, ready for ``scan_signals``.
+
+    Args:
+        panels: Dictionary of name to (dates, symbols) DataFrame, all with
+                the same columns
+
+    Returns:
+        DataFrame indexed by symbol with one column per panel
+    """
+    latest = {}
+    symbols = None
+    for name, panel in panels.items():
+        values = _as_panel(panel)
+        row = values[-1].copy()
+
+        # Only symbols without a value on the last date need a search
+        missing = np.flatnonzero(np.isnan(row))
+        if len(missing):
+            _, last = _valid_span(values[:, missing])
+            found = last >= 0
+            row[missing[found]] = values[last[found], missing[found]]
+
+        latest[name] = row
+        if symbols is None and isinstance(panel, pd.DataFrame):
+            symbols = panel.columns
+
+    return pd.DataFrame(latest, index=symbols)
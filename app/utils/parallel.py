@@ -0,0 +1,220 @@
+"""
+Process-pool execution of per-symbol work over a stock universe
+
+run_per_symbol() fans a function out over symbols on a process pool.
+Large inputs (price panels, feature arrays) are placed in shared memory
+once, or passed as memory-mapped files, and re-attached in every worker
+without copying; only symbols and small results are pickled. Results come
+back in input order and a failing symbol does not stop the others.
+
+Workers attach the shared inputs for each task and close their handles
+when it ends; the parent unlinks the blocks once the pool is done.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import PARALLEL_CONFIG
+
+
+def resolve_n_jobs(n_jobs: Optional[int] = None) -> int:
+    """
+    Number of worker processes to use
+
+    Args:
+        n_jobs: Requested workers; None uses PARALLEL_CONFIG['n_jobs'],
+                and None or -1 there means every core
+
+    Returns:
+        Positive worker count
+    """
+    if n_jobs is None:
+        n_jobs = PARALLEL_CONFIG["n_jobs"]
+    cores = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == -1:
+        return cores
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be positive or -1, got {n_jobs}")
+    return n_jobs
+
+
+def _memmap_offset(value) -> Optional[int]:
+    """
+    File offset of the first element of a C-contiguous np.memmap view
+
+    ``memmap.offset`` is the offset the parent mapping was opened at, not
+    that of a slice of it, so it is derived from the element's address
+    within the mapping. None if the array cannot be re-opened as is.
+    """
+    if (not isinstance(value, np.memmap) or value.filename is None
+            or getattr(value, "_mmap", None) is None or not value.flags.c_contiguous):
+        return None
+    # The mapping starts at the allocation boundary at or before memmap.offset
+    mapping_start = value.offset - value.offset % mmap.ALLOCATIONGRANULARITY
+    mapping_address = np.frombuffer(value._mmap, dtype=np.uint8).ctypes.data
+    return mapping_start + value.ctypes.data - mapping_address
+
+
+def _share(value) -> Tuple[Dict[str, Any], Optional[shared_memory.SharedMemory]]:
+    """
+    Describe an input so a worker can attach it without pickling the data
+
+    C-contiguous memory-mapped arrays (including row slices) are re-opened
+    from their file at the byte offset of their first element; other
+    arrays, strided memmap views and DataFrame values are copied once into
+    a shared memory block.
+    """
+    offset = _memmap_offset(value)
+    if offset is not None:
+        return {"kind": "memmap", "filename": value.filename, "dtype": value.dtype.str,
+                "shape": value.shape, "offset": offset}, None
+
+    spec: Dict[str, Any] = {"kind": "array"}
+    if isinstance(value, pd.DataFrame):
+        spec.update(kind="frame", index=value.index, columns=value.columns)
+        array = value.to_numpy()
+    else:
+        array = np.asarray(value)
+    if array.dtype == object:
+        raise TypeError("Shared inputs must have a numeric dtype")
+
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    spec.update(name=block.name, dtype=array.dtype.str, shape=array.shape)
+    return spec, block
+
+
+def _attach(spec: Dict[str, Any], blocks: List[shared_memory.SharedMemory]):
+    """Attach a shared input described by _share (read-only), collecting opened blocks"""
+    if spec["kind"] == "memmap":
+        return np.memmap(spec["filename"], dtype=spec["dtype"], mode="r",
+                         shape=spec["shape"], offset=spec["offset"])
+
+    # Pool workers share the parent's resource tracker, which unlinks the
+    # block only if the parent dies without cleaning up
+    block = shared_memory.SharedMemory(name=spec["name"])
+    blocks.append(block)
+
+    array = np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=block.buf)
+    array.flags.writeable = False
+    if spec["kind"] == "frame":
+        return pd.DataFrame(array, index=spec["index"], columns=spec["columns"], copy=False)
+    return array
+
+
+def _read_only(value):
+    """Read-only view of an array input (other inputs are passed as is)"""
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+    return value
+
+
+def _run_one(func: Callable, symbol: str, inputs: Dict[str, Any],
+             kwargs: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+    """Run func for one symbol, returning (result, error message)"""
+    try:
+        return func(symbol, **inputs, **kwargs), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _run_chunk(func: Callable, chunk: List[Tuple[str, Dict[str, Any]]],
+               kwargs: Dict[str, Any],
+               specs: Dict[str, Dict[str, Any]]) -> List[Tuple[Any, Optional[str]]]:
+    """Run func for a chunk of (symbol, per-symbol kwargs) in one worker task"""
+    blocks: List[shared_memory.SharedMemory] = []
+    inputs: Dict[str, Any] = {}
+    try:
+        for name, spec in specs.items():
+            inputs[name] = _attach(spec, blocks)
+        return [_run_one(func, symbol, inputs, {**kwargs, **extra}) for symbol, extra in chunk]
+    finally:
+        inputs.clear()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # A result still views the block; it is released with the worker
+                pass
+
+
+def run_per_symbol(func: Callable[..., Any],
+                   symbols: Iterable[str],
+                   shared: Optional[Dict[str, Any]] = None,
+                   n_jobs: Optional[int] = None,
+                   chunksize: Optional[int] = None,
+                   per_symbol: Optional[Dict[str, Dict[str, Any]]] = None,
+                   **kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run ``func(symbol, **shared, **kwargs)`` for every symbol on a process pool
+
+    ``func`` must be a module-level function so it can be sent to the
+    workers. Shared inputs are attached read-only: NumPy arrays and
+    DataFrames (numeric values) go through shared memory, C-contiguous
+    np.memmap arrays and row slices are re-opened from their file.
+
+    Args:
+        func: Per-symbol function
+        symbols: Symbols to process
+        shared: Large inputs passed to every call by keyword, e.g.
+                {'close': close_panel}
+        n_jobs: Worker processes (default: PARALLEL_CONFIG, all cores);
+                1 runs in the current process
+        chunksize: Symbols per task (default: about 4 tasks per worker)
+        per_symbol: Keyword arguments of individual symbols, e.g. their
+                    fundamentals; each is pickled only with its symbol's task
+        **kwargs: Small extra keyword arguments, pickled once per task
+
+    Returns:
+        Tuple of (results, errors): results maps each successful symbol to
+        its return value in input order, errors maps failed symbols to
+        their error message
+    """
+    symbols = list(symbols)
+    shared = shared or {}
+    per_symbol = per_symbol or {}
+    tasks = [(symbol, per_symbol.get(symbol, {})) for symbol in symbols]
+    n_jobs = min(resolve_n_jobs(n_jobs), max(len(symbols), 1))
+
+    if n_jobs == 1:
+        inputs = {name: _read_only(value) for name, value in shared.items()}
+        outcomes = [_run_one(func, symbol, inputs, {**kwargs, **extra}) for symbol, extra in tasks]
+    else:
+        chunksize = chunksize or max(1, -(-len(symbols) // (n_jobs * 4)))
+        chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+        specs, blocks = {}, []
+        try:
+            for name, value in shared.items():
+                specs[name], block = _share(value)
+                if block is not None:
+                    blocks.append(block)
+
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                outcomes = [
+                    outcome
+                    for chunk_outcomes in executor.map(
+                        _run_chunk, [func] * len(chunks), chunks,
+                        [kwargs] * len(chunks), [specs] * len(chunks)
+                    )
+                    for outcome in chunk_outcomes
+                ]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    results, errors = {}, {}
+    for symbol, (result, error) in zip(symbols, outcomes):
+        if error is None:
+            results[symbol] = result
+        else:
+            errors[symbol] = error
+    return results, errors
@@ -0,0 +1,191 @@
+"""
+Sector and industry peer statistics for fundamental metrics
+
+compute_peer_ranks() places every company among its sector and industry
+peers with grouped, vectorized ranking over the whole universe at once:
+percentile rank, peer median and z-score of each analyze_fundamentals
+metric. update_peer_ranks() stores the result in the peer_ranks table,
+keyed by symbol, so a company's peer comparison is one indexed lookup
+(get_peer_ranks).
+"""
+
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .analysis import METRIC_FIELDS
+from .database import get_db_connection, get_fundamentals
+
+PEER_LEVELS = ["sector", "industry"]
+
+# Metrics ranked among peers (duplicate fields dropped)
+PEER_METRICS = [name for name in METRIC_FIELDS if name != "revenue_growth"]
+
+# Display names for peer comparison sentences
+PEER_LABELS = {
+    "pe_ratio": "P/E",
+    "pb_ratio": "P/B",
+    "peg_ratio": "PEG",
+    "roe": "ROE",
+    "roa": "ROA",
+    "gross_profit_margin": "Gross margin",
+    "sales_growth": "Sales growth",
+    "earnings_growth": "Earnings growth",
+    "dividend_yield": "Dividend yield",
+    "debt_to_equity": "Debt/equity",
+    "current_ratio": "Current ratio",
+    "market_cap": "Market cap",
+}
+
+PEER_COLUMNS = [
+    "symbol",
+    "metric",
+    "level",
+    "group_name",
+    "value",
+    "percentile",
+    "median",
+    "zscore",
+    "peers",
+]
+
+
+def compute_peer_ranks(metrics: pd.DataFrame,
+                       groups: pd.DataFrame,
+                       levels: List[str] = PEER_LEVELS,
+                       min_peers: int = 3) -> pd.DataFrame:
+    """
+    Percentile ranks, medians and z-scores of metrics within peer groups
+
+    Args:
+        metrics: One row per symbol (index), one numeric column per metric
+        groups: Peer group columns (e.g. sector, industry) indexed by symbol
+        levels: Group columns to rank within
+        min_peers: Groups with fewer companies reporting a metric are skipped
+
+    Returns:
+        Long DataFrame with the PEER_COLUMNS columns, one row per symbol,
+        metric and level with a value
+    """
+    metrics = metrics.apply(pd.to_numeric, errors="coerce").astype(float)
+    frames = []
+
+    for level in levels:
+        group = groups[level].reindex(metrics.index)
+        grouped = metrics.groupby(group)
+
+        count = grouped.transform("count")
+        stats = {
+            "value": metrics,
+            "percentile": 100.0 * grouped.rank(pct=True),
+            "median": grouped.transform("median"),
+            "zscore": (metrics - grouped.transform("mean")) / grouped.transform("std").replace(0.0, np.nan),
+            "peers": count,
+        }
+        long = pd.concat({name: frame.stack() for name, frame in stats.items()}, axis=1)
+        long.index.names = ["symbol", "metric"]
+        long = long[long["value"].notna() & (long["peers"] >= min_peers)].reset_index()
+
+        long["level"] = level
+        long["group_name"] = long["symbol"].map(group)
+        frames.append(long)
+
+    ranks = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=PEER_COLUMNS)
+    ranks["peers"] = ranks["peers"].astype(int)
+    return ranks[PEER_COLUMNS]
+
+
+def load_peer_inputs() -> pd.DataFrame:
+    """
+    Every active ticker of the universe with its stored metrics
+
+    Peer groups come from the tickers table, so ranks are taken within
+    the whole sector or industry; tickers whose fundamentals have not been
+    computed yet (see analysis.refresh_fundamentals) have NaN metrics and
+    are left out of the ranks.
+
+    Returns:
+        DataFrame indexed by symbol with the PEER_LEVELS and PEER_METRICS columns
+    """
+    metrics = pd.DataFrame.from_dict(
+        {symbol: json.loads(record["analysis"]).get("metrics", {})
+         for symbol, record in get_fundamentals().items() if record["analysis"]},
+        orient="index",
+    ).reindex(columns=PEER_METRICS)
+
+    conn = get_db_connection()
+    groups = pd.read_sql_query(
+        "SELECT symbol, sector, industry FROM tickers WHERE is_active = 1", conn
+    ).drop_duplicates("symbol").set_index("symbol")
+    conn.close()
+
+    return groups.join(metrics, how="left")
+
+
+def update_peer_ranks(inputs: Optional[pd.DataFrame] = None) -> int:
+    """
+    Recompute the peer_ranks table for the whole universe
+
+    Args:
+        inputs: Symbols x (sector, industry, metrics) (default: load_peer_inputs)
+
+    Returns:
+        Number of rows written
+    """
+    inputs = load_peer_inputs() if inputs is None else inputs
+    metrics = inputs[[column for column in PEER_METRICS if column in inputs.columns]]
+    ranks = compute_peer_ranks(metrics, inputs[PEER_LEVELS])
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM peer_ranks')
+    cursor.executemany(f'''
+        INSERT INTO peer_ranks ({", ".join(PEER_COLUMNS)})
+        VALUES ({", ".join("?" * len(PEER_COLUMNS))})
+    ''', [
+        [None if pd.isna(value) else value for value in row]
+        for row in ranks.astype(object).itertuples(index=False)
+    ])
+    conn.commit()
+    conn.close()
+
+    return len(ranks)
+
+
+def get_peer_ranks(symbol: str) -> Dict[str, Dict[str, Dict]]:
+    """
+    Peer statistics of one symbol (a single primary-key lookup)
+
+    Args:
+        symbol: Ticker symbol
+
+    Returns:
+        Nested dictionary metric -> level -> statistics
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {", ".join(PEER_COLUMNS)} FROM peer_ranks WHERE symbol = ?
+    ''', (symbol.upper(),))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    ranks: Dict[str, Dict[str, Dict]] = {}
+    for row in rows:
+        ranks.setdefault(row["metric"], {})[row["level"]] = row
+    return ranks
+
+
+def _ordinal(value: float) -> str:
+    """Integer ordinal, e.g. 23 -> '23rd'"""
+    number = int(round(value))
+    suffix = "th" if 10 <= number % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+
+def describe_peer_rank(metric: str, stats: Dict) -> str:
+    """Peer rank as a sentence, e.g. 'P/E in 23rd percentile of Semiconductors'"""
+    label = PEER_LABELS.get(metric, metric.replace("_", " ").capitalize())
+    return f"{label} in {_ordinal(stats['percentile'])} percentile of {stats['group_name']}"
@@ -0,0 +1,171 @@
+"""
+Micro-batched predictions for concurrent requests
+
+Many sessions asking one model for a prediction each would pay the full
+per-call overhead of model.predict (large for Keras) once per row.
+PredictionQueue collects requests per (model, version) for at most
+``max_wait_ms`` or until ``max_batch_size`` rows are waiting, runs a single
+batched predict on a dispatcher thread and hands every caller its own rows
+of the result through a Future.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import ML_CONFIG
+
+from .model_registry import ModelRegistry, get_registry
+
+
+class PredictionQueue:
+    """Gathers prediction requests per model and serves them in batches"""
+
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        """
+        Initialize PredictionQueue
+
+        Args:
+            registry: Registry the models are loaded from (default: get_registry())
+            max_batch_size: Rows per batched predict
+                            (default: ML_CONFIG['max_batch_size'])
+            max_wait_ms: Longest a request waits for others to join its batch
+                         (default: ML_CONFIG['max_batch_wait_ms'])
+        """
+        self.registry = registry if registry is not None else get_registry()
+        self.max_batch_size = max_batch_size or ML_CONFIG["max_batch_size"]
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else ML_CONFIG["max_batch_wait_ms"]) / 1000.0
+
+        # (name, version) -> pending (rows, future) in arrival order, with
+        # the arrival time of the oldest request
+        self._pending: "OrderedDict[Tuple[str, Optional[int]], List]" = OrderedDict()
+        self._first_arrival = {}
+        self._condition = threading.Condition()
+        self._running = True
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, features: np.ndarray, version: Optional[int] = None) -> Future:
+        """
+        Queue rows for prediction
+
+        Args:
+            name: Registered model name
+            features: One feature row or a (rows, features) matrix
+            version: Model version (default: latest)
+
+        Returns:
+            Future resolving to the predictions for these rows
+        """
+        rows = np.atleast_2d(np.asarray(features))
+        future: Future = Future()
+        key = (name, version)
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("PredictionQueue is closed")
+            if key not in self._pending:
+                self._pending[key] = []
+                self._first_arrival[key] = time.perf_counter()
+            self._pending[key].append((rows, future))
+            self._condition.notify()
+        return future
+
+    def predict(self, name: str, features: np.ndarray, version: Optional[int] = None,
+                timeout: Optional[float] = None) -> np.ndarray:
+        """Queue rows and wait for their predictions"""
+        return self.submit(name, features, version).result(timeout)
+
+    def close(self) -> None:
+        """Serve the requests already queued, then stop the dispatcher"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _next_batch(self):
+        """
+        Wait for a batch that is full or has waited long enough (lock held)
+
+        Returns None once the queue is closed and drained.
+        """
+        while True:
+            now = time.perf_counter()
+            deadline = None
+            for key, requests in self._pending.items():
+                size = sum(len(rows) for rows, _ in requests)
+                due = self._first_arrival[key] + self.max_wait
+                if size >= self.max_batch_size or due <= now or not self._running:
+                    return key, self._take(key)
+                deadline = due if deadline is None else min(deadline, due)
+
+            if not self._running:
+                return None
+            self._condition.wait(None if deadline is None else deadline - now)
+
+    def _take(self, key):
+        """Remove up to max_batch_size rows of requests for a model (lock held)"""
+        requests = self._pending[key]
+        taken, size = [], 0
+        while requests and (not taken or size + len(requests[0][0]) <= self.max_batch_size):
+            rows, future = requests.pop(0)
+            taken.append((rows, future))
+            size += len(rows)
+
+        if requests:
+            # The rest starts a new batch window now
+            self._first_arrival[key] = time.perf_counter()
+            self._pending.move_to_end(key)
+        else:
+            del self._pending[key]
+            del self._first_arrival[key]
+        return taken
+
+    def _dispatch(self) -> None:
+        """Dispatcher thread: run batched predicts and scatter the results"""
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+            if batch is None:
+                return
+
+            (name, version), requests = batch
+            requests = [(rows, future) for rows, future in requests
+                        if future.set_running_or_notify_cancel()]
+            if not requests:
+                continue
+
+            try:
+                predictions = self.registry.predict(name, np.concatenate([rows for rows, _ in requests]), version)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            start = 0
+            for rows, future in requests:
+                future.set_result(predictions[start:start + len(rows)])
+                start += len(rows)
+
+
+# Process-wide queue shared by all sessions
+_QUEUE: Optional[PredictionQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_prediction_queue() -> PredictionQueue:
+    """Shared prediction queue over the shared registry, created on first use"""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = PredictionQueue()
+        return _QUEUE
@@ -0,0 +1,246 @@
+"""
+Multi-timeframe resampling of OHLCV price data
+
+Daily bars are aggregated into weekly, monthly or custom bars with the
+usual OHLCV semantics (first open, highest high, lowest low, last close,
+summed volume). AggregateStore materializes the aggregates as Parquet next
+to the price store and extends them incrementally: when new daily bars
+are appended, only the last (possibly partial) aggregate bar is rebuilt.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import AGGREGATES_DIR, PARQUET_CONFIG
+from .indicator_cache import _digest, _last_bar, _row_hashes, data_fingerprint
+
+# Named timeframes and their pandas resample rules. Any other pandas
+# offset alias (e.g. '2W-FRI', 'QE') is accepted as a custom timeframe.
+TIMEFRAMES = {
+    'daily': None,
+    'weekly': 'W-FRI',
+    'monthly': 'ME',
+    'quarterly': 'QE',
+}
+
+# How each OHLCV column is aggregated; other columns keep their last value
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+}
+
+FINGERPRINT_KEY = b"aggregate_fingerprint"
+TAIL_START_KEY = b"aggregate_tail_start"
+
+
+def timeframe_rule(timeframe: Optional[str]) -> Optional[str]:
+    """
+    Resolve a timeframe name to a pandas resample rule
+
+    Args:
+        timeframe: 'daily', 'weekly', 'monthly', 'quarterly', a pandas
+                   offset alias, or None (daily)
+
+    Returns:
+        Resample rule, or None for the base (daily) bars
+    """
+    if timeframe is None:
+        return None
+    if timeframe in TIMEFRAMES:
+        return TIMEFRAMES[timeframe]
+
+    try:
+        pd.tseries.frequencies.to_offset(timeframe)
+    except ValueError:
+        raise ValueError(
+            f"Unknown timeframe: {timeframe}. Use one of {list(TIMEFRAMES)} or a pandas offset alias"
+        )
+    return timeframe
+
+
+def _aggregate(data: pd.DataFrame, rule: str) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Resample OHLCV data to ``rule`` bars
+
+    Returns:
+        Aggregated bars (same layout as ``data``: Date column or
+        DatetimeIndex) and the number of source bars in each of them
+    """
+    has_date_column = 'Date' in data.columns
+    frame = data.set_index('Date') if has_date_column else data
+    if not isinstance(frame.index, pd.DatetimeIndex):
+        raise ValueError("Resampling needs a Date column or a DatetimeIndex")
+
+    agg = {column: OHLCV_AGGREGATION.get(column, 'last') for column in frame.columns}
+    # origin='epoch' keeps fixed-length bins (e.g. '3D') aligned however
+    # far back the input starts, so a tail resample reproduces the same bins
+    resampler = frame.resample(rule, origin='epoch')
+    bars = resampler.agg(agg)
+    counts = resampler.size()
+
+    # Periods without any source bar (e.g. a market holiday week)
+    bars = bars[counts.to_numpy() > 0]
+    counts = counts[counts > 0]
+
+    if has_date_column:
+        bars = bars.reset_index()
+    return bars, counts
+
+
+def resample_ohlcv(data: pd.DataFrame, timeframe: Optional[str]) -> pd.DataFrame:
+    """
+    Aggregate price data to a coarser timeframe
+
+    Bars are labelled with the end of their period; the last bar may be
+    partial (e.g. the current week).
+
+    Args:
+        data: DataFrame with OHLCV data and a Date column or DatetimeIndex
+        timeframe: Target timeframe (see timeframe_rule)
+
+    Returns:
+        Resampled DataFrame, or a copy of ``data`` for the daily timeframe
+    """
+    rule = timeframe_rule(timeframe)
+    if rule is None:
+        return data.copy()
+    return _aggregate(data, rule)[0]
+
+
+class AggregateStore:
+    """Parquet store of resampled bars, kept in sync with the daily data"""
+
+    def __init__(self, base_dir: Optional[Path] = None):
+        """
+        Initialize AggregateStore
+
+        Args:
+            base_dir: Directory for aggregate Parquet files
+                      (default: AGGREGATES_DIR next to the price store)
+        """
+        self.base_dir = Path(base_dir) if base_dir is not None else AGGREGATES_DIR
+
+    def get_path(self, symbol: str, timeframe: str) -> Path:
+        """Get the file path of a symbol's aggregates for a timeframe"""
+        name = re.sub(r'[^A-Za-z0-9_-]', '_', timeframe)
+        return self.base_dir / symbol.upper() / f"{name}.parquet"
+
+    def get(self, symbol: str, data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """
+        Return aggregated bars for the data, rebuilding only what changed
+
+        - Same daily data as last time: the stored bars are returned.
+        - Daily bars appended: the last stored bar and everything after it
+          are rebuilt from the daily bars of that period onwards.
+        - Anything else (history revised): full resample.
+
+        Args:
+            symbol: Stock ticker symbol
+            data: Daily OHLCV data
+            timeframe: Target timeframe (see timeframe_rule)
+
+        Returns:
+            Aggregated bars
+        """
+        rule = timeframe_rule(timeframe)
+        if rule is None:
+            return data
+
+        path = self.get_path(symbol, timeframe)
+        row_hashes = _row_hashes(data)
+        fingerprint = data_fingerprint(data, row_hashes)
+
+        stored, stored_fp, tail_start = self._read(path)
+        if stored is not None and stored_fp is not None:
+            if stored_fp == fingerprint:
+                return stored
+
+            stored_rows = stored_fp.get("rows", 0)
+            if (0 <= tail_start < stored_rows < len(data)
+                    and len(stored) > 0
+                    and _last_bar(data, stored_rows - 1) == stored_fp.get("last_bar")
+                    and _digest(row_hashes[:stored_rows]) == stored_fp.get("hash")):
+                tail, counts = _aggregate(data.iloc[tail_start:], rule)
+                bars = pd.concat([stored.iloc[:-1], tail], ignore_index='Date' in data.columns)
+                self._write(path, bars, fingerprint, len(data) - int(counts.iloc[-1]))
+                return bars
+
+        bars, counts = _aggregate(data, rule)
+        if len(bars):
+            self._write(path, bars, fingerprint, len(data) - int(counts.iloc[-1]))
+        return bars
+
+    def update(self, symbol: str, data: pd.DataFrame,
+               timeframes: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Materialize aggregates for several timeframes after new daily data
+
+        Args:
+            symbol: Stock ticker symbol
+            data: Daily OHLCV data
+            timeframes: Timeframes to build (default: all named non-daily ones)
+
+        Returns:
+            Dictionary of timeframe to aggregated bars
+        """
+        if timeframes is None:
+            timeframes = [name for name, rule in TIMEFRAMES.items() if rule is not None]
+        return {timeframe: self.get(symbol, data, timeframe) for timeframe in timeframes}
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """
+        Remove stored aggregates
+
+        Args:
+            symbol: Stock ticker symbol
+            timeframe: Timeframe to remove (default: all timeframes)
+        """
+        if timeframe is not None:
+            self.get_path(symbol, timeframe).unlink(missing_ok=True)
+            return
+
+        symbol_dir = self.base_dir / symbol.upper()
+        if symbol_dir.exists():
+            for path in symbol_dir.glob("*.parquet"):
+                path.unlink()
+
+    def _read(self, path: Path):
+        """Read stored bars, the daily data fingerprint and the last bar's first row"""
+        if not path.exists():
+            return None, None, -1
+
+        try:
+            table = pq.read_table(path)
+            metadata = table.schema.metadata or {}
+            if FINGERPRINT_KEY not in metadata or TAIL_START_KEY not in metadata:
+                return None, None, -1
+            return (table.to_pandas(), json.loads(metadata[FINGERPRINT_KEY]),
+                    int(metadata[TAIL_START_KEY]))
+        except Exception as e:
+            print(f"Error reading aggregates {path}: {e}")
+            return None, None, -1
+
+    def _write(self, path: Path, bars: pd.DataFrame,
+               fingerprint: Dict, tail_start: int) -> None:
+        """Write bars with the daily data fingerprint in the schema metadata"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(bars, preserve_index=True)
+            metadata = dict(table.schema.metadata or {})
+            metadata[FINGERPRINT_KEY] = json.dumps(fingerprint).encode()
+            metadata[TAIL_START_KEY] = str(tail_start).encode()
+            pq.write_table(table.replace_schema_metadata(metadata), path,
+                           compression=PARQUET_CONFIG["compression"])
+        except Exception as e:
+            print(f"Error writing aggregates {path}: {e}")
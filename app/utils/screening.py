@@ -0,0 +1,457 @@
+"""
+Indexed range queries over a fundamentals snapshot
+
+ScreeningIndex keeps, per metric, the row positions sorted by value. A
+range criterion is answered by two binary searches on the sorted values,
+so its match count is known before any rows are touched. Criteria are
+applied smallest-first: the most selective one produces the candidate
+rows and every other criterion only checks those candidates. Top-k by a
+sort metric uses a partial sort of the survivors.
+
+Screens can also be written as expressions (compile_screen), e.g.
+``pe_ratio < 15 and roe > 0.12``; they are parsed with ast against a
+whitelist, compiled once into vectorized functions and cached by text.
+"""
+
+import ast
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NAN_POLICIES = ('exclude', 'include')
+
+
+def _bounds(value) -> Tuple[Optional[float], Optional[float]]:
+    """Normalize a criterion to (low, high); None means open-ended"""
+    if isinstance(value, dict):
+        return value.get('min'), value.get('max')
+    if isinstance(value, tuple) and len(value) == 2:
+        return value
+    raise ValueError(f"Range criteria must be (low, high) tuples or {{'min', 'max'}} dicts, got {value!r}")
+
+
+def _sort_order(keys: np.ndarray, ascending: bool, top_k: Optional[int]) -> np.ndarray:
+    """Positions of the first top_k keys in sort order (NaNs last)"""
+    keys = np.where(np.isnan(keys), np.inf, keys if ascending else -keys)
+    if top_k is not None and top_k < len(keys):
+        # Partial sort: only the top k keys are ordered
+        head = np.argpartition(keys, top_k - 1)[:top_k] if top_k > 0 else np.array([], dtype=np.int64)
+        return head[np.argsort(keys[head], kind='stable')]
+    return np.argsort(keys, kind='stable')
+
+
+class ScreeningIndex:
+    """Per-metric sorted indices over a snapshot DataFrame (one row per stock)"""
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Initialize ScreeningIndex
+
+        Sorted indices are built lazily, the first time a metric is used,
+        and kept for later queries.
+
+        Args:
+            data: Snapshot DataFrame, e.g. analyze_fundamentals_batch metrics
+        """
+        self.data = data
+        self._values: Dict[str, np.ndarray] = {}
+        self._order: Dict[str, np.ndarray] = {}
+        self._sorted: Dict[str, np.ndarray] = {}
+        self._nan_rows: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def values(self, column: str) -> np.ndarray:
+        """Column values as a float array (non-numeric entries become NaN)"""
+        if column not in self._values:
+            if column not in self.data.columns:
+                raise KeyError(f"Unknown screening column: {column}")
+            self._values[column] = pd.to_numeric(
+                self.data[column], errors='coerce'
+            ).to_numpy(dtype=np.float64, na_value=np.nan)
+        return self._values[column]
+
+    def _build(self, column: str) -> None:
+        """Sort the non-NaN rows of a column"""
+        values = self.values(column)
+        nan = np.isnan(values)
+        valid_rows = np.flatnonzero(~nan)
+        order = valid_rows[np.argsort(values[valid_rows], kind='stable')]
+        self._order[column] = order
+        self._sorted[column] = values[order]
+        self._nan_rows[column] = np.flatnonzero(nan)
+
+    def _span(self, column: str, low, high, strict_low: bool = False,
+              strict_high: bool = False) -> Tuple[int, int]:
+        """Slice of the sorted index with low <= value <= high (< for strict bounds)"""
+        if column not in self._order:
+            self._build(column)
+        sorted_values = self._sorted[column]
+        start = 0 if low is None else int(
+            np.searchsorted(sorted_values, low, side='right' if strict_low else 'left'))
+        stop = len(sorted_values) if high is None else int(
+            np.searchsorted(sorted_values, high, side='left' if strict_high else 'right'))
+        return start, max(start, stop)
+
+    def count(self, column: str, low=None, high=None, nan_policy: str = 'exclude',
+              strict_low: bool = False, strict_high: bool = False) -> int:
+        """Number of rows matching a range criterion, from two binary searches"""
+        start, stop = self._span(column, low, high, strict_low, strict_high)
+        extra = len(self._nan_rows[column]) if nan_policy == 'include' else 0
+        return stop - start + extra
+
+    def range_rows(self, column: str, low=None, high=None, nan_policy: str = 'exclude',
+                   strict_low: bool = False, strict_high: bool = False) -> np.ndarray:
+        """
+        Row positions matching low <= value <= high
+
+        Args:
+            column: Metric column
+            low: Lower bound (None: open)
+            high: Upper bound (None: open)
+            nan_policy: 'exclude' (NaN never matches) or 'include'
+            strict_low: Use value > low instead of >=
+            strict_high: Use value < high instead of <=
+
+        Returns:
+            Sorted array of row positions
+        """
+        start, stop = self._span(column, low, high, strict_low, strict_high)
+        rows = self._order[column][start:stop]
+        if nan_policy == 'include':
+            rows = np.concatenate([rows, self._nan_rows[column]])
+        return np.sort(rows)
+
+    def _matches(self, column: str, rows: np.ndarray, low, high, nan_policy: str,
+                 strict_low: bool = False, strict_high: bool = False) -> np.ndarray:
+        """Mask of candidate rows that satisfy a range criterion"""
+        values = self.values(column)[rows]
+        with np.errstate(invalid='ignore'):
+            mask = np.ones(len(rows), dtype=bool)
+            if low is not None:
+                mask &= values > low if strict_low else values >= low
+            if high is not None:
+                mask &= values < high if strict_high else values <= high
+        if nan_policy == 'include':
+            mask |= np.isnan(values)
+        return mask
+
+    def _filter(self, ranges: List[Tuple], nan_policy: str) -> np.ndarray:
+        """
+        Rows passing every (column, low, high, strict_low, strict_high) range
+
+        The most selective range is read from its sorted index; the others
+        are only tested on its rows.
+        """
+        if not ranges:
+            return np.arange(len(self.data))
+
+        ranked = sorted(ranges, key=lambda r: self.count(r[0], r[1], r[2], nan_policy, *r[3:]))
+        column, low, high, strict_low, strict_high = ranked[0]
+        rows = self.range_rows(column, low, high, nan_policy, strict_low, strict_high)
+        for column, low, high, strict_low, strict_high in ranked[1:]:
+            if len(rows) == 0:
+                break
+            rows = rows[self._matches(column, rows, low, high, nan_policy, strict_low, strict_high)]
+        return rows
+
+    def query(self,
+              criteria: Dict[str, Any],
+              nan_policy: str = 'exclude',
+              sort_by: Optional[str] = None,
+              ascending: bool = True,
+              top_k: Optional[int] = None) -> np.ndarray:
+        """
+        Row positions passing every range criterion
+
+        Args:
+            criteria: Mapping of column to (low, high) with None for an open
+                      bound, or to {'min': ..., 'max': ...}
+            nan_policy: 'exclude' or 'include' (how NaN metrics are treated)
+            sort_by: Column to order the result by (NaNs last)
+            ascending: Sort direction
+            top_k: Keep only the first k rows in sort order
+
+        Returns:
+            Array of row positions (in row order unless sorted)
+        """
+        if nan_policy not in NAN_POLICIES:
+            raise ValueError(f"Unknown NaN policy: {nan_policy}. Use one of {NAN_POLICIES}")
+
+        ranges = [(column, *_bounds(value), False, False) for column, value in criteria.items()]
+        return self._order_rows(self._filter(ranges, nan_policy), sort_by, ascending, top_k)
+
+    def _order_rows(self, rows: np.ndarray, sort_by: Optional[str],
+                    ascending: bool, top_k: Optional[int]) -> np.ndarray:
+        """Sort rows by a column (NaNs last) and keep the first top_k"""
+        if sort_by is None:
+            return rows if top_k is None else rows[:top_k]
+        return rows[_sort_order(self.values(sort_by)[rows], ascending, top_k)]
+
+    def screen(self, criteria: Dict[str, Any], **kwargs) -> pd.DataFrame:
+        """Rows of the snapshot passing the criteria (see query)"""
+        return self.data.iloc[self.query(criteria, **kwargs)]
+
+    def evaluate(self, plan: 'ScreenPlan',
+                 sort_by: Optional[str] = None,
+                 ascending: bool = True,
+                 top_k: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Run a compiled screen
+
+        The plan's simple ``column <op> constant`` terms go through the
+        sorted indices; the rest of the expression and the derived values
+        are evaluated only on the surviving rows and referenced columns.
+
+        Args:
+            plan: Compiled screen (see compile_screen)
+            sort_by: Column or derived name to order the result by
+            ascending: Sort direction
+            top_k: Keep only the first k rows in sort order
+
+        Returns:
+            Tuple of (row positions, derived values aligned with them)
+        """
+        rows = self._filter(plan.ranges, 'exclude')
+
+        env = {column: self.values(column)[rows] for column in plan.columns}
+        derived = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, func in plan.derived:
+                derived[name] = env[name] = np.broadcast_to(func(env), rows.shape).astype(np.float64)
+            if plan.residual is not None:
+                keep = np.broadcast_to(np.asarray(plan.residual(env), dtype=bool), rows.shape)
+                rows = rows[keep]
+                derived = {name: values[keep] for name, values in derived.items()}
+
+        if sort_by is None:
+            order = slice(None, top_k)
+        else:
+            keys = derived[sort_by] if sort_by in derived else self.values(sort_by)[rows]
+            order = _sort_order(keys, ascending, top_k)
+        return rows[order], {name: values[order] for name, values in derived.items()}
+
+    def screen_expression(self, expression: str, **kwargs) -> pd.DataFrame:
+        """
+        Rows passing a screening expression, with its derived values as columns
+
+        Args:
+            expression: Screen text (see compile_screen)
+            **kwargs: sort_by, ascending, top_k (see evaluate)
+
+        Returns:
+            Filtered DataFrame
+        """
+        rows, derived = self.evaluate(compile_screen(expression), **kwargs)
+        result = self.data.iloc[rows]
+        if derived:
+            result = result.assign(**derived)
+        return result
+
+
+# ==================== SCREENING EXPRESSIONS ====================
+
+COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+    ast.Mod: np.mod,
+}
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'log': np.log,
+    'sqrt': np.sqrt,
+    'isnull': np.isnan,
+}
+
+# Comparison with the constant on the left, mirrored
+MIRRORED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE,
+            ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+
+
+class ScreenPlan:
+    """Compiled screening expression"""
+
+    def __init__(self, text: str, ranges: List[Tuple], residual: Optional[Callable],
+                 derived: List[Tuple[str, Callable]], columns: List[str]):
+        """
+        Initialize ScreenPlan
+
+        Args:
+            text: Source expression
+            ranges: (column, low, high, strict_low, strict_high) terms
+                    answered from the sorted indices
+            residual: Vectorized filter for everything else (or None)
+            derived: (name, function) pairs in definition order
+            columns: Snapshot columns the residual and derived values read
+        """
+        self.text = text
+        self.ranges = ranges
+        self.residual = residual
+        self.derived = derived
+        self.columns = columns
+
+
+def _constant(node: ast.AST) -> Optional[float]:
+    """Numeric value of a (possibly negated) literal, else None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant(node.operand)
+        return None if value is None else -value
+    if (isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+            and not isinstance(node.value, bool)):
+        return float(node.value)
+    return None
+
+
+def _range_term(node: ast.AST, derived_names) -> Optional[Tuple]:
+    """(column, low, high, strict_low, strict_high) for ``column <op> constant``"""
+    if not (isinstance(node, ast.Compare) and len(node.ops) == 1):
+        return None
+    left, op, right = node.left, type(node.ops[0]), node.comparators[0]
+    if isinstance(right, ast.Name) and _constant(left) is not None:
+        left, right, op = right, left, MIRRORED[op]
+    value = _constant(right)
+    if not isinstance(left, ast.Name) or left.id in derived_names or value is None:
+        return None
+
+    if op in (ast.Gt, ast.GtE):
+        return (left.id, value, None, op is ast.Gt, False)
+    if op in (ast.Lt, ast.LtE):
+        return (left.id, None, value, False, op is ast.Lt)
+    if op is ast.Eq:
+        return (left.id, value, value, False, False)
+    return None
+
+
+def _compile_node(node: ast.AST, names: set) -> Callable[[Dict[str, np.ndarray]], Any]:
+    """Translate a whitelisted AST node into a vectorized function of the columns"""
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(value, names) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def bool_op(env):
+            result = parts[0](env)
+            for part in parts[1:]:
+                result = combine(result, part(env))
+            return result
+        return bool_op
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.Not):
+            return lambda env: np.logical_not(operand(env))
+        if isinstance(node.op, ast.USub):
+            return lambda env: np.negative(operand(env))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        func = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left, names), _compile_node(node.right, names)
+        return lambda env: func(left(env), right(env))
+
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARISONS for op in node.ops):
+        operands = [_compile_node(node.left, names)] + [
+            _compile_node(comparator, names) for comparator in node.comparators
+        ]
+        funcs = [COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(env):
+            values = [operand(env) for operand in operands]
+            result = funcs[0](values[0], values[1])
+            for i, func in enumerate(funcs[1:], start=1):
+                result = np.logical_and(result, func(values[i], values[i + 1]))
+            return result
+        return compare
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in FUNCTIONS and len(node.args) == 1 and not node.keywords):
+        func, argument = FUNCTIONS[node.func.id], _compile_node(node.args[0], names)
+        return lambda env: func(argument(env))
+
+    if isinstance(node, ast.Name):
+        names.add(node.id)
+        name = node.id
+        return lambda env: env[name]
+
+    if _constant(node) is not None:
+        value = _constant(node)
+        return lambda env: value
+
+    raise ValueError(f"Unsupported syntax in screen: {ast.dump(node)[:80]}")
+
+
+@lru_cache(maxsize=256)
+def compile_screen(text: str) -> ScreenPlan:
+    """
+    Parse and compile a screening expression (cached by text)
+
+    The text holds optional derived definitions followed by one filter
+    expression, separated by newlines or semicolons, e.g.::
+
+        earnings_yield = 1 / pe_ratio
+        earnings_yield > 0.08 and roe > 0.12 and (debt_to_equity < 50 or current_ratio > 2)
+
+    Only arithmetic, comparisons, and/or/not, numeric literals, column
+    names and abs/log/sqrt/isnull are accepted; anything else is rejected
+    before evaluation. NaN values fail every comparison.
+
+    Args:
+        text: Screen source
+
+    Returns:
+        ScreenPlan
+    """
+    try:
+        module = ast.parse(text.strip(), mode='exec')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid screen expression: {e.msg}")
+
+    statements = module.body
+    if not statements or not isinstance(statements[-1], ast.Expr):
+        raise ValueError("A screen must end with a filter expression")
+
+    derived, derived_names, columns = [], set(), set()
+    for statement in statements[:-1]:
+        if not (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name)):
+            raise ValueError("Only 'name = expression' definitions may precede the filter")
+        names = set()
+        derived.append((statement.targets[0].id, _compile_node(statement.value, names)))
+        columns |= names - derived_names
+        derived_names.add(statement.targets[0].id)
+
+    # Top-level 'column <op> constant' conjuncts use the sorted indices
+    expression = statements[-1].value
+    terms = (expression.values if isinstance(expression, ast.BoolOp)
+             and isinstance(expression.op, ast.And) else [expression])
+    ranges, rest = [], []
+    for term in terms:
+        range_term = _range_term(term, derived_names)
+        if range_term is not None:
+            ranges.append(range_term)
+        else:
+            rest.append(term)
+
+    residual = None
+    if rest:
+        names = set()
+        residual = _compile_node(rest[0] if len(rest) == 1 else ast.BoolOp(ast.And(), rest), names)
+        columns |= names - derived_names
+
+    return ScreenPlan(text, ranges, residual, derived, sorted(columns))
@@ -0,0 +1,333 @@
+"""
+Out-of-core training on pooled feature data
+
+train_model needs X and y in memory, which a pooled model over thousands
+of symbols and decades of bars does not fit. The streaming path reads the
+data in blocks instead:
+
+- store_blocks(): fixed-size row ranges of each symbol's memory-mapped
+  feature store matrix
+- parquet_blocks(): the row groups of Parquet feature files
+
+A block is a callable returning one (X, y) pair of float32 arrays.
+iter_batches() visits the blocks in shuffled order, shuffles the rows of
+``buffer_blocks`` blocks at a time and cuts them into batches, so peak
+memory is buffer_blocks x block size however large the dataset is.
+train_streaming() feeds the batches to an incremental scikit-learn model
+('sgd', via partial_fit) or to a Keras network through a prefetching
+tf.data pipeline.
+"""
+
+import itertools
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import keras
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import tensorflow as tf
+from sklearn.preprocessing import StandardScaler
+
+from config.settings import ML_CONFIG
+
+from .feature_store import FEATURE_DTYPE, FeatureStore
+from .model_registry import ModelRegistry, get_registry
+from .models import create_neural_network, create_sklearn_model
+
+Block = Callable[[], Tuple[np.ndarray, np.ndarray]]
+
+
+def _read_store_block(store: FeatureStore, symbol: str, start, end,
+                      first: int, last: int, features: List[int],
+                      target: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows first:last of a symbol's date range; only these rows are read"""
+    rows, _, _ = store.read(symbol, start, end)
+    block = np.asarray(rows[first:last])
+    return block[:, features], block[:, target]
+
+
+def store_blocks(symbols: Sequence[str], store: Optional[FeatureStore] = None,
+                 start=None, end=None, target: Optional[str] = None,
+                 block_rows: Optional[int] = None) -> List[Block]:
+    """
+    Blocks of consecutive rows of every symbol's stored features
+
+    Args:
+        symbols: Symbols with features in the store
+        store: Feature store (default: FeatureStore())
+        start: First date (inclusive)
+        end: Last date (inclusive)
+        target: Target column (default: the store's first target)
+        block_rows: Rows per block (default: ML_CONFIG['streaming'])
+
+    Returns:
+        List of blocks
+    """
+    store = store or FeatureStore()
+    block_rows = block_rows or ML_CONFIG["streaming"]["block_rows"]
+    blocks: List[Block] = []
+
+    for symbol in symbols:
+        names = store.columns(symbol)
+        features = [i for i, name in enumerate(names) if not name.startswith("target_")]
+        target_index = names.index(target) if target else next(
+            i for i, name in enumerate(names) if name.startswith("target_"))
+
+        _, dates, _ = store.read(symbol, start, end)
+        for first in range(0, len(dates), block_rows):
+            blocks.append(partial(_read_store_block, store, symbol, start, end, first,
+                                  min(first + block_rows, len(dates)), features, target_index))
+    return blocks
+
+
+def _read_row_group(path: Path, row_group: int, features: List[str],
+                    target: str) -> Tuple[np.ndarray, np.ndarray]:
+    """One row group of a Parquet file as (X, y)"""
+    table = pq.ParquetFile(path).read_row_group(row_group, columns=features + [target])
+    frame = table.to_pandas()
+    return frame[features].to_numpy(dtype=FEATURE_DTYPE), frame[target].to_numpy(dtype=FEATURE_DTYPE)
+
+
+def parquet_blocks(paths: Sequence[Path], target: str,
+                   features: Optional[List[str]] = None) -> List[Block]:
+    """
+    One block per row group of Parquet feature files
+
+    Args:
+        paths: Parquet files (or directories of them) with one row per bar
+        target: Target column
+        features: Feature columns (default: every numeric column that is
+                  not a target)
+
+    Returns:
+        List of blocks
+    """
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+
+    blocks: List[Block] = []
+    for path in files:
+        parquet = pq.ParquetFile(path)
+        columns = features or [
+            field.name for field in parquet.schema_arrow
+            if field.name != target and not field.name.startswith("target_")
+            and (pa.types.is_floating(field.type) or pa.types.is_integer(field.type))
+        ]
+        blocks += [partial(_read_row_group, path, row_group, columns, target)
+                   for row_group in range(parquet.num_row_groups)]
+    return blocks
+
+
+def feature_scaler(blocks: Sequence[Block]) -> Tuple[StandardScaler, int]:
+    """
+    Feature means and variances in one pass over the blocks
+
+    Only rows with a defined target count; missing features are ignored.
+
+    Returns:
+        Tuple of (fitted StandardScaler, number of rows)
+    """
+    scaler = StandardScaler()
+    rows = 0
+    for block in blocks:
+        X, y = block()
+        X = X[~np.isnan(y)]
+        if len(X):
+            scaler.partial_fit(X)
+            rows += len(X)
+    return scaler, rows
+
+
+def iter_batches(blocks: Sequence[Block], batch_size: int,
+                 buffer_blocks: Optional[int] = None,
+                 fill: Optional[np.ndarray] = None,
+                 shuffle: bool = True,
+                 seed: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Shuffled (X, y) batches with a bounded number of blocks in memory
+
+    Rows with an undefined target are dropped; missing features are
+    replaced by ``fill`` (e.g. the feature means) when given.
+
+    Args:
+        blocks: Blocks to read
+        batch_size: Rows per batch
+        buffer_blocks: Blocks whose rows are shuffled together
+                       (default: ML_CONFIG['streaming'])
+        fill: Per-feature values for NaN features
+        shuffle: Shuffle block order and rows within the buffer
+        seed: Random seed
+
+    Yields:
+        Tuples of (X, y) float32 arrays
+    """
+    buffer_blocks = buffer_blocks or ML_CONFIG["streaming"]["buffer_blocks"]
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(blocks)) if shuffle else np.arange(len(blocks))
+
+    X_rest = y_rest = None
+    for offset in range(0, len(order), buffer_blocks):
+        parts = [blocks[index]() for index in order[offset:offset + buffer_blocks]]
+        X = np.concatenate([part[0] for part in parts]).astype(FEATURE_DTYPE, copy=False)
+        y = np.concatenate([part[1] for part in parts]).astype(FEATURE_DTYPE, copy=False)
+
+        valid = ~np.isnan(y)
+        X, y = X[valid], y[valid]
+        if fill is not None:
+            X = np.where(np.isnan(X), np.asarray(fill, dtype=FEATURE_DTYPE), X)
+        if shuffle:
+            rows = rng.permutation(len(y))
+            X, y = X[rows], y[rows]
+        if X_rest is not None:
+            X, y = np.concatenate([X_rest, X]), np.concatenate([y_rest, y])
+
+        # Rows short of a full batch move on to the next buffer, so every
+        # pass yields the same number of batches whatever the shuffle
+        full = len(y) - len(y) % batch_size
+        for first in range(0, full, batch_size):
+            yield X[first:first + batch_size], y[first:first + batch_size]
+        X_rest, y_rest = X[full:], y[full:]
+
+    if y_rest is not None and len(y_rest):
+        yield X_rest, y_rest
+
+
+def make_dataset(blocks: Sequence[Block], n_features: int, batch_size: int,
+                 buffer_blocks: Optional[int] = None,
+                 fill: Optional[np.ndarray] = None,
+                 shuffle: bool = True,
+                 seed: Optional[int] = None,
+                 rows: Optional[int] = None) -> tf.data.Dataset:
+    """
+    tf.data pipeline over iter_batches, prefetching while the model trains
+
+    Each pass over the dataset (each epoch) draws a new shuffle. Passing the
+    number of rows with a target (see feature_scaler) gives the dataset a
+    known length, so Keras knows the steps per epoch.
+    """
+    seeds = itertools.count(seed or 0)
+    dataset = tf.data.Dataset.from_generator(
+        lambda: iter_batches(blocks, batch_size, buffer_blocks, fill, shuffle, next(seeds)),
+        output_signature=(
+            tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    if rows is not None:
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(-(-rows // batch_size)))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def evaluate_streaming(model: Any, blocks: Sequence[Block],
+                       fill: Optional[np.ndarray] = None,
+                       batch_size: Optional[int] = None) -> Dict[str, float]:
+    """
+    MSE and R^2 of a model over blocks, accumulated batch by batch
+
+    Returns:
+        Dictionary with rows, mse and r2
+    """
+    batch_size = batch_size or ML_CONFIG["streaming"]["batch_size"]
+    rows, squared_error, total, total_squared = 0, 0.0, 0.0, 0.0
+    for X, y in iter_batches(blocks, batch_size, fill=fill, shuffle=False):
+        if isinstance(model, keras.Model):
+            predictions = np.asarray(model.predict_on_batch(X)).reshape(-1)
+        else:
+            predictions = model.predict(X)
+        y = y.astype(np.float64)
+        rows += len(y)
+        squared_error += float(np.sum((predictions - y) ** 2))
+        total += float(y.sum())
+        total_squared += float(np.sum(y ** 2))
+
+    if rows == 0:
+        return {"rows": 0, "mse": np.nan, "r2": np.nan}
+    variance = total_squared - total ** 2 / rows
+    return {
+        "rows": rows,
+        "mse": squared_error / rows,
+        "r2": 1.0 - squared_error / variance if variance > 0 else np.nan,
+    }
+
+
+def train_streaming(blocks: Sequence[Block], model_type: str = "sgd",
+                    epochs: int = 1,
+                    batch_size: Optional[int] = None,
+                    buffer_blocks: Optional[int] = None,
+                    validation_blocks: Optional[Sequence[Block]] = None,
+                    params: Optional[Dict[str, Any]] = None,
+                    register_as: Optional[str] = None,
+                    registry: Optional[ModelRegistry] = None,
+                    seed: Optional[int] = None,
+                    **metadata) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Train a pooled model without loading the dataset into memory
+
+    A first pass computes feature means and variances; missing features
+    are filled with the means. 'sgd' models then take one partial_fit per
+    batch; neural networks standardize inside the model (so registry
+    predictions take raw rows) and fit on a prefetching tf.data pipeline.
+
+    Args:
+        blocks: Training blocks (see store_blocks, parquet_blocks)
+        model_type: 'sgd' or 'neural_network'
+        epochs: Passes over the training blocks
+        batch_size: Rows per batch (default: ML_CONFIG['streaming'] for
+                    'sgd', ML_CONFIG['neural_network'] for networks)
+        buffer_blocks: Blocks shuffled together (default: ML_CONFIG['streaming'])
+        validation_blocks: Held-out blocks (e.g. later dates) scored after training
+        params: Hyperparameters of the model
+        register_as: Register the trained model under this name
+        registry: Registry to register in (default: get_registry())
+        seed: Random seed for shuffling (default: ML_CONFIG['random_state'])
+        **metadata: Saved with the registered model (e.g. features, symbols)
+
+    Returns:
+        Tuple of (model, metrics with training rows, epochs, train_time
+        and validation mse/r2, plus the registered version)
+    """
+    params = dict(params or {})
+    seed = seed if seed is not None else ML_CONFIG["random_state"]
+    if not blocks:
+        raise ValueError("No training blocks")
+
+    start = time.perf_counter()
+    scaler, rows = feature_scaler(blocks)
+    # Features never observed are filled with zeros
+    fill = np.nan_to_num(scaler.mean_).astype(FEATURE_DTYPE)
+
+    if model_type == "neural_network":
+        batch_size = batch_size or params.pop("batch_size", ML_CONFIG["neural_network"]["batch_size"])
+        params.pop("epochs", None)
+        # Standardization lives inside the network, like every registered network
+        model = create_neural_network(len(fill), mean=scaler.mean_, variance=scaler.var_, **params)
+        dataset = make_dataset(blocks, len(fill), batch_size, buffer_blocks, fill, seed=seed, rows=rows)
+        model.fit(dataset, epochs=epochs, verbose=0)
+    elif model_type == "sgd":
+        batch_size = batch_size or ML_CONFIG["streaming"]["batch_size"]
+        model = create_sklearn_model("sgd", **params)
+        for epoch in range(epochs):
+            for X, y in iter_batches(blocks, batch_size, buffer_blocks, fill, seed=seed + epoch):
+                model.partial_fit(X, y)
+    else:
+        raise ValueError(f"Model type {model_type} cannot be trained out of core")
+    train_time = time.perf_counter() - start
+
+    metrics: Dict[str, Any] = {"rows": rows, "epochs": epochs, "train_time": train_time}
+    if validation_blocks:
+        validation = evaluate_streaming(model, validation_blocks, fill, batch_size)
+        metrics.update(validation_rows=validation["rows"], validation_mse=validation["mse"],
+                       validation_r2=validation["r2"])
+
+    metrics["version"] = None
+    if register_as:
+        metrics["version"] = (registry or get_registry()).register(
+            register_as, model,
+            metrics={name: value for name, value in metrics.items() if name != "version"},
+            model_type=model_type, params=params or None, **metadata,
+        )
+    return model, metrics
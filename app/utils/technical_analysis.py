@@ -1,14 +1,53 @@
 """
-Technical analysis utilities using pandas_ta
+Technical analysis utilities
+
+Indicators are computed with the pure-NumPy kernels in indicator_kernels by
+default. pandas_ta is kept as a reference backend (backend='pandas_ta').
 """
 
+import inspect
+import re
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
+
+from . import indicator_kernels as kernels
+from .indicator_cache import IndicatorCache
+from .resampling import AggregateStore, resample_ohlcv, timeframe_rule
+
+try:
+    import pandas_ta as ta
+except ImportError:  # Only needed for the reference backend
+    ta = None
+
+BACKENDS = ('numpy', 'pandas_ta')
+DEFAULT_BACKEND = 'numpy'
+
+# Extra bars (as a multiple of the longest indicator window) recomputed
+# before newly appended bars, so recursive indicators such as EMA and RSI
+# have converged when a cached result is extended
+CACHE_LOOKBACK_FACTOR = 10
+
+
+def _use_pandas_ta(backend: Optional[str]) -> bool:
+    """Validate the backend name and tell whether it is pandas_ta"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Use one of {BACKENDS}")
+    if backend == 'pandas_ta' and ta is None:
+        raise ImportError("pandas_ta is not installed; use backend='numpy'")
+    return backend == 'pandas_ta'
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Get a price column as a contiguous float array"""
+    return np.ascontiguousarray(df[name].to_numpy(dtype=np.float64))
 
 
 def add_moving_averages(data: pd.DataFrame, short_window: int = 20, 
-                        long_window: int = 50) -> pd.DataFrame:
+                        long_window: int = 50,
+                        backend: Optional[str] = None,
+                        timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add moving averages to price data
     
@@ -16,38 +55,60 @@ def add_moving_averages(data: pd.DataFrame, short_window: int = 20,
         data: DataFrame with Close column
         short_window: Short MA period
         long_window: Long MA period
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with MA columns added
     """
-    df = data.copy()
+    df = resample_ohlcv(data, timeframe)
+    
+    if _use_pandas_ta(backend):
+        df['SMA_' + str(short_window)] = ta.sma(df['Close'], length=short_window)
+        df['SMA_' + str(long_window)] = ta.sma(df['Close'], length=long_window)
+        df['EMA_' + str(short_window)] = ta.ema(df['Close'], length=short_window)
+        df['EMA_' + str(long_window)] = ta.ema(df['Close'], length=long_window)
+        return df
     
-    df['SMA_' + str(short_window)] = ta.sma(df['Close'], length=short_window)
-    df['SMA_' + str(long_window)] = ta.sma(df['Close'], length=long_window)
-    df['EMA_' + str(short_window)] = ta.ema(df['Close'], length=short_window)
-    df['EMA_' + str(long_window)] = ta.ema(df['Close'], length=long_window)
+    close = _column(df, 'Close')
+    df['SMA_' + str(short_window)] = kernels.sma(close, short_window)
+    df['SMA_' + str(long_window)] = kernels.sma(close, long_window)
+    df['EMA_' + str(short_window)] = kernels.ema(close, short_window)
+    df['EMA_' + str(long_window)] = kernels.ema(close, long_window)
     
     return df
 
 
-def add_rsi(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def add_rsi(data: pd.DataFrame, period: int = 14,
+            backend: Optional[str] = None,
+            timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add Relative Strength Index
     
     Args:
         data: DataFrame with Close column
         period: RSI period
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with RSI column added
     """
-    df = data.copy()
-    df['RSI_' + str(period)] = ta.rsi(df['Close'], length=period)
+    df = resample_ohlcv(data, timeframe)
+    
+    if _use_pandas_ta(backend):
+        df['RSI_' + str(period)] = ta.rsi(df['Close'], length=period)
+    else:
+        df['RSI_' + str(period)] = kernels.rsi(_column(df, 'Close'), period)
+    
     return df
 
 
 def add_macd(data: pd.DataFrame, fast: int = 12, slow: int = 26, 
-             signal: int = 9) -> pd.DataFrame:
+             signal: int = 9, backend: Optional[str] = None,
+             timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add MACD indicator
     
@@ -56,20 +117,32 @@ def add_macd(data: pd.DataFrame, fast: int = 12, slow: int = 26,
         fast: Fast EMA period
         slow: Slow EMA period
         signal: Signal line period
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with MACD columns added
     """
-    df = data.copy()
+    df = resample_ohlcv(data, timeframe)
+    
+    if _use_pandas_ta(backend):
+        macd_result = ta.macd(df['Close'], fast=fast, slow=slow, signal=signal)
+        return df.join(macd_result)
     
-    macd_result = ta.macd(df['Close'], fast=fast, slow=slow, signal=signal)
-    df = df.join(macd_result)
+    result = kernels.macd(_column(df, 'Close'), fast=fast, slow=slow, signal=signal)
+    props = f'_{min(fast, slow)}_{max(fast, slow)}_{signal}'
+    df['MACD' + props] = result[0]
+    df['MACDh' + props] = result[1]
+    df['MACDs' + props] = result[2]
     
     return df
 
 
 def add_bollinger_bands(data: pd.DataFrame, period: int = 20, 
-                       std_dev: float = 2.0) -> pd.DataFrame:
+                       std_dev: float = 2.0,
+                       backend: Optional[str] = None,
+                       timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add Bollinger Bands
     
@@ -77,35 +150,60 @@ def add_bollinger_bands(data: pd.DataFrame, period: int = 20,
         data: DataFrame with Close column
         period: MA period
         std_dev: Standard deviation multiplier
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with Bollinger Bands columns added
     """
-    df = data.copy()
+    df = resample_ohlcv(data, timeframe)
+    std_dev = float(std_dev)
     
-    bb_result = ta.bbands(df['Close'], length=period, lower_std=std_dev)
-    df = df.join(bb_result)
+    if _use_pandas_ta(backend):
+        bb_result = ta.bbands(df['Close'], length=period, lower_std=std_dev, upper_std=std_dev)
+        return df.join(bb_result)
+    
+    result = kernels.bbands(_column(df, 'Close'), length=period,
+                            lower_std=std_dev, upper_std=std_dev)
+    props = f'_{period}_{std_dev}_{std_dev}'
+    for prefix, values in zip(('BBL', 'BBM', 'BBU', 'BBB', 'BBP'), result):
+        df[prefix + props] = values
     
     return df
 
 
-def add_atr(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def add_atr(data: pd.DataFrame, period: int = 14,
+            backend: Optional[str] = None,
+            timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add Average True Range
     
     Args:
         data: DataFrame with High, Low, Close columns
         period: ATR period
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with ATR column added
     """
-    df = data.copy()
-    
-    df['ATR_' + str(period)] = ta.atr(
-        df['High'], 
-        df['Low'], 
-        df['Close'], 
+    df = resample_ohlcv(data, timeframe)
+    
+    if _use_pandas_ta(backend):
+        df['ATR_' + str(period)] = ta.atr(
+            df['High'], 
+            df['Low'], 
+            df['Close'], 
+            length=period
+        )
+        return df
+    
+    df['ATR_' + str(period)] = kernels.atr(
+        _column(df, 'High'),
+        _column(df, 'Low'),
+        _column(df, 'Close'),
         length=period
     )
     
@@ -113,7 +211,9 @@ def add_atr(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
 
 
 def add_stochastic(data: pd.DataFrame, k_period: int = 14, 
-                   d_period: int = 3) -> pd.DataFrame:
+                   d_period: int = 3,
+                   backend: Optional[str] = None,
+                   timeframe: Optional[str] = None) -> pd.DataFrame:
     """
     Add Stochastic Oscillator
     
@@ -121,24 +221,168 @@ def add_stochastic(data: pd.DataFrame, k_period: int = 14,
         data: DataFrame with High, Low, Close columns
         k_period: K period
         d_period: D period (signal line)
+        backend: 'numpy' (default) or 'pandas_ta'
+        timeframe: Resample to this timeframe first, e.g. 'weekly'
+                   (default: use the bars as given)
     
     Returns:
         DataFrame with Stochastic columns added
     """
-    df = data.copy()
-    
-    stoch_result = ta.stoch(
-        df['High'],
-        df['Low'],
-        df['Close'],
+    df = resample_ohlcv(data, timeframe)
+    
+    if _use_pandas_ta(backend):
+        stoch_result = ta.stoch(
+            df['High'],
+            df['Low'],
+            df['Close'],
+            k=k_period,
+            d=d_period
+        )
+        return df.join(stoch_result)
+    
+    smooth_k = 3
+    result = kernels.stoch(
+        _column(df, 'High'),
+        _column(df, 'Low'),
+        _column(df, 'Close'),
         k=k_period,
-        d=d_period
+        d=d_period,
+        smooth_k=smooth_k
     )
-    df = df.join(stoch_result)
+    props = f'_{k_period}_{d_period}_{smooth_k}'
+    df['STOCHk' + props] = result[0]
+    df['STOCHd' + props] = result[1]
+    df['STOCHh' + props] = result[2]
+    
+    return df
+
+
+SWEEP_KERNELS = {
+    'sma': kernels.sma_sweep,
+    'ema': kernels.ema_sweep,
+    'rsi': kernels.rsi_sweep,
+}
+
+
+def sweep_indicator(data: pd.DataFrame, indicator: str, lengths: List[int],
+                    as_frame: bool = True):
+    """
+    Compute one indicator for a whole range of window lengths in one pass
+    
+    SMA uses a single cumulative sum for all lengths; EMA and RSI run all
+    lengths through one batched recursion. Values match the add_*
+    functions for each individual length.
+    
+    Args:
+        data: DataFrame with Close column
+        indicator: 'sma', 'ema' or 'rsi'
+        lengths: Window lengths to evaluate
+        as_frame: Return a DataFrame with (indicator, length) MultiIndex
+                  columns instead of a 2-D array
+    
+    Returns:
+        DataFrame aligned with ``data`` or (rows, lengths) NumPy array
+    """
+    if indicator not in SWEEP_KERNELS:
+        raise ValueError(f"Unknown sweep indicator: {indicator}. Use one of {list(SWEEP_KERNELS)}")
+    
+    values = SWEEP_KERNELS[indicator](_column(data, 'Close'), lengths)
+    if not as_frame:
+        return values
+    
+    columns = pd.MultiIndex.from_product(
+        [[indicator.upper()], [int(length) for length in lengths]],
+        names=['indicator', 'length']
+    )
+    return pd.DataFrame(values, index=data.index, columns=columns)
+
+
+INDICATOR_FUNCTIONS = {
+    'add_moving_averages': add_moving_averages,
+    'add_rsi': add_rsi,
+    'add_macd': add_macd,
+    'add_bollinger_bands': add_bollinger_bands,
+    'add_atr': add_atr,
+    'add_stochastic': add_stochastic,
+}
+
+
+def calculate_indicators(data: pd.DataFrame, spec: Dict[str, Dict[str, Any]],
+                         timeframe: Optional[str] = None) -> pd.DataFrame:
+    """
+    Apply a set of indicator functions to price data
+    
+    Args:
+        data: DataFrame with OHLC data
+        spec: Mapping of indicator function name to its keyword arguments,
+              e.g. {'add_rsi': {'period': 14}, 'add_macd': {}}
+        timeframe: Resample to this timeframe once before applying the
+                   indicators (default: use the bars as given)
     
+    Returns:
+        DataFrame with all requested indicator columns added
+    """
+    df = data if timeframe_rule(timeframe) is None else resample_ohlcv(data, timeframe)
+    for name, params in spec.items():
+        if name not in INDICATOR_FUNCTIONS:
+            raise ValueError(f"Unknown indicator: {name}")
+        df = INDICATOR_FUNCTIONS[name](df, **params)
     return df
 
 
+def get_cached_indicators(symbol: str, data: pd.DataFrame,
+                          spec: Dict[str, Dict[str, Any]],
+                          cache: Optional[IndicatorCache] = None,
+                          timeframe: Optional[str] = None,
+                          aggregates: Optional[AggregateStore] = None) -> pd.DataFrame:
+    """
+    Calculate indicators through the persistent indicator cache
+    
+    Unchanged price data is served from the cached Parquet file; when only
+    new bars were appended, just the tail is computed and appended. For a
+    coarser timeframe the bars come from the materialized aggregates, so
+    the daily history is not resampled on every request.
+    
+    Args:
+        symbol: Stock ticker symbol
+        data: DataFrame with daily OHLC data
+        spec: Indicator spec (see calculate_indicators)
+        cache: IndicatorCache instance (default: cache in INDICATOR_CACHE_DIR)
+        timeframe: Timeframe of the indicators, e.g. 'weekly' (default: daily)
+        aggregates: AggregateStore instance (default: store in AGGREGATES_DIR)
+    
+    Returns:
+        DataFrame with all requested indicator columns added
+    """
+    cache = cache or IndicatorCache()
+    cache_spec = spec
+    if timeframe_rule(timeframe) is not None:
+        data = (aggregates or AggregateStore()).get(symbol, data, timeframe)
+        cache_spec = {'timeframe': timeframe, **spec}
+    
+    # Longest window in the spec, counting each function's default periods
+    windows = []
+    for name, params in spec.items():
+        defaults = {
+            key: param.default
+            for key, param in inspect.signature(INDICATOR_FUNCTIONS[name]).parameters.items()
+            if param.default is not inspect.Parameter.empty
+        }
+        windows.extend(
+            value for value in {**defaults, **params}.values()
+            if isinstance(value, int) and not isinstance(value, bool)
+        )
+    lookback = CACHE_LOOKBACK_FACTOR * max(windows, default=1)
+    
+    return cache.get_or_compute(
+        symbol,
+        data,
+        cache_spec,
+        lambda df: calculate_indicators(df, spec),
+        lookback=lookback,
+    )
+
+
 # def calculate_all_indicators(data: pl.DataFrame) -> pl.DataFrame:
 #     """
 #     Calculate all common technical indicators
@@ -175,53 +419,135 @@ def add_stochastic(data: pd.DataFrame, k_period: int = 14,
 #     return pl.from_pandas(df) if isinstance(data, pl.DataFrame) else df
 
 
+RSI_SIGNALS = pd.CategoricalDtype(['Oversold', 'Neutral', 'Overbought'], ordered=True)
+EMA_SIGNALS = pd.CategoricalDtype(['Bearish', 'Bullish'], ordered=True)
+BB_SIGNALS = pd.CategoricalDtype(['Below Lower Band', 'Within Bands', 'Above Upper Band'],
+                                 ordered=True)
+
+
+def _indicator_columns(columns) -> Dict[str, Optional[str]]:
+    """
+    Find the columns the signal rules read, whatever their periods
+    
+    Returns:
+        Dictionary with 'rsi', 'ema_fast', 'ema_slow', 'bb_lower' and
+        'bb_upper' column names (None if not present)
+    """
+    columns = [str(col) for col in columns]
+    
+    rsi_cols = [c for c in columns if re.fullmatch(r'RSI_\d+', c)]
+    ema_cols = sorted(
+        (c for c in columns if re.fullmatch(r'EMA_\d+', c)),
+        key=lambda c: int(c.split('_')[1])
+    )
+    lower_cols = [c for c in columns if c.startswith('BBL_')]
+    upper_cols = [c for c in columns if c.startswith('BBU_')]
+    
+    return {
+        'rsi': 'RSI_14' if 'RSI_14' in rsi_cols else (rsi_cols[0] if rsi_cols else None),
+        'ema_fast': ema_cols[0] if len(ema_cols) >= 2 else None,
+        'ema_slow': ema_cols[-1] if len(ema_cols) >= 2 else None,
+        'bb_lower': lower_cols[0] if lower_cols else None,
+        'bb_upper': upper_cols[0] if upper_cols else None,
+    }
+
+
+def scan_signals(latest: pd.DataFrame, rsi_overbought: float = 70.0,
+                 rsi_oversold: float = 30.0) -> pd.DataFrame:
+    """
+    Evaluate the RSI, EMA crossover and Bollinger Band rules for many symbols
+    
+    Args:
+        latest: Latest indicator values, one row per symbol, with a Close
+                column and any of the RSI_n, EMA_n and BBL_/BBU_ columns
+                produced by the add_* functions
+        rsi_overbought: RSI level above which a symbol is overbought
+        rsi_oversold: RSI level below which a symbol is oversold
+    
+    Returns:
+        DataFrame indexed like ``latest`` with float value columns and
+        ordered categorical signal columns (rsi_signal, ema_signal,
+        bb_signal); signals are NaN where the inputs are missing
+    """
+    cols = _indicator_columns(latest.columns)
+    
+    def values(name: Optional[str]) -> np.ndarray:
+        if name is None or name not in latest.columns:
+            return np.full(len(latest), np.nan)
+        return latest[name].to_numpy(dtype=np.float64)
+    
+    close = values('Close')
+    rsi = values(cols['rsi'])
+    ema_fast = values(cols['ema_fast'])
+    ema_slow = values(cols['ema_slow'])
+    bb_lower = values(cols['bb_lower'])
+    bb_upper = values(cols['bb_upper'])
+    
+    rsi_codes = np.select(
+        [np.isnan(rsi), rsi > rsi_overbought, rsi < rsi_oversold], [-1, 2, 0], default=1
+    )
+    ema_codes = np.select(
+        [np.isnan(ema_fast) | np.isnan(ema_slow), ema_fast > ema_slow], [-1, 1], default=0
+    )
+    bb_codes = np.select(
+        [np.isnan(close) | (np.isnan(bb_lower) & np.isnan(bb_upper)),
+         close > bb_upper, close < bb_lower],
+        [-1, 2, 0],
+        default=1
+    )
+    
+    return pd.DataFrame({
+        'close': close,
+        'rsi': rsi,
+        'rsi_signal': pd.Categorical.from_codes(rsi_codes, dtype=RSI_SIGNALS),
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'ema_signal': pd.Categorical.from_codes(ema_codes, dtype=EMA_SIGNALS),
+        'bb_lower': bb_lower,
+        'bb_upper': bb_upper,
+        'bb_signal': pd.Categorical.from_codes(bb_codes, dtype=BB_SIGNALS),
+    }, index=latest.index)
+
+
 def get_signal_summary(data: pd.DataFrame) -> Dict[str, str]:
     """
     Generate trading signal summary from technical indicators
     
+    Every signal is read from the same bar: the last row on which Close
+    and all indicator columns are valid (columns without any value are
+    ignored), so a stale reading is never mixed with today's.
+    
     Args:
         data: DataFrame with calculated indicators
     
     Returns:
-        Dictionary with signal interpretations
+        Dictionary with signal interpretations and the 'Date' of the bar
+        they were read from
     """
-    df = data.dropna()
+    if len(data) == 0:
+        return {}
+    
+    cols = _indicator_columns(data.columns)
+    needed = [c for c in ['Close'] + [c for c in cols.values() if c is not None]
+              if c in data.columns and data[c].notna().any()]
+    if 'Close' not in needed:
+        return {}
     
-    if len(df) == 0:
+    complete = data[needed].notna().all(axis=1).to_numpy()
+    if not complete.any():
         return {}
+    position = len(data) - 1 - int(complete[::-1].argmax())
     
-    latest = df.iloc[-1]
+    row = scan_signals(data[needed].iloc[[position]]).iloc[0]
     signals = {}
     
-    # RSI signal
-    if 'RSI_14' in df.columns:
-        rsi = latest['RSI_14']
-        if rsi > 70:
-            signals['RSI'] = 'Overbought'
-        elif rsi < 30:
-            signals['RSI'] = 'Oversold'
-        else:
-            signals['RSI'] = 'Neutral'
-    
-    # Moving average crossover
-    if 'EMA_12' in df.columns and 'EMA_26' in df.columns:
-        if latest['EMA_12'] > latest['EMA_26']:
-            signals['EMA'] = 'Bullish'
-        else:
-            signals['EMA'] = 'Bearish'
-    
-    # Bollinger Bands
-    bb_cols = [col for col in df.columns if col.startswith('BB')]
-    if bb_cols:
-        close = latest['Close']
-        upper_col = [c for c in bb_cols if 'U' in c]
-        lower_col = [c for c in bb_cols if 'L' in c]
-        
-        if upper_col and close > latest[upper_col[0]]:
-            signals['BB'] = 'Above Upper Band'
-        elif lower_col and close < latest[lower_col[0]]:
-            signals['BB'] = 'Below Lower Band'
-        else:
-            signals['BB'] = 'Within Bands'
+    if cols['rsi'] is not None and pd.notna(row['rsi_signal']):
+        signals['RSI'] = row['rsi_signal']
+    if cols['ema_fast'] is not None and pd.notna(row['ema_signal']):
+        signals['EMA'] = row['ema_signal']
+    if (cols['bb_lower'] or cols['bb_upper']) and pd.notna(row['bb_signal']):
+        signals['BB'] = row['bb_signal']
     
+    date = data['Date'].iloc[position] if 'Date' in data.columns else data.index[position]
+    signals['Date'] = str(date)
     return signals
@@ -0,0 +1,313 @@
+"""
+Background training jobs
+
+train_model blocks its caller for as long as the fit takes, minutes for a
+neural network, which would freeze a Shiny worker. TrainingJobs runs every
+job in its own process (spawned, not forked: the parent already holds
+TensorFlow and threads). The job streams fold and epoch progress back
+through a queue, registers the finished model in the model registry and
+can be cancelled. Job processes are not daemonic, so train_model can still
+run its walk-forward folds in loky workers; shutdown() stops them when the
+app exits.
+
+The parent never blocks: poll() drains the queue into per-job status
+dictionaries, which the UI reads on a timer.
+"""
+
+import atexit
+import multiprocessing as mp
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import APP_DIR, ML_CONFIG
+
+from .model_registry import ModelRegistry, get_registry
+from .models import train_model
+from .online import make_reference
+from .training_process import run_job
+
+FINISHED = ("done", "error", "cancelled")
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a job to stop training once cancellation is requested"""
+
+
+def symbol_training_data(symbol: str, period: str = "10y"):
+    """
+    Feature store training data of a symbol, without missing values
+
+    Features come from the store, which the daily refresh keeps current
+    (feature_store.refresh_feature_store); a symbol not stored yet is built
+    from fresh price data and its companyfacts history first. Columns
+    without any value (e.g. fundamentals of a company with no known CIK)
+    are dropped, then rows with a missing feature (indicator warm-up).
+
+    Returns:
+        Tuple of (X, y, feature names, (first date, last date))
+    """
+    from .data_loader import fetch_stock_data
+    from .feature_store import FeatureStore, load_symbol_fundamentals
+
+    store = FeatureStore()
+    if store.metadata(symbol) is None:
+        concepts = store.definition.get("fundamentals")
+        fundamentals = load_symbol_fundamentals([symbol], concepts) if concepts else {}
+        store.build(symbol, fetch_stock_data(symbol, period=period), fundamentals.get(symbol))
+    X, y, dates = store.training_data(symbol)
+    features = [name for name in store.columns(symbol) if not name.startswith("target_")]
+
+    X = np.asarray(X)
+    columns = ~np.isnan(X).all(axis=0)
+    X, features = X[:, columns], [name for name, keep in zip(features, columns) if keep]
+    rows = ~np.isnan(X).any(axis=1)
+    if not rows.any():
+        raise ValueError(f"No complete feature rows for {symbol}")
+    dates = dates[rows]
+    return X[rows], np.asarray(y)[rows], features, (dates[0], dates[-1])
+
+
+def _run_job(job_id: str, messages, cancel, registry_dir: str, name: str,
+             model_type: str, data: Dict[str, Any], train_kwargs: Dict[str, Any]) -> None:
+    """Job process: prepare data, train with progress, register the model"""
+    def send(kind: str, **fields):
+        messages.put({"job": job_id, "type": kind, "time": time.time(), **fields})
+
+    def progress(event: Dict[str, Any]):
+        if cancel.is_set():
+            raise TrainingCancelled()
+        send("progress", **event)
+
+    try:
+        send("started")
+        if "symbol" in data:
+            send("progress", stage="data", step=0, total=None, metrics={})
+            X, y, features, training_window = symbol_training_data(data["symbol"])
+        else:
+            X, y = data["X"], data["y"]
+            features, training_window = data.get("features"), data.get("training_window")
+
+        train_kwargs.setdefault("verbose", 0)
+        model, metrics = train_model(X, y, model_type, progress=progress, **train_kwargs)
+        if cancel.is_set():
+            raise TrainingCancelled()
+
+        version = ModelRegistry(registry_dir).register(
+            name, model, features=features, metrics=metrics, training_window=training_window,
+            model_type=model_type, params=train_kwargs.get("params"), symbol=data.get("symbol"),
+            reference=make_reference(X, metrics.get("test_mse", metrics.get("test_loss"))),
+        )
+        send("done", version=version,
+             metrics={key: value for key, value in metrics.items() if isinstance(value, (int, float))})
+    except TrainingCancelled:
+        send("cancelled")
+    except Exception as e:
+        send("error", error=f"{type(e).__name__}: {e}")
+
+
+class TrainingJobs:
+    """Runs train_model in background processes and tracks their progress"""
+
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 cancel_grace: Optional[float] = None):
+        """
+        Initialize TrainingJobs
+
+        Args:
+            registry: Registry finished models are saved in (default: get_registry())
+            cancel_grace: Seconds a cancelled job gets to stop at its next
+                          fold or epoch before its process is terminated
+                          (default: ML_CONFIG['training_jobs'])
+        """
+        self.registry = registry if registry is not None else get_registry()
+        self.cancel_grace = cancel_grace if cancel_grace is not None else ML_CONFIG["training_jobs"]["cancel_grace"]
+        self._context = mp.get_context("spawn")
+        self._messages = self._context.Queue()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._processes: Dict[str, Any] = {}
+        self._cancel: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, X: Optional[np.ndarray] = None, y: Optional[np.ndarray] = None,
+               symbol: Optional[str] = None, model_type: str = "random_forest",
+               features: Optional[List[str]] = None, training_window=None,
+               **train_kwargs) -> str:
+        """
+        Start training in a new process
+
+        Args:
+            name: Registry name of the trained model
+            X: Feature matrix (or pass symbol)
+            y: Target vector
+            symbol: Train on the symbol's feature store data, prepared in
+                    the job process (see symbol_training_data)
+            model_type: Type of model to train
+            features: Feature names saved with the model (X only)
+            training_window: (first, last) date saved with the model (X only)
+            **train_kwargs: Passed to train_model (validation, params, ...)
+
+        Returns:
+            Job id
+        """
+        if symbol is not None:
+            data: Dict[str, Any] = {"symbol": symbol.upper()}
+        elif X is not None and y is not None:
+            data = {"X": np.asarray(X), "y": np.asarray(y), "features": features,
+                    "training_window": training_window}
+        else:
+            raise ValueError("Pass X and y, or a symbol")
+
+        job_id = uuid.uuid4().hex[:8]
+        cancel = self._context.Event()
+        # Daemonic processes cannot start workers: folds would run one at a time
+        process = self._context.Process(
+            target=run_job, daemon=False, name=f"training-{job_id}",
+            args=(str(APP_DIR), job_id, self._messages, cancel, str(self.registry.base_dir), name,
+                  model_type, data, train_kwargs),
+        )
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "name": name,
+                "model_type": model_type,
+                "symbol": data.get("symbol"),
+                "status": "queued",
+                "stage": None,
+                "step": None,
+                "total": None,
+                "metrics": {},
+                "version": None,
+                "error": None,
+                "submitted_at": datetime.now(),
+                "finished_at": None,
+            }
+            self._processes[job_id] = process
+            self._cancel[job_id] = cancel
+        process.start()
+        return job_id
+
+    def poll(self) -> None:
+        """Apply queued progress messages and reap finished processes (never blocks)"""
+        with self._lock:
+            self._drain()
+            for job_id, process in list(self._processes.items()):
+                job = self._jobs[job_id]
+                if process.is_alive():
+                    deadline = job.get("cancel_deadline")
+                    if deadline is not None and time.time() > deadline:
+                        process.terminate()
+                        process.join()
+                        self._finish(job_id, "cancelled")
+                    continue
+
+                # Messages sent just before exiting are in the queue by now
+                self._drain()
+                if job["status"] not in FINISHED:
+                    self._finish(job_id, "cancelled" if self._cancel[job_id].is_set() else "error",
+                                 error=job["error"] or f"Process exited with code {process.exitcode}")
+                process.join()
+                del self._processes[job_id]
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Current status of a job"""
+        self.poll()
+        with self._lock:
+            return dict(self._jobs[job_id])
+
+    def list_jobs(self, job_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Current status of the given jobs (default: all), oldest first"""
+        self.poll()
+        with self._lock:
+            ids = job_ids if job_ids is not None else list(self._jobs)
+            return [dict(self._jobs[job_id]) for job_id in ids if job_id in self._jobs]
+
+    def cancel(self, job_id: str) -> None:
+        """
+        Ask a job to stop
+
+        The job stops at its next fold or epoch; a job still running
+        cancel_grace seconds later (e.g. inside one long scikit-learn fit)
+        is terminated by the next poll().
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["status"] in FINISHED:
+                return
+            self._cancel[job_id].set()
+            job["status"] = "cancelling"
+            job["cancel_deadline"] = time.time() + self.cancel_grace
+
+    def wait(self, job_id: str, timeout: Optional[float] = None,
+             interval: float = 0.1) -> Dict[str, Any]:
+        """Poll until a job has finished (or timeout seconds passed)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.status(job_id)
+            if job["status"] in FINISHED or (deadline is not None and time.time() > deadline):
+                return job
+            time.sleep(interval)
+
+    def shutdown(self) -> None:
+        """Terminate every running job (registered to run at exit for the shared runner)"""
+        with self._lock:
+            for job_id, process in list(self._processes.items()):
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+                if self._jobs[job_id]["status"] not in FINISHED:
+                    self._finish(job_id, "cancelled")
+                del self._processes[job_id]
+
+    def _drain(self) -> None:
+        """Apply every message waiting in the queue (lock held)"""
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                return
+            job = self._jobs.get(message.pop("job"))
+            if job is None or job["status"] in FINISHED:
+                continue
+
+            kind = message.pop("type")
+            if kind == "started":
+                job["status"] = "cancelling" if job["status"] == "cancelling" else "running"
+            elif kind == "progress":
+                job.update(stage=message["stage"], step=message["step"], total=message["total"],
+                           metrics=message["metrics"])
+            elif kind == "done":
+                job.update(version=message["version"], metrics=message["metrics"])
+                # The job process registered it: the remembered latest version is stale
+                self.registry.refresh(job["name"])
+                self._finish(job["id"], "done")
+            elif kind in ("error", "cancelled"):
+                self._finish(job["id"], kind, error=message.get("error"))
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Record a job's final status (lock held)"""
+        job = self._jobs[job_id]
+        job.update(status=status, finished_at=datetime.now())
+        job.pop("cancel_deadline", None)
+        if error and status == "error":
+            job["error"] = error
+
+
+# Process-wide job runner shared by all sessions
+_JOBS: Optional[TrainingJobs] = None
+_JOBS_LOCK = threading.Lock()
+
+
+def get_training_jobs() -> TrainingJobs:
+    """Shared job runner over the shared registry, created on first use"""
+    global _JOBS
+    with _JOBS_LOCK:
+        if _JOBS is None:
+            _JOBS = TrainingJobs()
+            atexit.register(_JOBS.shutdown)
+        return _JOBS
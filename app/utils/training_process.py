@@ -0,0 +1,19 @@
+"""
+Entry point of background training job processes
+
+A spawned job process imports its target before running it. This module
+imports nothing from the app at module level, so it loads whatever order
+sys.path has; run_job() then puts the app directory first, making
+``config`` resolve to app/config before the job code is imported.
+"""
+
+import sys
+
+
+def run_job(app_dir: str, *args) -> None:
+    """Run a training job (see training_jobs._run_job) in this process"""
+    if sys.path[:1] != [app_dir]:
+        sys.path.insert(0, app_dir)
+    from .training_jobs import _run_job
+
+    _run_job(*args)
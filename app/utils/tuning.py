@@ -0,0 +1,291 @@
+"""
+Hyperparameter search with successive halving and Hyperband
+
+A full grid search fits every configuration on all the data. Successive
+halving fits many sampled configurations on a small budget, keeps the best
+1/eta of them, and repeats with eta times the budget until the survivors run
+on the full budget. Hyperband runs several such brackets, from many
+configurations on a tiny budget to few on the full budget, in case early
+scores are misleading.
+
+The budget is the number of most recent training rows for scikit-learn
+models and the number of epochs for neural networks. Candidates are scored
+on a chronological validation tail (R^2, negative MSE for neural networks),
+and the candidates of each round are fitted in parallel on a joblib process
+pool.
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from config.settings import ML_CONFIG
+
+from .model_registry import ModelRegistry, get_registry
+from .models import _fit
+from .online import make_reference
+from .parallel import resolve_n_jobs
+
+# Default search space per train_model model type
+SEARCH_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    "random_forest": {
+        "n_estimators": [50, 100, 200, 400],
+        "max_depth": [4, 6, 10, 16, None],
+        "min_samples_leaf": [1, 2, 5, 10],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "gradient_boosting": {
+        "n_estimators": [50, 100, 200, 400],
+        "max_depth": [2, 3, 5, 7],
+        "learning_rate": [0.01, 0.03, 0.1, 0.3],
+        "subsample": [0.6, 0.8, 1.0],
+    },
+    "sgd": {
+        "alpha": [0.00001, 0.0001, 0.001, 0.01],
+        "eta0": [0.001, 0.01, 0.1],
+    },
+    "neural_network": {
+        "dropout_rate": [0.0, 0.1, 0.2, 0.3],
+        "learning_rate": [0.0003, 0.001, 0.003],
+        "batch_size": [16, 32, 64],
+    },
+}
+
+# Smallest row budget worth fitting a tree ensemble on
+MIN_ROWS = 30
+
+
+def sample_candidates(search_space: Dict[str, List[Any]], n_candidates: int,
+                      seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Distinct configurations drawn from a search space
+
+    Args:
+        search_space: Parameter name -> list of values
+        n_candidates: Configurations to draw (at most the grid size)
+        seed: Random seed
+
+    Returns:
+        List of parameter dictionaries
+    """
+    n_candidates = min(n_candidates, len(ParameterGrid(search_space)))
+    return list(ParameterSampler(search_space, n_iter=n_candidates, random_state=seed))
+
+
+def _budgets(min_budget: int, max_budget: int, eta: int) -> List[int]:
+    """Budgets of successive rounds, growing by eta and ending at max_budget"""
+    rounds = int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9)) if max_budget > min_budget else 0
+    return [max(1, int(round(max_budget / eta ** (rounds - i)))) for i in range(rounds + 1)]
+
+
+def _evaluate(candidate: int, params: Dict[str, Any], budget: int, model_type: str,
+              X_train: np.ndarray, y_train: np.ndarray,
+              X_val: np.ndarray, y_val: np.ndarray) -> Dict[str, Any]:
+    """Fit one configuration on a budget and score it on the validation tail"""
+    start = time.perf_counter()
+    if model_type == "neural_network":
+        model = _fit(X_train, y_train, model_type, verbose=0, params={**params, "epochs": budget})
+        score = -float(model.evaluate(X_val, y_val, verbose=0)[0]) # type: ignore
+        mse = -score
+    else:
+        # The most recent rows: the part of the history closest to validation
+        model = _fit(X_train[-budget:], y_train[-budget:], model_type, n_jobs=1,
+                     verbose=0, params=params)
+        score = float(model.score(X_val, y_val))
+        mse = float(np.mean((model.predict(X_val) - y_val) ** 2))
+    return {
+        "candidate": candidate,
+        "budget": budget,
+        "score": score if np.isfinite(score) else -np.inf,
+        "mse": mse,
+        "fit_time": time.perf_counter() - start,
+    }
+
+
+def successive_halving(candidates: List[Dict[str, Any]], model_type: str,
+                       X_train: np.ndarray, y_train: np.ndarray,
+                       X_val: np.ndarray, y_val: np.ndarray,
+                       min_budget: int, max_budget: int, eta: int = 3,
+                       n_jobs: Optional[int] = None,
+                       bracket: int = 0, first_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    Run one successive halving bracket
+
+    Args:
+        candidates: Parameter dictionaries
+        model_type: Type of model to tune
+        X_train, y_train: Training rows, oldest first
+        X_val, y_val: Validation rows following the training rows
+        min_budget: Budget of the first round
+        max_budget: Budget of the last round
+        eta: Keep the best 1/eta of the candidates per round
+        n_jobs: Worker processes (default: PARALLEL_CONFIG, all cores)
+        bracket: Bracket number recorded in the history
+        first_id: Candidate number of candidates[0] in the history
+
+    Returns:
+        History: one record per fit with bracket, round, candidate, params,
+        budget, score, validation mse and fit_time
+    """
+    # Keras already uses every core per fit
+    n_jobs = 1 if model_type == "neural_network" else resolve_n_jobs(n_jobs)
+    alive = list(range(len(candidates)))
+    history: List[Dict[str, Any]] = []
+
+    for round_, budget in enumerate(_budgets(min_budget, max_budget, eta)):
+        results = Parallel(n_jobs=min(n_jobs, len(alive)))(
+            delayed(_evaluate)(index, candidates[index], budget, model_type,
+                               X_train, y_train, X_val, y_val)
+            for index in alive
+        )
+        for result in results:
+            history.append({
+                "bracket": bracket,
+                "round": round_,
+                **result,
+                "candidate": first_id + result["candidate"],
+                "params": candidates[result["candidate"]],
+            })
+
+        ranked = sorted(results, key=lambda result: result["score"], reverse=True)
+        alive = [result["candidate"] for result in ranked[:max(1, len(ranked) // eta)]]
+
+    return history
+
+
+def hyperband(search_space: Dict[str, List[Any]], model_type: str,
+              X_train: np.ndarray, y_train: np.ndarray,
+              X_val: np.ndarray, y_val: np.ndarray,
+              min_budget: int, max_budget: int, eta: int = 3,
+              n_jobs: Optional[int] = None,
+              seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Hyperband: successive halving brackets trading candidates for budget
+
+    The most aggressive bracket starts many candidates at min_budget, the
+    last one fits a few candidates on max_budget only.
+
+    Returns:
+        History of every bracket (see successive_halving)
+    """
+    s_max = len(_budgets(min_budget, max_budget, eta)) - 1
+    rng = np.random.RandomState(seed)
+    history: List[Dict[str, Any]] = []
+
+    for bracket, s in enumerate(range(s_max, -1, -1)):
+        n_candidates = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        candidates = sample_candidates(search_space, n_candidates, seed=rng.randint(2 ** 31 - 1))
+        history += successive_halving(
+            candidates, model_type, X_train, y_train, X_val, y_val,
+            min_budget=max(min_budget, int(round(max_budget / eta ** s))), max_budget=max_budget,
+            eta=eta, n_jobs=n_jobs, bracket=bracket,
+            first_id=1 + max([record["candidate"] for record in history], default=-1),
+        )
+    return history
+
+
+def tune_model(X: np.ndarray, y: np.ndarray, model_type: str = "random_forest",
+               method: str = "successive_halving",
+               search_space: Optional[Dict[str, List[Any]]] = None,
+               n_candidates: Optional[int] = None,
+               eta: Optional[int] = None,
+               min_budget: Optional[int] = None,
+               validation_size: float = 0.2,
+               n_jobs: Optional[int] = None,
+               register_as: Optional[str] = None,
+               features: Optional[List[str]] = None,
+               training_window: Optional[Tuple[Any, Any]] = None,
+               registry: Optional[ModelRegistry] = None,
+               seed: Optional[int] = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Search hyperparameters for a train_model model type
+
+    Args:
+        X: Feature matrix, rows in time order
+        y: Target vector
+        model_type: 'random_forest', 'gradient_boosting' or 'neural_network'
+        method: 'successive_halving' or 'hyperband'
+        search_space: Parameter name -> values (default: SEARCH_SPACES)
+        n_candidates: Configurations sampled for successive halving
+                      (default: ML_CONFIG['tuning']); Hyperband sizes its
+                      brackets from the budgets
+        eta: Fraction of candidates kept per round is 1/eta
+             (default: ML_CONFIG['tuning'])
+        min_budget: First-round training rows, or epochs for neural networks
+                    (default: the full budget / eta**3)
+        validation_size: Fraction of rows, at the end, used for scoring
+        n_jobs: Worker processes (default: PARALLEL_CONFIG, all cores)
+        register_as: Register the tuned model under this name
+        features: Feature names saved with the registered model
+        training_window: (first, last) date saved with the registered model
+        registry: Registry to register in (default: get_registry())
+        seed: Random seed for candidate sampling
+                      (default: ML_CONFIG['random_state'])
+
+    Returns:
+        Tuple of (model refitted on all rows with the best parameters,
+        results with best_params, best_score, history, n_fits, search_time
+        and the registered version or None)
+    """
+    settings = ML_CONFIG["tuning"]
+    search_space = search_space or SEARCH_SPACES[model_type]
+    eta = eta or settings["eta"]
+    seed = seed if seed is not None else ML_CONFIG["random_state"]
+
+    X, y = np.asarray(X), np.asarray(y)
+    split = len(X) - max(1, int(round(len(X) * validation_size)))
+    X_train, X_val, y_train, y_val = X[:split], X[split:], y[:split], y[split:]
+
+    if model_type == "neural_network":
+        max_budget = ML_CONFIG["neural_network"]["epochs"]
+        smallest = 1
+    else:
+        max_budget = len(X_train)
+        smallest = min(MIN_ROWS, max_budget)
+    min_budget = max(smallest, min(min_budget or max_budget // eta ** 3, max_budget))
+
+    start = time.perf_counter()
+    if method == "successive_halving":
+        candidates = sample_candidates(search_space, n_candidates or settings["n_candidates"], seed)
+        history = successive_halving(candidates, model_type, X_train, y_train, X_val, y_val,
+                                     min_budget, max_budget, eta, n_jobs)
+    elif method == "hyperband":
+        history = hyperband(search_space, model_type, X_train, y_train, X_val, y_val,
+                            min_budget, max_budget, eta, n_jobs, seed)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    search_time = time.perf_counter() - start
+
+    # Only full-budget scores are comparable across brackets
+    best = max((record for record in history if record["budget"] == max_budget),
+               key=lambda record: record["score"])
+    best_params = dict(best["params"])
+    if model_type == "neural_network":
+        best_params["epochs"] = max_budget
+
+    model = _fit(X, y, model_type, n_jobs=resolve_n_jobs(n_jobs), verbose=0, params=best_params)
+
+    results = {
+        "method": method,
+        "best_params": best_params,
+        "best_score": best["score"],
+        "history": history,
+        "n_fits": len(history),
+        "search_time": search_time,
+        "version": None,
+    }
+    if register_as:
+        results["version"] = (registry or get_registry()).register(
+            register_as, model, features=features,
+            metrics={"validation_score": best["score"]},
+            training_window=training_window,
+            model_type=model_type, params=best_params,
+            reference=make_reference(X_train, best["mse"]),
+            tuning={"method": method, "eta": eta, "n_fits": len(history),
+                    "search_time": search_time},
+        )
+    return model, results
@@ -0,0 +1,283 @@
+"""
+Vectorized valuation models and scenario grids
+
+The models behind analyze_fundamentals' valuations, written for arrays so
+that many symbols and many scenarios are valued in one broadcast:
+
+- ten_year_cap_price: price in ten years, future EPS x future P/E
+- fair_market_value: ten-year price discounted at the desired return
+- price_to_buy: fair value less the margin of safety
+- payback_years: years of growing, discounted free cash flow per share
+  needed to pay back the current price
+
+Future P/E is twice the growth rate in percent, capped at the current P/E
+when that is known. Inputs that make a model meaningless (non-positive
+EPS or free cash flow) give NaN.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+VALUATION_YEARS = 10
+
+# Model inputs and the yfinance ticker.info fields they come from
+INPUT_FIELDS = {
+    "price": ("currentPrice", "regularMarketPrice"),
+    "eps": ("trailingEps",),
+    "pe_ratio": ("trailingPE",),
+    "growth_rate": ("earningsGrowth", "revenueGrowth"),
+}
+
+SCENARIO_LEVELS = ["discount_rate", "growth_rate", "margin_of_safety"]
+
+
+def valuation_inputs(info: pd.DataFrame) -> pd.DataFrame:
+    """
+    Model inputs from a frame of ticker.info snapshots
+
+    Args:
+        info: One row per symbol with yfinance info fields
+
+    Returns:
+        DataFrame with price, eps, pe_ratio, growth_rate and fcf_per_share
+    """
+    def field(name):
+        if name in info.columns:
+            return pd.to_numeric(info[name], errors="coerce").astype(float)
+        return pd.Series(np.nan, index=info.index)
+
+    inputs = pd.DataFrame(index=info.index)
+    for name, fields in INPUT_FIELDS.items():
+        column = field(fields[0])
+        for fallback in fields[1:]:
+            column = column.fillna(field(fallback))
+        inputs[name] = column
+
+    inputs["fcf_per_share"] = field("freeCashflow") / field("sharesOutstanding")
+    return inputs
+
+
+def future_pe(growth_rate, pe_ratio=np.nan):
+    """Future P/E: 2 x growth in percent, capped at the current P/E if known"""
+    rule = 2.0 * 100.0 * np.asarray(growth_rate, dtype=float)
+    pe_ratio = np.asarray(pe_ratio, dtype=float)
+    capped = np.where(np.isfinite(pe_ratio) & (pe_ratio > 0), np.minimum(rule, pe_ratio), rule)
+    return np.where(capped > 0, capped, np.nan)
+
+
+def ten_year_cap_price(eps, growth_rate, pe_ratio=np.nan, years: int = VALUATION_YEARS):
+    """Price in ``years`` years: EPS grown at growth_rate times the future P/E"""
+    eps = np.asarray(eps, dtype=float)
+    growth_rate = np.asarray(growth_rate, dtype=float)
+    price = np.where(eps > 0, eps, np.nan) * (1.0 + growth_rate) ** years
+    return price * future_pe(growth_rate, pe_ratio)
+
+
+def fair_market_value(eps, growth_rate, discount_rate, pe_ratio=np.nan,
+                      years: int = VALUATION_YEARS):
+    """Ten-year price discounted back at the desired annual return"""
+    discount_rate = np.asarray(discount_rate, dtype=float)
+    return ten_year_cap_price(eps, growth_rate, pe_ratio, years) / (1.0 + discount_rate) ** years
+
+
+def price_to_buy(fair_value, margin_of_safety):
+    """Fair value less the margin of safety (0.5 buys at half the fair value)"""
+    return np.asarray(fair_value, dtype=float) * (1.0 - np.asarray(margin_of_safety, dtype=float))
+
+
+def payback_years(price, fcf_per_share, growth_rate, discount_rate):
+    """
+    Years until discounted, growing free cash flow per share repays the price
+
+    Solves sum_{t=1..n} fcf * q**t = price with q = (1 + g) / (1 + r).
+    NaN if free cash flow is not positive, inf if it never pays back.
+    """
+    price = np.asarray(price, dtype=float)
+    fcf = np.asarray(fcf_per_share, dtype=float)
+    fcf = np.where(fcf > 0, fcf, np.nan)
+    q = (1.0 + np.asarray(growth_rate, dtype=float)) / (1.0 + np.asarray(discount_rate, dtype=float))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flat = np.isclose(q, 1.0)
+        q_safe = np.where(flat, 2.0, q)
+        ratio = 1.0 + price * (q_safe - 1.0) / (fcf * q_safe)
+        years = np.where(ratio > 0, np.log(ratio) / np.log(q_safe), np.inf)
+        years = np.where(flat, price / fcf, years)
+    return np.where(np.isnan(fcf) | np.isnan(price), np.nan, years)
+
+
+def _axis(values, position: int, ndim: int = 4) -> np.ndarray:
+    """1-D values shaped to broadcast along one axis of the grid"""
+    shape = [1] * ndim
+    values = np.asarray(values, dtype=float)
+    shape[position] = len(values)
+    return values.reshape(shape)
+
+
+def valuation_grid(inputs: pd.DataFrame,
+                   discount_rates: Sequence[float] = (0.15,),
+                   growth_rates: Optional[Sequence[float]] = None,
+                   margins_of_safety: Sequence[float] = (0.5,),
+                   years: int = VALUATION_YEARS,
+                   as_frame: bool = True) -> Dict[str, object]:
+    """
+    Value many symbols under a grid of scenarios in one broadcast
+
+    Arrays are laid out (symbol, discount rate, growth rate, margin of
+    safety); each model only broadcasts over the axes it depends on.
+
+    Args:
+        inputs: Model inputs, one row per symbol (see valuation_inputs)
+        discount_rates: Desired annual returns / discount rates
+        growth_rates: Annual growth rates; None uses each symbol's own
+                      growth_rate input (one scenario labelled NaN)
+        margins_of_safety: Fractions taken off fair value for the buy price
+        years: Projection horizon
+        as_frame: Return DataFrames (symbols x scenario MultiIndex columns)
+                  instead of (symbols, scenarios) arrays
+
+    Returns:
+        Dictionary with ten_year_cap_price, fair_market_value,
+        price_to_buy and payback_years
+    """
+    symbol = lambda name: inputs[name].to_numpy(dtype=float).reshape(-1, 1, 1, 1)
+    rates = _axis(discount_rates, 1)
+    if growth_rates is None:
+        growth = symbol("growth_rate")
+        growth_labels = [np.nan]
+    else:
+        growth = _axis(growth_rates, 2)
+        growth_labels = list(growth_rates)
+    margins = _axis(margins_of_safety, 3)
+
+    cap_price = ten_year_cap_price(symbol("eps"), growth, symbol("pe_ratio"), years)
+    fair_value = cap_price / (1.0 + rates) ** years
+    buy_price = price_to_buy(fair_value, margins)
+    payback = payback_years(symbol("price"), symbol("fcf_per_share"), growth, rates)
+
+    shape = (len(inputs), len(discount_rates), len(growth_labels), len(margins_of_safety))
+    results = {
+        "ten_year_cap_price": cap_price,
+        "fair_market_value": fair_value,
+        "price_to_buy": buy_price,
+        "payback_years": payback,
+    }
+    results = {name: np.broadcast_to(values, shape).reshape(len(inputs), -1)
+               for name, values in results.items()}
+    if not as_frame:
+        return results
+
+    columns = pd.MultiIndex.from_product(
+        [list(discount_rates), growth_labels, list(margins_of_safety)], names=SCENARIO_LEVELS
+    )
+    return {name: pd.DataFrame(values, index=inputs.index, columns=columns)
+            for name, values in results.items()}
+
+
+# ==================== MONTE CARLO SIMULATION ====================
+
+# Distribution of each simulated input. A growth_rate spec without a mean
+# is centred on the symbol's historical growth (see growth_seed).
+DEFAULT_DISTRIBUTIONS = {
+    "growth_rate": {"dist": "normal", "std": 0.05},
+    "discount_rate": {"dist": "uniform", "low": 0.10, "high": 0.20},
+    "margin_of_safety": {"dist": "uniform", "low": 0.30, "high": 0.50},
+}
+
+SIMULATION_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def growth_seed(growth_rates: Dict[str, float]) -> float:
+    """
+    Central growth rate from historical EDGAR growth rates
+
+    Args:
+        growth_rates: calculate_growth_rates() result or its
+                      'growth_rates' dictionary (sales, equity, cash_flow)
+
+    Returns:
+        Median of the available non-zero rates (NaN if there are none)
+    """
+    rates = growth_rates.get("growth_rates", growth_rates)
+    values = [float(value) for value in rates.values()
+              if value is not None and np.isfinite(value) and value != 0]
+    return float(np.median(values)) if values else np.nan
+
+
+def _sample(rng: np.random.Generator, spec: Dict[str, float], size, mean: float = np.nan) -> np.ndarray:
+    """Draw from a distribution spec: normal, lognormal, uniform or triangular"""
+    dist = spec.get("dist", "normal")
+    if dist == "normal":
+        return rng.normal(spec.get("mean", mean), spec["std"], size)
+    if dist == "lognormal":
+        # Normal in log(1 + x), so draws stay above -100%
+        return np.expm1(rng.normal(np.log1p(spec.get("mean", mean)), spec["std"], size))
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    if dist == "triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+def simulate_intrinsic_value(eps: float,
+                             growth_mean: float,
+                             pe_ratio: float = np.nan,
+                             n_paths: int = 100_000,
+                             distributions: Optional[Dict[str, Dict[str, float]]] = None,
+                             years: int = VALUATION_YEARS,
+                             percentiles: Sequence[float] = SIMULATION_PERCENTILES,
+                             chunk_size: int = 25_000,
+                             seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Monte Carlo distribution of fair value and price to buy for one symbol
+
+    Every path draws a growth rate for each year, a discount rate and a
+    margin of safety. EPS compounds along the growth path, the future P/E
+    follows the path's average growth, and each chunk of paths is valued
+    in one batched computation, so memory stays at chunk_size x years.
+
+    Args:
+        eps: Trailing EPS
+        growth_mean: Central annual growth (e.g. growth_seed of EDGAR rates)
+        pe_ratio: Current P/E, caps the future P/E
+        n_paths: Number of simulated paths
+        distributions: Overrides of DEFAULT_DISTRIBUTIONS by input name
+        years: Projection horizon
+        percentiles: Percentiles to report
+        chunk_size: Paths valued per batch
+        seed: Random seed
+
+    Returns:
+        DataFrame indexed by percentile with fair_market_value and
+        price_to_buy columns
+    """
+    specs = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+    rng = np.random.default_rng(seed)
+
+    fair_values = np.empty(n_paths)
+    buy_prices = np.empty(n_paths)
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        growth = _sample(rng, specs["growth_rate"], (size, years), growth_mean)
+        discount_rate = _sample(rng, specs["discount_rate"], size)
+        margin = _sample(rng, specs["margin_of_safety"], size)
+
+        growth_factor = np.prod(1.0 + growth, axis=1)
+        average_growth = np.sign(growth_factor) * np.abs(growth_factor) ** (1.0 / years) - 1.0
+        eps_future = (eps if eps > 0 else np.nan) * growth_factor
+        value = eps_future * future_pe(average_growth, pe_ratio) / (1.0 + discount_rate) ** years
+
+        fair_values[start:start + size] = value
+        buy_prices[start:start + size] = price_to_buy(value, margin)
+
+    if eps > 0:
+        # Paths without a valid future P/E (non-positive growth) are worthless
+        fair_values = np.nan_to_num(fair_values, nan=0.0)
+        buy_prices = np.nan_to_num(buy_prices, nan=0.0)
+
+    return pd.DataFrame({
+        "fair_market_value": np.percentile(fair_values, percentiles),
+        "price_to_buy": np.percentile(buy_prices, percentiles),
+    }, index=pd.Index(list(percentiles), name="percentile"))
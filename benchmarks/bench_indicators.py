@@ -0,0 +1,77 @@
+"""
+Microbenchmarks for the technical indicator backends
+
+Times every add_* function in technical_analysis with the NumPy kernel
+backend and, if installed, the pandas_ta reference backend across a range
+of series lengths.
+
+Usage:
+    python benchmarks/bench_indicators.py
+    python benchmarks/bench_indicators.py --lengths 1000 10000 --repeat 20
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "app"))
+
+from app.utils import technical_analysis as tech  # noqa: E402
+
+CASES = [
+    ("SMA/EMA", tech.add_moving_averages, {}),
+    ("RSI", tech.add_rsi, {}),
+    ("MACD", tech.add_macd, {}),
+    ("BBANDS", tech.add_bollinger_bands, {}),
+    ("ATR", tech.add_atr, {}),
+    ("STOCH", tech.add_stochastic, {}),
+]
+
+
+def make_ohlc(rows: int) -> pd.DataFrame:
+    """Random-walk OHLC frame"""
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({
+        "High": close * (1 + rng.uniform(0, 0.02, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.02, rows)),
+        "Close": close,
+    })
+
+
+def best_time_ms(func, data, params, backend, repeat):
+    """Best wall time of one call in milliseconds"""
+    timer = timeit.Timer(lambda: func(data, backend=backend, **params))
+    return min(timer.repeat(repeat=repeat, number=1)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    backends = ["numpy"] + (["pandas_ta"] if tech.ta is not None else [])
+    header = f"{'indicator':<10}{'rows':>10}" + "".join(f"{b + ' ms':>14}" for b in backends)
+    if len(backends) == 2:
+        header += f"{'speedup':>10}"
+    print(header)
+
+    for rows in args.lengths:
+        data = make_ohlc(rows)
+        for name, func, params in CASES:
+            times = [best_time_ms(func, data, params, b, args.repeat) for b in backends]
+            line = f"{name:<10}{rows:>10}" + "".join(f"{t:>14.3f}" for t in times)
+            if len(times) == 2:
+                line += f"{times[1] / times[0]:>9.1f}x"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of direct vs micro-batched predictions under concurrent load
+
+Simulates many sessions each asking a registered Keras model for one
+prediction at a time, first calling the registry directly, then through
+PredictionQueue.
+
+Usage:
+    python benchmarks/bench_prediction_queue.py
+    python benchmarks/bench_prediction_queue.py --requests 5000 --threads 64
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "app"))
+
+from app.utils.model_registry import ModelRegistry  # noqa: E402
+from app.utils.models import create_neural_network  # noqa: E402
+from app.utils.prediction_queue import PredictionQueue  # noqa: E402
+
+
+def run(predict, rows: np.ndarray, threads: int) -> float:
+    """Requests per second for one-row requests from a thread pool"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(predict, range(len(rows))))
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(tempfile.mkdtemp())
+    registry.register("net", create_neural_network(args.features))
+    rows = np.random.default_rng(0).normal(size=(args.requests, args.features)).astype(np.float32)
+    registry.predict("net", rows[:1])
+
+    direct = run(lambda i: registry.predict("net", rows[i:i + 1]), rows, args.threads)
+    queue = PredictionQueue(registry, args.max_batch_size, args.max_wait_ms)
+    batched = run(lambda i: queue.predict("net", rows[i]), rows, args.threads)
+    queue.close()
+
+    print(f"{'direct':>10}: {direct:10.0f} req/s")
+    print(f"{'batched':>10}: {batched:10.0f} req/s  ({batched / direct:.1f}x, "
+          f"{args.requests / queue.batches:.1f} rows per batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Time and quality of successive halving vs a full grid search
+
+Fits every one of --candidates configurations sampled from a search space
+on the full training set (grid search), then runs successive halving over
+the same configurations and Hyperband over the space, and reports wall time
+and best validation score of each.
+
+Usage:
+    python benchmarks/bench_tuning.py
+    python benchmarks/bench_tuning.py --rows 20000 --model gradient_boosting --jobs 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from sklearn.datasets import make_regression
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "app"))
+
+from app.utils.tuning import SEARCH_SPACES, sample_candidates, successive_halving, tune_model  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--model", default="random_forest")
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    X, y = make_regression(n_samples=args.rows, n_features=args.features, noise=10.0, random_state=0)
+    grid = sample_candidates(SEARCH_SPACES[args.model], args.candidates, seed=0)
+    split = int(args.rows * 0.8)
+
+    start = time.perf_counter()
+    # One round at the full budget: every configuration on every row
+    history = successive_halving(grid, args.model, X[:split], y[:split], X[split:], y[split:],
+                                 min_budget=split, max_budget=split, n_jobs=args.jobs)
+    grid_time = time.perf_counter() - start
+    grid_score = max(record["score"] for record in history)
+    print(f"{'grid':>20}: {grid_time:8.1f} s  best R^2 {grid_score:.4f}  ({len(history)} fits)",
+          flush=True)
+
+    for method in ("successive_halving", "hyperband"):
+        _, results = tune_model(X, y, args.model, method=method, n_candidates=len(grid),
+                                n_jobs=args.jobs, seed=0)
+        print(f"{method:>20}: {results['search_time']:8.1f} s  best R^2 {results['best_score']:.4f}  "
+              f"({results['n_fits']} fits, {results['search_time'] / grid_time:.0%} of grid time)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,27 @@ Pytest configuration
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+
+# Add app directory so app-level imports (config.settings, utils.*) resolve
+# the same way as under `shiny run app/main.py`. Import config right away so
+# the root config/ package cannot shadow app/config once pytest prepends the
+# rootdir to sys.path.
+sys.path.insert(0, str(project_root / "app"))
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True, scope="session")
+def app_dir_first():
+    """
+    Keep app/ ahead of the rootdir pytest prepends while importing tests
+
+    Worker processes (loky, spawn) start from the parent's sys.path and
+    import config afresh, so app/config must come first there as well.
+    """
+    app_dir = str(project_root / "app")
+    sys.path[:] = [app_dir] + [path for path in sys.path if path != app_dir]
@@ -2,10 +2,74 @@
 Tests for analysis utilities
 """
 
+import time
 import pytest
 import pandas as pd
 import numpy as np
-from app.utils.analysis import analyze_fundamentals, calculate_financial_ratios, screen_stocks
+from app.utils import analysis, database
+from app.utils.analysis import (
+    analyze_fundamentals,
+    analyze_fundamentals_batch,
+    calculate_financial_ratios,
+    calculate_growth_rates,
+    screen_stocks,
+)
+
+
+class FakeFiling:
+    """Filing stub returning fixed statements and counting parses"""
+    
+    parsed = []
+    
+    def __init__(self, year: int, revenue: float, delay: float = 0.0, fail: bool = False):
+        self.cik = 320193
+        self.accession_no = f"0000320193-{year % 100:02d}-000001"
+        self.form = "10-K"
+        self.filing_date = f"{year}-11-01"
+        self.revenue = revenue
+        self.delay = delay
+        self.fail = fail
+    
+    def income_statement(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError("XBRL not available")
+        FakeFiling.parsed.append(self.accession_no)
+        return {"revenues": self.revenue, "net_income": self.revenue / 4}
+    
+    def balance_sheet(self):
+        return {"assets": 3 * self.revenue, "liabilities": self.revenue}
+    
+    def cash_flow(self):
+        return {"operating": self.revenue / 3}
+
+
+class FakeCompany:
+    """Company stub serving a mutable list of filings"""
+    
+    filings = []
+    created = 0
+    
+    def __init__(self, ticker: str):
+        FakeCompany.created += 1
+    
+    def get_filings(self, form: str):
+        return self
+    
+    def latest(self, n: int):
+        return FakeCompany.filings[-n:][::-1]
+
+
+@pytest.fixture
+def edgar_store(tmp_path, monkeypatch):
+    """Temporary database and stubbed EdgarTools company"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    monkeypatch.setattr(analysis, "Company", FakeCompany)
+    database.init_db()
+    FakeFiling.parsed = []
+    FakeCompany.created = 0
+    FakeCompany.filings = [FakeFiling(2015 + i, 100.0 * 1.1 ** i) for i in range(10)]
+    return FakeCompany
 
 
 def test_analyze_fundamentals():
@@ -23,6 +87,30 @@ def test_analyze_fundamentals():
     assert results["data_points"] == 3
 
 
+def test_analyze_fundamentals_batch():
+    """Test batch fundamental analysis matches the single-symbol wrapper"""
+    infos = [
+        {"symbol": "AAPL", "longName": "Apple Inc.", "currentPrice": 190.0,
+         "trailingPE": 30.5, "marketCap": 3.0e12},
+        {"symbol": "MSFT", "regularMarketPrice": 410.0, "trailingPE": 35.0},
+        {"symbol": "XYZ"},
+    ]
+    
+    results = analyze_fundamentals_batch(pd.DataFrame(infos))
+    
+    assert list(results.columns.unique(0)) == ["valuations", "metrics", "summary"]
+    assert list(results[("summary", "current_price")].fillna(-1)) == [190.0, 410.0, -1]
+    assert results[("metrics", "pe_ratio")].dtype == np.float64
+    assert results.loc[2, ("summary", "company_name")] == "N/A"
+    
+    single = analyze_fundamentals(infos[1])
+    assert single["summary"]["current_price"] == 410.0
+    assert single["metrics"]["pe_ratio"] == 35.0
+    assert single["metrics"]["market_cap"] is None
+    assert single["valuations"]["price_to_buy"] is None
+    assert analyze_fundamentals(infos[0], current_price=0)["summary"]["current_price"] == 0
+
+
 def test_calculate_financial_ratios():
     """Test financial ratio calculation"""
     income_stmt = pd.DataFrame({})
@@ -47,3 +135,158 @@ def test_screen_stocks():
     filtered = screen_stocks(df, criteria)
     
     assert len(filtered) <= len(df)
+
+
+def test_growth_rates_parse_each_filing_once(edgar_store):
+    """Test parsed filings are stored and repeated requests are local lookups"""
+    first = calculate_growth_rates("AAPL", timeframe=9)
+    second = calculate_growth_rates("AAPL", timeframe=9)
+    
+    assert first == second
+    assert first["growth_rates"]["sales"] == pytest.approx(1.1 ** (8 / 9) - 1, abs=1e-4)
+    assert len(FakeFiling.parsed) == 9
+    assert edgar_store.created == 1
+    
+    # A new annual report only parses the new filing
+    database.clear_cache()
+    edgar_store.filings.append(FakeFiling(2025, 100.0 * 1.1 ** 10))
+    calculate_growth_rates("AAPL", timeframe=9)
+    
+    assert len(FakeFiling.parsed) == 10
+    assert len(database.get_financials([f.accession_no for f in edgar_store.filings])) == 10
+
+
+def test_filings_parsed_concurrently_with_error_isolation(edgar_store):
+    """Test slow filings overlap and a failing filing is skipped"""
+    edgar_store.filings = [FakeFiling(2016 + i, 100.0 + i, delay=0.3) for i in range(4)]
+    edgar_store.filings[1].fail = True
+    
+    start = time.perf_counter()
+    financials = analysis.get_company_financials("AAPL", timeframe=4)
+    elapsed = time.perf_counter() - start
+    
+    assert elapsed < 0.9
+    assert [record["period"] for record in financials] == ["2016-11-01", "2018-11-01", "2019-11-01"]
+
+
+def test_screen_stocks_open_bounds_and_top_k():
+    """Test open-ended ranges, NaN policy and top-k ordering"""
+    df = pd.DataFrame({
+        "Symbol": ["AAPL", "MSFT", "GOOGL", "XOM", "T"],
+        "PE": [28.0, 35.0, 22.0, 11.0, np.nan],
+        "ROE": [1.5, 0.38, 0.30, 0.18, 0.10],
+    })
+    
+    cheap = screen_stocks(df, {"PE": (None, 25)})
+    assert list(cheap["Symbol"]) == ["GOOGL", "XOM"]
+    
+    with_missing = screen_stocks(df, {"PE": (None, 25)}, nan_policy="include")
+    assert list(with_missing["Symbol"]) == ["GOOGL", "XOM", "T"]
+    
+    best = screen_stocks(df, {"ROE": (0.15, None)}, sort_by="PE", ascending=False, top_k=2)
+    assert list(best["Symbol"]) == ["MSFT", "AAPL"]
+
+
+def test_screen_stocks_expression():
+    """Test screen_stocks accepts an expression"""
+    df = pd.DataFrame({"PE": [28.0, 35.0, 22.0, 11.0], "ROE": [1.5, 0.38, 0.30, 0.18]},
+                      index=["AAPL", "MSFT", "GOOGL", "XOM"])
+    
+    filtered = screen_stocks(df, "PE < 25 or ROE > 1")
+    
+    assert list(filtered.index) == ["AAPL", "GOOGL", "XOM"]
+
+
+class FakeFilingIndex:
+    """Filing index stub with one row per (cik, accession number, date)"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.empty = not rows
+    
+    def to_pandas(self, *columns):
+        return pd.DataFrame(self.rows, columns=["cik", "accession_number", "filing_date"])
+
+
+def test_refresh_recomputes_only_new_filers(edgar_store, monkeypatch):
+    """Test the nightly refresh recomputes companies with new filings only"""
+    fetched = []
+    monkeypatch.setattr(analysis, "fetch_fundamental_data",
+                        lambda symbol: fetched.append(symbol) or {"info": {"symbol": symbol, "trailingPE": 20.0}})
+    index = FakeFilingIndex([])
+    monkeypatch.setattr(analysis, "get_filings", lambda form, filing_date: index)
+    
+    first = analysis.get_cached_fundamentals("AAPL")
+    assert first["cik"] == 320193
+    assert first["accession_number"] == edgar_store.filings[-1].accession_no
+    assert analysis.get_cached_fundamentals("aapl")["growth_rates"] == first["growth_rates"]
+    assert fetched == ["AAPL"]
+    
+    # Filings by other companies or already reflected leave AAPL untouched
+    index.rows = [(789019, "0000789019-25-000001", "2025-01-02"),
+                  (320193, first["accession_number"], "2024-11-01")]
+    index.empty = False
+    assert analysis.refresh_fundamentals(since="2025-01-01") == {}
+    
+    # A new quarterly report triggers exactly one recompute
+    index.rows.append((320193, "0000320193-25-000042", "2025-01-03"))
+    recomputed = analysis.refresh_fundamentals(since="2025-01-01")
+    
+    assert list(recomputed) == ["AAPL"]
+    assert fetched == ["AAPL", "AAPL"]
+    assert database.get_fundamentals(["AAPL"])["AAPL"]["accession_number"] == "0000320193-25-000042"
+    assert analysis.refresh_fundamentals(since="2025-01-01") == {}
+
+
+def test_refresh_fills_the_ticker_universe(edgar_store, monkeypatch):
+    """Test active tickers without stored fundamentals are computed by the refresh"""
+    monkeypatch.setattr(analysis, "fetch_fundamental_data",
+                        lambda symbol: {"info": {"symbol": symbol, "trailingPE": 20.0}})
+    monkeypatch.setattr(analysis, "get_filings", lambda form, filing_date: FakeFilingIndex([]))
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO tickers (symbol, sector, is_active) VALUES (?, ?, ?)",
+                     [("AAPL", "Technology", 1), ("OLD", "Technology", 0)])
+    conn.commit()
+    conn.close()
+    
+    assert list(analysis.refresh_fundamentals(since="2025-01-01")) == ["AAPL"]
+    assert list(database.get_fundamentals()) == ["AAPL"]
+    assert analysis.refresh_fundamentals(since="2025-01-01") == {}
+
+
+def test_refresh_retries_failures_only_after_a_new_filing(edgar_store, monkeypatch):
+    """Test a symbol that fails is recorded and waits for its next filing"""
+    attempts = []
+    
+    def fetch(symbol):
+        attempts.append(symbol)
+        if symbol == "SPY":
+            raise KeyError("no filings")
+        return {"info": {"symbol": symbol, "trailingPE": 20.0}}
+    
+    monkeypatch.setattr(analysis, "fetch_fundamental_data", fetch)
+    monkeypatch.setattr(analysis, "find_cik", lambda symbol: {"SPY": 884394}.get(symbol))
+    index = FakeFilingIndex([])
+    monkeypatch.setattr(analysis, "get_filings", lambda form, filing_date: index)
+    
+    assert list(analysis.refresh_fundamentals(["AAPL", "SPY"], since="2025-01-01")) == ["AAPL"]
+    failure = database.get_fundamentals_failures()["SPY"]
+    assert (failure["cik"], failure["accession_number"]) == (884394, None)
+    assert analysis.refresh_fundamentals(["AAPL", "SPY"], since="2025-01-01") == {}
+    assert attempts == ["AAPL", "SPY"]
+    
+    # A new filing by the company is the only thing that brings it back
+    index.rows, index.empty = [(884394, "0000884394-25-000001", "2025-01-03")], False
+    monkeypatch.setattr(analysis, "fetch_fundamental_data",
+                        lambda symbol: {"info": {"symbol": symbol, "trailingPE": 20.0}})
+    assert list(analysis.refresh_fundamentals(["AAPL", "SPY"], since="2025-01-01")) == ["SPY"]
+    assert database.get_fundamentals_failures() == {}
+    assert analysis.refresh_fundamentals(["AAPL", "SPY"], since="2025-01-01") == {}
+
+
+def test_get_fundamentals_chunks_large_symbol_lists(edgar_store, monkeypatch):
+    """Test lookups over more symbols than one query can bind"""
+    monkeypatch.setattr(database, "MAX_QUERY_VARIABLES", 2)
+    database.save_fundamentals([{"symbol": f"S{i}", "cik": i} for i in range(5)])
+    
+    assert sorted(database.get_fundamentals([f"S{i}" for i in range(7)])) == [f"S{i}" for i in range(5)]
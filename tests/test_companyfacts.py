@@ -0,0 +1,113 @@
+"""
+Tests for SEC companyfacts bulk ingestion
+"""
+
+import json
+import zipfile
+import pytest
+import pandas as pd
+from app.utils.companyfacts import (
+    ingest_companyfacts,
+    load_fundamentals_history,
+    normalize_companyfacts,
+    universe_growth_rates,
+)
+
+
+def annual_fact(year: int, value: float, filed_year: int = None) -> dict:
+    """Fiscal-year duration fact as it appears in companyfacts JSON (fy: the filing's year)"""
+    filed_year = filed_year or year + 1
+    return {"start": f"{year}-01-01", "end": f"{year}-12-31", "val": value,
+            "accn": f"0000000001-{filed_year % 100:02d}-000001", "fy": filed_year - 1,
+            "fp": "FY", "form": "10-K", "filed": f"{filed_year}-02-15"}
+
+
+def company_document(cik: int, revenue: dict, assets: float = 500.0) -> dict:
+    """Minimal companyfacts document with revenue and assets"""
+    revenue_facts = [annual_fact(year, value) for year, value in revenue.items()]
+    # Nine-month year-to-date value, which is not a fiscal period
+    revenue_facts.append({"start": "2020-01-01", "end": "2020-09-30", "val": 1.0,
+                          "accn": "x", "fy": 2020, "fp": "Q3", "form": "10-Q",
+                          "filed": "2020-11-01"})
+    return {
+        "cik": cik,
+        "entityName": f"Company {cik}",
+        "facts": {"us-gaap": {
+            "RevenueFromContractWithCustomerExcludingAssessedTax": {"units": {"USD": revenue_facts}},
+            "Assets": {"units": {"USD": [{"end": "2020-12-31", "val": assets, "accn": "y",
+                                          "fy": 2020, "fp": "FY", "form": "10-K",
+                                          "filed": "2021-02-15"}]}},
+        }},
+    }
+
+
+def test_normalize_keeps_latest_filing_per_period():
+    """Test restated values win and year-to-date facts are dropped"""
+    document = company_document(1, {2019: 100.0, 2020: 110.0})
+    facts = document["facts"]["us-gaap"]["RevenueFromContractWithCustomerExcludingAssessedTax"]
+    facts["units"]["USD"].append(annual_fact(2019, 105.0, filed_year=2021))
+
+    history = normalize_companyfacts(1, document)
+    revenue = history[history["concept"] == "revenue"]
+
+    assert list(revenue["fiscal_period"]) == ["FY", "FY"]
+    assert list(revenue["value"]) == [105.0, 110.0]
+    assert history.loc[history["concept"] == "total_assets", "value"].item() == 500.0
+
+
+def test_normalize_labels_comparatives_with_their_own_period():
+    """Test values filed again later keep the fiscal year and period they were first reported with"""
+    document = company_document(1, {2019: 100.0, 2020: 110.0})
+    revenue_facts = document["facts"]["us-gaap"]["RevenueFromContractWithCustomerExcludingAssessedTax"]
+    # The 2019 value again as a comparative in the 2021 10-K
+    revenue_facts["units"]["USD"].append(annual_fact(2019, 100.0, filed_year=2022))
+    # The year-end balance again in the next 10-Q
+    document["facts"]["us-gaap"]["Assets"]["units"]["USD"].append(
+        {"end": "2020-12-31", "val": 500.0, "accn": "z", "fy": 2021, "fp": "Q1",
+         "form": "10-Q", "filed": "2021-05-01"})
+
+    history = normalize_companyfacts(1, document)
+    revenue = history[history["concept"] == "revenue"]
+    assets = history[history["concept"] == "total_assets"]
+
+    assert list(revenue["fiscal_year"]) == [2019, 2020]
+    assert revenue["filed"].dt.year.tolist() == [2022, 2021]
+    assert assets[["fiscal_year", "fiscal_period"]].values.tolist() == [[2020, "FY"]]
+    assert assets["filed"].item() == pd.Timestamp("2021-05-01")
+
+
+def test_normalize_merges_alternative_tags():
+    """Test periods of an older revenue tag are kept and overlaps use the preferred tag"""
+    document = company_document(1, {2018: 120.0, 2019: 130.0})
+    old_facts = [annual_fact(2016, 100.0), annual_fact(2017, 110.0), annual_fact(2018, 999.0)]
+    old_facts[0]["fy"] = None
+    document["facts"]["us-gaap"]["SalesRevenueNet"] = {"units": {"USD": old_facts}}
+
+    history = normalize_companyfacts(1, document)
+    revenue = history[history["concept"] == "revenue"]
+
+    assert list(revenue["value"]) == [100.0, 110.0, 120.0, 130.0]
+    assert revenue["fiscal_year"].isna().tolist() == [True, False, False, False]
+
+
+def test_ingest_and_universe_growth(tmp_path):
+    """Test streaming ingestion and grouped CAGR over the Parquet history"""
+    zip_path = tmp_path / "companyfacts.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr("CIK0000000001.json", json.dumps(
+            company_document(1, {2010 + i: 100.0 * 1.1 ** i for i in range(11)})))
+        archive.writestr("CIK0000000002.json", json.dumps(
+            company_document(2, {2018: 50.0, 2020: 40.5})))
+        archive.writestr("CIK0000000003.json", json.dumps({"cik": 3, "facts": {}}))
+
+    rows = ingest_companyfacts(zip_path, tmp_path / "history", batch_size=2)
+    history = load_fundamentals_history(["revenue"], base_dir=tmp_path / "history")
+
+    assert rows == 11 + 2 + 2
+    assert set(history["concept"]) == {"revenue"}
+
+    growth = universe_growth_rates(history, "revenue", years=10)
+    assert growth.loc[1, "years"] == 10
+    assert growth.loc[1, "cagr"] == pytest.approx(0.1)
+    assert growth.loc[2, "years"] == 2
+    assert growth.loc[2, "cagr"] == pytest.approx(-0.1)
@@ -0,0 +1,139 @@
+"""
+Tests for the on-disk feature store
+"""
+
+import json
+import zipfile
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils import data_loader, database, feature_store
+from app.utils.companyfacts import ingest_companyfacts
+from app.utils.feature_store import DEFAULT_FEATURES, FeatureStore, build_features, refresh_feature_store
+
+
+def make_daily(rows: int) -> pd.DataFrame:
+    """Deterministic business-day OHLCV frame with a Date column"""
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))[:rows]
+    return pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=rows, freq="B"),
+        "Open": close * 0.99,
+        "High": close * 1.01,
+        "Low": close * 0.98,
+        "Close": close,
+        "Volume": np.full(rows, 1_000_000),
+    })
+
+
+def make_history() -> pd.DataFrame:
+    """Two annual revenue reports in the companyfacts format"""
+    return pd.DataFrame({
+        "concept": ["revenue", "revenue"],
+        "fiscal_period": ["FY", "FY"],
+        "period_end": pd.to_datetime(["2019-12-31", "2020-12-31"]),
+        "filed": pd.to_datetime(["2020-02-14", "2021-02-12"]),
+        "value": [100.0, 120.0],
+    })
+
+
+def test_features_are_point_in_time():
+    """Test returns, lags, fundamentals and targets line up without lookahead"""
+    data = make_daily(400)
+    features = build_features(data, fundamentals=make_history())
+    close = data.set_index("Date")["Close"]
+
+    assert (features.dtypes == np.float32).all()
+    assert features.columns[-1] == "target_return_5"
+    day = features.index[100]
+    assert features.loc[day, "return_1_lag_2"] == pytest.approx(close.pct_change().shift(2)[day], rel=1e-5)
+    assert features.loc[day, "target_return_5"] == pytest.approx(close.shift(-5)[day] / close[day] - 1, rel=1e-5)
+
+    # A report is only known from the bar after its filing date
+    revenue = features["fund_revenue"]
+    assert np.isnan(revenue["2020-02-14"])
+    assert revenue["2020-02-17"] == 100.0
+    assert revenue["2021-02-15"] == 120.0
+
+
+def test_store_builds_once_and_reads_memmap_slices(tmp_path):
+    """Test builds are skipped for unchanged data and reads are memory-mapped"""
+    data = make_daily(300)
+    store = FeatureStore(tmp_path)
+
+    assert store.build("aapl", data)
+    assert not store.build("AAPL", data)
+    assert store.build("AAPL", make_daily(301))
+
+    X, y, dates = store.training_data("AAPL", "2020-03-02", "2020-06-30")
+    assert isinstance(X, np.memmap) and X.dtype == np.float32
+    assert dates[0] == pd.Timestamp("2020-03-02") and dates[-1] == pd.Timestamp("2020-06-30")
+    assert X.shape == (len(dates), len(store.columns("AAPL")) - 1) and len(y) == len(dates)
+
+    expected = build_features(make_daily(301)).drop(columns="target_return_5")
+    latest = store.latest("AAPL")
+    assert latest.name == expected.index[-1]
+    np.testing.assert_array_equal(latest.to_numpy(), expected.iloc[-1].to_numpy())
+
+    # Rows without a target yet are left out of training data
+    X_all, y_all, _ = store.training_data("AAPL")
+    assert len(y_all) == 301 - 5 and not np.isnan(y_all).any()
+    assert isinstance(X_all, np.memmap)
+
+
+def test_definitions_are_versioned(tmp_path):
+    """Test a changed definition is stored separately from the old one"""
+    data = make_daily(120)
+    base = FeatureStore(tmp_path)
+    short = FeatureStore(tmp_path, {**DEFAULT_FEATURES, "version": 2, "lags": [1]})
+
+    base.build("AAPL", data)
+    short.build("AAPL", data)
+
+    assert base.root != short.root
+    assert "return_1_lag_5" in base.columns("AAPL")
+    assert "return_1_lag_5" not in short.columns("AAPL")
+    assert short.metadata("AAPL")["definition"]["version"] == 2
+
+
+def test_daily_refresh_rebuilds_stored_symbols(tmp_path, monkeypatch):
+    """Test the daily job rebuilds stored symbols only when new bars arrived"""
+    bars = {"AAPL": make_daily(300), "MSFT": make_daily(200)}
+    monkeypatch.setattr(data_loader, "fetch_stock_data", lambda symbol, period: bars[symbol])
+    store = FeatureStore(tmp_path)
+    store.build("AAPL", bars["AAPL"])
+
+    assert store.symbols() == ["AAPL"]
+    assert refresh_feature_store(store=store, symbols=["aapl", "msft"], n_jobs=1) == {"AAPL": False, "MSFT": True}
+
+    bars["AAPL"] = make_daily(301)
+    assert refresh_feature_store(["AAPL", "MSFT"], store=store, n_jobs=1) == {"AAPL": True, "MSFT": False}
+    assert store.training_data("AAPL")[2][-1] == bars["AAPL"]["Date"].iloc[-6]
+
+
+def test_daily_refresh_joins_companyfacts(tmp_path, monkeypatch):
+    """Test the daily job builds fund_* columns from the ingested companyfacts history"""
+    revenue = [{"start": f"{year}-01-01", "end": f"{year}-12-31", "val": value,
+                "accn": f"0000000001-{year + 1 - 2000}-000001", "fy": year, "fp": "FY",
+                "form": "10-K", "filed": f"{year + 1}-02-14"}
+               for year, value in [(2019, 100.0), (2020, 120.0)]]
+    with zipfile.ZipFile(tmp_path / "companyfacts.zip", "w") as archive:
+        archive.writestr("CIK0000000001.json", json.dumps({"cik": 1, "facts": {"us-gaap": {
+            "Revenues": {"units": {"USD": revenue}}}}}))
+    ingest_companyfacts(tmp_path / "companyfacts.zip", tmp_path / "history")
+
+    monkeypatch.setattr(feature_store, "FUNDAMENTALS_HISTORY_DIR", tmp_path / "history")
+    monkeypatch.setattr(database, "get_fundamentals",
+                        lambda symbols: {"AAPL": {"symbol": "AAPL", "cik": 1}})
+    monkeypatch.setattr(data_loader, "fetch_stock_data", lambda symbol, period: make_daily(300))
+    store = FeatureStore(tmp_path / "features")
+
+    assert refresh_feature_store(["AAPL", "MSFT"], store=store, n_jobs=1) == {"AAPL": True, "MSFT": True}
+
+    aapl = store.read("AAPL", columns=["fund_revenue"])
+    revenue_by_date = pd.Series(aapl[0][:, 0], index=aapl[1])
+    assert np.isnan(revenue_by_date[:"2020-02-14"]).all()
+    assert (revenue_by_date["2020-02-17":"2021-02-12"] == 100.0).all()
+    assert (revenue_by_date["2021-02-15":] == 120.0).all()
+    assert np.isnan(store.read("MSFT", columns=["fund_revenue"])[0]).all()
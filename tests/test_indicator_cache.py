@@ -0,0 +1,79 @@
+"""
+Tests for the persistent indicator cache
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.indicator_cache import IndicatorCache, data_fingerprint, spec_key
+
+SPEC = {"add_moving_averages": {"short_window": 5, "long_window": 10}}
+
+
+def make_prices(rows: int) -> pd.DataFrame:
+    """Deterministic daily price frame"""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 400))[:rows]
+    return pd.DataFrame({
+        "Date": pd.date_range("2023-01-02", periods=rows, freq="B"),
+        "Close": close,
+    })
+
+
+class CountingCompute:
+    """Rolling-mean indicator function that records the frames it sees"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        self.calls.append(len(df))
+        out = df.copy()
+        out["SMA_5"] = out["Close"].rolling(5).mean()
+        return out
+
+
+def test_spec_key_is_order_independent():
+    """Test spec keys ignore parameter order"""
+    assert spec_key({"a": {"x": 1, "y": 2}}) == spec_key({"a": {"y": 2, "x": 1}})
+    assert spec_key({"a": {"x": 1}}) != spec_key({"a": {"x": 2}})
+
+
+def test_cache_hit_skips_compute(tmp_path):
+    """Test the second request for unchanged data is served from disk"""
+    cache = IndicatorCache(tmp_path)
+    compute = CountingCompute()
+    data = make_prices(100)
+
+    first = cache.get_or_compute("AAPL", data, SPEC, compute)
+    second = cache.get_or_compute("AAPL", data, SPEC, compute)
+
+    assert compute.calls == [100]
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_appended_bars_extend_tail(tmp_path):
+    """Test new bars only compute the tail and match a full recompute"""
+    cache = IndicatorCache(tmp_path)
+    compute = CountingCompute()
+
+    cache.get_or_compute("AAPL", make_prices(100), SPEC, compute)
+    result = cache.get_or_compute("AAPL", make_prices(103), SPEC, compute, lookback=10)
+
+    assert compute.calls == [100, 13]
+    pd.testing.assert_frame_equal(result, CountingCompute()(make_prices(103)))
+
+
+def test_revised_history_recomputes(tmp_path):
+    """Test a changed historical bar invalidates the cached result"""
+    cache = IndicatorCache(tmp_path)
+    compute = CountingCompute()
+    data = make_prices(100)
+
+    cache.get_or_compute("AAPL", data, SPEC, compute)
+    revised = make_prices(101)
+    revised.loc[10, "Close"] += 1.0
+    cache.get_or_compute("AAPL", revised, SPEC, compute, lookback=10)
+
+    assert compute.calls == [100, 101]
+    assert data_fingerprint(revised)["rows"] == 101
@@ -0,0 +1,191 @@
+"""
+Tests for the NumPy indicator kernels and their parity with pandas_ta
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils import indicator_kernels as kernels
+from app.utils.panel_indicators import atr_panel, rsi_panel
+from app.utils.technical_analysis import (
+    add_moving_averages,
+    add_rsi,
+    add_macd,
+    add_bollinger_bands,
+    add_atr,
+    add_stochastic,
+    sweep_indicator,
+)
+
+SERIES_LENGTHS = [60, 500, 5000]
+
+PARITY_CASES = [
+    (add_moving_averages, {"short_window": 20, "long_window": 50}),
+    (add_rsi, {"period": 14}),
+    (add_macd, {"fast": 12, "slow": 26, "signal": 9}),
+    (add_bollinger_bands, {"period": 20, "std_dev": 2.0}),
+    (add_atr, {"period": 14}),
+    (add_stochastic, {"k_period": 14, "d_period": 3}),
+]
+
+
+def make_ohlc(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk OHLC frame"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.005, rows)),
+        "High": close * (1 + rng.uniform(0, 0.02, rows)),
+        "Low": close * (1 - rng.uniform(0, 0.02, rows)),
+        "Close": close,
+    })
+
+
+def test_linear_recursion_matches_loop():
+    """Test the blocked recursion against a plain Python loop"""
+    rng = np.random.default_rng(1)
+    u = rng.normal(size=(1000, 3))
+
+    expected = np.zeros_like(u)
+    for t in range(len(u)):
+        expected[t] = u[t] + 0.9 * (expected[t - 1] if t else 0.0)
+
+    np.testing.assert_allclose(kernels.linear_recursion(u, 0.9), expected, rtol=1e-10)
+    np.testing.assert_allclose(kernels.linear_recursion(u[:, 0], 0.9), expected[:, 0], rtol=1e-10)
+
+    decays = np.array([0.5, 0.9, 0.99])
+    per_column = kernels.linear_recursion(u, decays)
+    for j, decay in enumerate(decays):
+        np.testing.assert_allclose(per_column[:, j], kernels.linear_recursion(u[:, j], decay),
+                                   rtol=1e-10, atol=1e-12)
+
+
+def test_kernels_match_pandas():
+    """Test SMA, EMA and rolling std against pandas equivalents"""
+    close = make_ohlc(300)["Close"]
+
+    np.testing.assert_allclose(
+        kernels.sma(close, 20), close.rolling(20).mean(), rtol=1e-10, equal_nan=True
+    )
+
+    seeded = close.copy()
+    seeded.iloc[:9] = np.nan
+    seeded.iloc[9] = close.iloc[:10].mean()
+    np.testing.assert_allclose(
+        kernels.ema(close, 10), seeded.ewm(span=10, adjust=False).mean(),
+        rtol=1e-10, equal_nan=True
+    )
+
+    bands = kernels.bbands(close, 20)
+    np.testing.assert_allclose(
+        bands[2] - bands[1], 2.0 * close.rolling(20).std(), rtol=1e-8, equal_nan=True
+    )
+
+
+def test_leading_nans_and_out_buffer():
+    """Test warm-up after leading NaNs and reuse of a preallocated output"""
+    close = make_ohlc(100)["Close"].to_numpy(copy=True)
+    close[:10] = np.nan
+
+    out = np.empty(len(close))
+    result = kernels.ema(close, 5, out=out)
+
+    assert result is out
+    assert np.isnan(out[:14]).all() and not np.isnan(out[14:]).any()
+
+    with pytest.raises(ValueError):
+        kernels.macd(close, out=np.empty(len(close)))
+
+
+def test_unknown_backend():
+    """Test that an unknown backend name is rejected"""
+    with pytest.raises(ValueError):
+        add_rsi(make_ohlc(50), backend="talib")
+
+
+@pytest.mark.parametrize("rows", SERIES_LENGTHS)
+@pytest.mark.parametrize("func, params", PARITY_CASES, ids=lambda p: getattr(p, "__name__", ""))
+def test_parity_with_pandas_ta(func, params, rows):
+    """Test that the NumPy backend reproduces the pandas_ta backend"""
+    pytest.importorskip("pandas_ta")
+    data = make_ohlc(rows)
+
+    expected = func(data, backend="pandas_ta", **params)
+    result = func(data, backend="numpy", **params)
+
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-7, atol=1e-8)
+
+
+# Wilder's worked example prices with reference RSI(5) / ATR(5) values.
+# RSI: pandas_ta's RMA, ewm(alpha=1/5, adjust=True, min_periods=5), of the
+# gains and losses (see pandas_rsi); ATR: TR NaN on bar 0, RMA seeded with
+# the mean TR
+REFERENCE_CLOSE = [44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10,
+                   45.42, 45.84, 46.08, 45.89, 46.03, 45.61, 46.28]
+REFERENCE_HIGH_PAD = [0.3, 0.2, 0.5, 0.1, 0.4, 0.3, 0.2, 0.6, 0.3, 0.2, 0.4, 0.1, 0.3, 0.5]
+REFERENCE_LOW_PAD = [0.2, 0.4, 0.1, 0.3, 0.2, 0.5, 0.3, 0.1, 0.2, 0.4, 0.3, 0.2, 0.6, 0.1]
+REFERENCE_RSI_5 = [71.1845219718, 76.3241060765, 81.2726254274, 86.0546157899, 88.2057775894,
+                   76.5243804897, 79.0765813321, 56.174750376, 72.2186793722]
+REFERENCE_ATR_5 = [0.802, 0.7416, 0.77728, 0.765824, 0.7326592, 0.72612736, 0.640901888,
+                   0.7167215104, 0.8073772083]
+
+
+def pandas_rsi(close: pd.Series, length: int) -> pd.Series:
+    """pandas_ta's RSI written out with pandas"""
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / length, adjust=True, min_periods=length).mean()
+    loss = (-change).clip(lower=0).ewm(alpha=1 / length, adjust=True, min_periods=length).mean()
+    return 100 * gain / (gain + loss)
+
+
+def test_rsi_and_atr_reference_values():
+    """Test RSI and ATR warm-up and values against fixed reference values"""
+    close = np.array(REFERENCE_CLOSE)
+    high = close + REFERENCE_HIGH_PAD
+    low = close - REFERENCE_LOW_PAD
+    warmup = [np.nan] * 5
+
+    np.testing.assert_allclose(pandas_rsi(pd.Series(close), 5), warmup + REFERENCE_RSI_5, rtol=1e-9)
+    np.testing.assert_allclose(kernels.rsi(close, 5), warmup + REFERENCE_RSI_5, rtol=1e-9)
+    np.testing.assert_allclose(kernels.atr(high, low, close, 5), warmup + REFERENCE_ATR_5, rtol=1e-9)
+    assert np.isnan(kernels.true_range(high, low, close)[0])
+
+    np.testing.assert_allclose(rsi_panel(close[:, None], 5)[:, 0], warmup + REFERENCE_RSI_5, rtol=1e-9)
+    np.testing.assert_allclose(atr_panel(high[:, None], low[:, None], close[:, None], 5)[:, 0],
+                               warmup + REFERENCE_ATR_5, rtol=1e-9)
+
+    data = pd.DataFrame({"High": high, "Low": low, "Close": close})
+    np.testing.assert_allclose(add_rsi(data, period=5)["RSI_5"], warmup + REFERENCE_RSI_5, rtol=1e-9)
+    np.testing.assert_allclose(add_atr(data, period=5).iloc[:, -1], warmup + REFERENCE_ATR_5, rtol=1e-9)
+
+
+@pytest.mark.parametrize("length", [1, 2, 14, 200])
+def test_rsi_matches_pandas_ewm(length):
+    """Test every RSI implementation against pandas_ta's definition on a long series"""
+    close = make_ohlc(700)["Close"].to_numpy(copy=True)
+    close[:5] = np.nan
+    expected = pandas_rsi(pd.Series(close), length).to_numpy()
+
+    np.testing.assert_allclose(kernels.rsi(close, length), expected, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(rsi_panel(close[:, None], length)[:, 0], expected, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(kernels.rsi_sweep(close, [length])[:, 0], expected, rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("indicator, kernel", [
+    ("sma", kernels.sma), ("ema", kernels.ema), ("rsi", kernels.rsi),
+])
+def test_sweep_matches_single_length(indicator, kernel):
+    """Test every sweep column against the single-length kernel"""
+    close = make_ohlc(700)["Close"].to_numpy(copy=True)
+    close[:5] = np.nan
+    lengths = [2, 5, 14, 20, 50, 200, 1000]
+
+    result = sweep_indicator(pd.DataFrame({"Close": close}), indicator, lengths)
+
+    assert result.columns.names == ["indicator", "length"]
+    for length in lengths:
+        np.testing.assert_allclose(
+            result[(indicator.upper(), length)], kernel(close, length),
+            rtol=1e-9, atol=1e-9, equal_nan=True
+        )
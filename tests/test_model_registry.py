@@ -0,0 +1,95 @@
+"""
+Tests for the model registry and its cache of loaded models
+"""
+
+import threading
+
+import pytest
+import numpy as np
+from sklearn.datasets import make_regression
+from app.utils import model_registry
+from app.utils.model_registry import ModelRegistry
+from app.utils.models import create_neural_network, create_sklearn_model, predict_stock_price, train_model
+
+
+def test_register_and_lazy_cached_load(tmp_path):
+    """Test versions persist with metadata and are deserialized once"""
+    X, y = make_regression(n_samples=100, n_features=4, random_state=0) # type: ignore
+    model, metrics = train_model(X, y, model_type="random_forest")
+
+    ModelRegistry(tmp_path).register("demo", model, features=list("abcd"), metrics=metrics,
+                                     training_window=("2020-01-01", "2020-12-31"))
+    version = ModelRegistry(tmp_path).register("demo", model, metrics=metrics)
+    assert version == 2
+
+    registry = ModelRegistry(tmp_path)
+    assert registry.versions("demo") == [1, 2]
+    assert registry.metadata("demo", 1)["features"] == list("abcd")
+    assert registry.metadata("demo")["metrics"]["test_score"] == metrics["test_score"]
+
+    first = registry.predict("demo", X[:5])
+    second = registry.predict("demo", X[:5])
+    np.testing.assert_allclose(first, model.predict(X[:5]))
+    np.testing.assert_array_equal(first, second)
+    assert registry.loads == 1
+
+    with pytest.raises(KeyError):
+        registry.load("missing")
+
+
+def test_lru_eviction(tmp_path):
+    """Test only cache_size models stay loaded, least recently used dropped first"""
+    X, y = make_regression(n_samples=50, n_features=3, random_state=1) # type: ignore
+    model, _ = train_model(X, y, model_type="gradient_boosting")
+    for name in ("a", "b", "c"):
+        ModelRegistry(tmp_path).register(name, model)
+
+    registry = ModelRegistry(tmp_path, cache_size=2)
+    registry.load("a")
+    registry.load("b")
+    registry.load("a")
+    registry.load("c")   # evicts b
+    registry.load("a")
+    assert registry.loads == 3
+    registry.load("b")
+    assert registry.loads == 4
+
+
+def test_keras_model_and_predict_by_name(tmp_path, monkeypatch):
+    """Test Keras models round-trip and predict_stock_price accepts registry names"""
+    monkeypatch.setattr(model_registry, "_REGISTRY", ModelRegistry(tmp_path))
+    X = np.random.default_rng(2).normal(size=(8, 5)).astype(np.float32)
+    model = create_neural_network(input_shape=5)
+    expected = model.predict(X, verbose=0)[:, 0]
+
+    model_registry.get_registry().register("net", model, features=[f"x{i}" for i in range(5)])
+    model_registry.get_registry().clear_cache()
+
+    np.testing.assert_allclose(predict_stock_price("net", X), expected, rtol=1e-5, atol=1e-6)
+    assert model_registry.get_registry().loads == 1
+
+
+def test_concurrent_registrants_claim_distinct_versions(tmp_path):
+    """Test registries of the same directory (e.g. job processes) never share a version"""
+    X, y = make_regression(n_samples=50, n_features=3, random_state=2) # type: ignore
+    start = threading.Barrier(8)
+    versions = []
+
+    def register(seed):
+        registry = ModelRegistry(tmp_path)
+        start.wait()
+        for _ in range(5):
+            model = create_sklearn_model("sgd").fit(X, y + seed)
+            versions.append((registry.register("demo", model, seed=seed), seed))
+
+    threads = [threading.Thread(target=register, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    registry = ModelRegistry(tmp_path)
+    assert sorted(version for version, _ in versions) == list(range(1, 41))
+    assert registry.versions("demo") == list(range(1, 41))
+    assert all(registry.metadata("demo", version)["seed"] == seed for version, seed in versions)
+    assert len(list(tmp_path.glob("demo/*.claim"))) == 40
@@ -2,10 +2,19 @@
 Tests for machine learning models
 """
 
+import keras
 import pytest
 import numpy as np
 from sklearn.datasets import make_regression
-from app.utils.models import create_sklearn_model, create_neural_network, train_model, predict_stock_price
+from app.utils.model_registry import ModelRegistry
+from app.utils.models import (
+    create_sklearn_model,
+    create_neural_network,
+    predict_stock_price,
+    train_model,
+    walk_forward_splits,
+    walk_forward_validate,
+)
 
 
 def test_create_sklearn_model():
@@ -43,3 +52,69 @@ def test_predict_stock_price():
     
     predictions = predict_stock_price(model, X[:5])
     assert len(predictions) == 5
+
+
+def test_walk_forward_splits_never_train_on_the_future():
+    """Test expanding and rolling folds keep training data before the test block"""
+    expanding = walk_forward_splits(120, n_splits=4, gap=2)
+    rolling = walk_forward_splits(120, n_splits=4, window=30)
+    
+    for train_index, test_index in expanding:
+        assert train_index[0] == 0
+        assert train_index[-1] + 2 < test_index[0]
+    assert [len(train) for train, _ in rolling] == [24, 30, 30, 30]
+    assert expanding[-1][1][-1] == 119
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_train_model_walk_forward(n_jobs):
+    """Test walk-forward training reports per-fold metrics and timings"""
+    X, y = make_regression(n_samples=200, n_features=5, random_state=42) # type: ignore
+    
+    model, metrics = train_model(X, y, model_type="random_forest", validation="walk_forward",
+                                 n_splits=4, n_jobs=n_jobs)
+    
+    assert len(metrics["folds"]) == 4
+    assert all(fold["fold_time"] > 0 for fold in metrics["folds"])
+    assert metrics["test_score"] == pytest.approx(np.mean([fold["test_score"] for fold in metrics["folds"]]))
+    assert len(predict_stock_price(model, X[:3])) == 3
+    
+    folds = walk_forward_validate(X, y, n_splits=4, n_jobs=n_jobs)
+    assert list(folds.index) == [0, 1, 2, 3]
+    assert folds["test_start"].is_monotonic_increasing
+
+
+def test_train_model_reports_progress():
+    """Test train_model reports each fold and each neural network epoch"""
+    X, y = make_regression(n_samples=120, n_features=5, random_state=42) # type: ignore
+    events = []
+
+    train_model(X, y, model_type="random_forest", validation="walk_forward",
+                n_splits=3, progress=events.append)
+    assert [(event["stage"], event["step"], event["total"]) for event in events] == \
+        [("fold", 1, 3), ("fold", 2, 3), ("fold", 3, 3)]
+    assert "test_score" in events[0]["metrics"]
+
+    events.clear()
+    train_model(X, y, model_type="neural_network", params={"epochs": 3}, progress=events.append,
+                verbose=0)
+    assert [(event["stage"], event["step"]) for event in events] == [("epoch", 1), ("epoch", 2), ("epoch", 3)]
+    assert "loss" in events[-1]["metrics"]
+
+
+def test_neural_network_standardizes_raw_features(tmp_path):
+    """Test a trained network takes raw rows, also after a registry round trip"""
+    X, y = make_regression(n_samples=300, n_features=4, noise=1.0, random_state=0) # type: ignore
+    X = X * [1.0, 1e3, 1e11, 1e-2]
+    
+    model, metrics = train_model(X, y, model_type="neural_network",
+                                 params={"epochs": 30, "dropout_rate": 0.0}, verbose=0)
+    
+    assert isinstance(model.layers[0], keras.layers.Normalization)
+    assert metrics["test_loss"] < 0.2 * np.var(y)
+    
+    registry = ModelRegistry(tmp_path)
+    registry.register("nn", model, model_type="neural_network")
+    registry.clear_cache()
+    np.testing.assert_allclose(registry.predict("nn", X[:5]),
+                               np.asarray(model.predict(X[:5], verbose=0)).reshape(-1), rtol=1e-5)
@@ -0,0 +1,128 @@
+"""
+Tests for incremental model updates and drift checks
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from config.settings import ML_CONFIG
+from app.utils.feature_store import FeatureStore
+from app.utils.model_registry import ModelRegistry
+from app.utils.models import create_sklearn_model
+from app.utils.online import check_drift, make_reference, update_model, update_registered_models
+
+
+def make_history(n_rows=300, seed=0):
+    """Linear target on stationary features, one row per business day"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(scale=0.1, size=n_rows)
+    return X, y, pd.bdate_range("2020-01-01", periods=n_rows)
+
+
+def register(registry, model_type, X, y, dates, train_rows):
+    model = create_sklearn_model(model_type).fit(X[:train_rows], y[:train_rows])
+    return registry.register("demo", model, training_window=(dates[0], dates[train_rows - 1]),
+                             model_type=model_type)
+
+
+def test_check_drift():
+    """Test error and feature drift against the reference"""
+    reference = {"mean": [0.0, 0.0], "std": [1.0, 1.0], "mse": 1.0}
+    X_recent = np.zeros((10, 2))
+
+    assert not check_drift(reference, X_recent, [1.2] * 30)["drifted"]
+    assert not check_drift(reference, X_recent, [5.0] * 5)["drifted"]  # too few errors yet
+    assert check_drift(reference, X_recent, [2.0] * 30)["drifted"]
+
+    drift = check_drift(reference, X_recent + [0.0, 3.0], [])
+    assert drift["drifted"] and drift["feature"] == 1
+
+
+def test_sgd_partial_fit_update(tmp_path):
+    """Test new rows are learned incrementally as a new version"""
+    X, y, dates = make_history()
+    registry = ModelRegistry(tmp_path)
+    register(registry, "sgd", X, y, dates, 299)
+    before = registry.predict("demo", X[:5], 1).copy()
+
+    result = update_model("demo", X, y, dates=dates, registry=registry)
+
+    assert result["action"] == "incremental"
+    assert result["new_rows"] == 1 and result["version"] == 2
+    assert registry.metadata("demo")["training_window"][1] == str(dates[-1])
+    assert not np.allclose(registry.predict("demo", X[:5]), before)
+    np.testing.assert_allclose(registry.predict("demo", X[:5], 1), before)
+
+    assert update_model("demo", X, y, dates=dates, registry=registry)["action"] == "none"
+
+
+def test_warm_start_and_drift_retrain(tmp_path):
+    """Test trees are added on new data until drift forces a full retrain"""
+    X, y, dates = make_history()
+    registry = ModelRegistry(tmp_path)
+    register(registry, "gradient_boosting", X, y, dates, 290)
+
+    result = update_model("demo", X, y, dates=dates, registry=registry)
+    assert result["action"] == "incremental"
+    assert registry.load("demo").n_estimators == 110
+
+    X_shifted, y_shifted, dates_shifted = make_history(320)
+    X_shifted[300:, 2] += 5.0
+    result = update_model("demo", X_shifted, y_shifted, dates=dates_shifted, registry=registry)
+
+    assert result["action"] == "retrain"
+    assert result["drift"]["feature"] == 2
+    assert registry.load("demo").n_estimators == 100
+    assert registry.metadata("demo")["update"]["parent_version"] == 2
+
+
+def test_daily_updates_without_reference(tmp_path, monkeypatch):
+    """Test one-row updates of a model registered without a reference never retrain"""
+    monkeypatch.setitem(ML_CONFIG["online"], "keep_versions", 3)
+    X, y, dates = make_history()
+    registry = ModelRegistry(tmp_path)
+    register(registry, "random_forest", X, y, dates, 270)
+
+    for end in range(271, 301):
+        result = update_model("demo", X[:end], y[:end], dates=dates[:end], registry=registry)
+        assert result["action"] == "incremental"
+
+    assert registry.metadata("demo")["reference"]["mse"] > 0
+    assert registry.versions("demo") == [29, 30, 31]
+
+
+def test_update_registered_models_from_store(tmp_path):
+    """Test the daily job updates a symbol's model with its saved features, day after day"""
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 401)))
+    bars = pd.DataFrame({
+        "Date": pd.bdate_range("2020-01-01", periods=401),
+        "Open": close * 0.99, "High": close * 1.01, "Low": close * 0.98, "Close": close,
+        "Volume": np.full(401, 1_000_000),
+    })
+    store = FeatureStore(tmp_path / "features")
+    store.build("DEMO", bars[:399])
+    registry = ModelRegistry(tmp_path / "models")
+
+    # Registered the way training jobs do: complete columns and rows only
+    X, y, dates = store.training_data("DEMO")
+    names = [name for name in store.columns("DEMO") if not name.startswith("target_")]
+    columns = ~np.isnan(X).all(axis=0)
+    features = [name for name, keep in zip(names, columns) if keep][1:]
+    X, y, dates = store.training_data("DEMO", features=features)
+    rows = ~np.isnan(X).any(axis=1)
+    model = create_sklearn_model("sgd").fit(X[rows], y[rows])
+    registry.register("demo", model, features=features, training_window=(dates[rows][0], dates[-1]),
+                      model_type="sgd", symbol="DEMO", reference=make_reference(X[rows], None))
+    registry.register("pooled", model, features=features, model_type="sgd")
+
+    for day in (400, 401):
+        store.build("DEMO", bars[:day])
+        results = update_registered_models(registry, store)
+
+        assert list(results) == ["demo"]
+        assert results["demo"]["action"] == "incremental" and results["demo"]["new_rows"] == 1
+    assert registry.versions("demo") == [1, 2, 3]
+    assert registry.metadata("demo")["symbol"] == "DEMO"
+    assert registry.metadata("demo")["features"] == features
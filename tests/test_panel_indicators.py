@@ -0,0 +1,104 @@
+"""
+Tests for panel (universe-wide) technical indicators
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.panel_indicators import (
+    sma_panel,
+    ema_panel,
+    rsi_panel,
+    atr_panel,
+    bollinger_panel,
+    macd_panel,
+    calculate_panel_indicators,
+)
+
+
+@pytest.fixture
+def prices():
+    """Random-walk close/high/low panel with a late listing in column 1"""
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (300, 4)), axis=0))
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low = close * (1 - rng.uniform(0, 0.02, close.shape))
+    for arr in (close, high, low):
+        arr[:40, 1] = np.nan
+    return close, high, low
+
+
+def test_sma_matches_rolling_mean(prices):
+    """Test SMA against pandas rolling mean per column"""
+    close, _, _ = prices
+    result = sma_panel(close, 20)
+    expected = pd.DataFrame(close).rolling(20).mean().to_numpy()
+
+    np.testing.assert_allclose(result, expected, rtol=1e-9, equal_nan=True)
+
+
+def test_ema_matches_sma_seeded_ewm(prices):
+    """Test EMA against an SMA-seeded pandas ewm per column"""
+    close, _, _ = prices
+    result = ema_panel(close, 10)
+
+    for j in range(close.shape[1]):
+        series = pd.Series(close[:, j]).dropna()
+        seeded = series.copy()
+        seeded.iloc[:9] = np.nan
+        seeded.iloc[9] = series.iloc[:10].mean()
+        expected = seeded.ewm(span=10, adjust=False).mean()
+        np.testing.assert_allclose(result[series.index, j], expected, rtol=1e-9, equal_nan=True)
+
+
+def test_warmup_is_per_column(prices):
+    """Test that each column warms up from its own first valid bar"""
+    close, high, low = prices
+
+    rsi = rsi_panel(close, 14)
+    assert np.isnan(rsi[:14, 0]).all() and not np.isnan(rsi[14:, 0]).any()
+    assert np.isnan(rsi[:54, 1]).all() and not np.isnan(rsi[54:, 1]).any()
+    assert np.nanmin(rsi) >= 0 and np.nanmax(rsi) <= 100
+
+    atr = atr_panel(high, low, close, 14)
+    assert np.isnan(atr[:54, 1]).all() and not np.isnan(atr[54:, 1]).any()
+
+
+def test_gaps_and_delisting(prices):
+    """Test forward-filled gaps and NaN output after the last bar"""
+    close, _, _ = prices
+    close = close.copy()
+    close[100:103, 2] = np.nan
+    close[250:, 3] = np.nan
+
+    result = ema_panel(close, 10)
+    assert not np.isnan(result[100:103, 2]).any()
+    assert np.isnan(result[250:, 3]).all()
+
+
+def test_bollinger_and_macd_shapes(prices):
+    """Test Bollinger Bands ordering and MACD histogram identity"""
+    close, _, _ = prices
+
+    bands = bollinger_panel(close, 20, 2.0)
+    valid = ~np.isnan(bands['mid'])
+    assert (bands['lower'][valid] <= bands['mid'][valid]).all()
+    assert (bands['upper'][valid] >= bands['mid'][valid]).all()
+
+    macd = macd_panel(close)
+    np.testing.assert_allclose(macd['histogram'], macd['macd'] - macd['signal'], equal_nan=True)
+
+
+def test_calculate_panel_indicators_dataframe(prices):
+    """Test that DataFrame input gives DataFrames keyed like add_* columns"""
+    close, high, low = prices
+    index = pd.date_range("2023-01-01", periods=close.shape[0])
+    symbols = ["AAPL", "MSFT", "GOOGL", "AMZN"]
+    close_df = pd.DataFrame(close, index=index, columns=symbols)
+
+    results = calculate_panel_indicators(close_df, high, low)
+
+    for name in ("SMA_20", "EMA_50", "RSI_14", "MACD_12_26_9", "BBL_20_2.0_2.0", "ATR_14"):
+        assert name in results
+        assert list(results[name].columns) == symbols
+        assert results[name].index.equals(index)
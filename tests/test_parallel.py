@@ -0,0 +1,126 @@
+"""
+Tests for the per-symbol process-pool executor
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils import parallel
+from app.utils.parallel import resolve_n_jobs, run_per_symbol
+
+
+def last_close(symbol: str, close: pd.DataFrame, scale: float = 1.0) -> float:
+    """Last close of a symbol from a shared panel; fails for unknown symbols"""
+    if symbol not in close.columns:
+        raise KeyError(symbol)
+    return float(close[symbol].iloc[-1]) * scale
+
+
+def column_sum(symbol: str, values: np.ndarray) -> float:
+    """Sum of one column of a shared array, selected by the symbol's suffix"""
+    assert not values.flags.writeable
+    return float(values[:, int(symbol[3:])].sum())
+
+
+def scaled_close(symbol: str, close: pd.DataFrame, scale: float, offset: float = 0.0) -> float:
+    """Last close of a symbol, scaled and shifted"""
+    return float(close[symbol].iloc[-1]) * scale + offset
+
+
+def make_panel() -> pd.DataFrame:
+    """Small dates x symbols close panel"""
+    rng = np.random.default_rng(5)
+    return pd.DataFrame(rng.normal(100, 5, (250, 6)),
+                        index=pd.date_range("2024-01-01", periods=250, freq="B"),
+                        columns=[f"SYM{i}" for i in range(6)])
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_ordered_results_and_error_isolation(n_jobs):
+    """Test results keep input order and a failing symbol is reported separately"""
+    close = make_panel()
+    symbols = ["SYM3", "MISSING", "SYM0", "SYM5", "SYM1"]
+
+    results, errors = run_per_symbol(last_close, symbols, shared={"close": close},
+                                     n_jobs=n_jobs, chunksize=2, scale=2.0)
+
+    assert list(results) == ["SYM3", "SYM0", "SYM5", "SYM1"]
+    assert results["SYM5"] == pytest.approx(2.0 * close["SYM5"].iloc[-1])
+    assert list(errors) == ["MISSING"] and errors["MISSING"].startswith("KeyError")
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_per_symbol_kwargs(n_jobs):
+    """Test per-symbol keyword arguments reach only their own symbol"""
+    close = make_panel()
+
+    results, errors = run_per_symbol(scaled_close, ["SYM0", "SYM1", "SYM2"],
+                                     shared={"close": close}, n_jobs=n_jobs,
+                                     per_symbol={"SYM1": {"offset": 10.0}}, scale=1.0)
+
+    assert not errors
+    assert results["SYM0"] == pytest.approx(close["SYM0"].iloc[-1])
+    assert results["SYM1"] == pytest.approx(close["SYM1"].iloc[-1] + 10.0)
+
+
+def test_worker_closes_shared_blocks(monkeypatch):
+    """Test a worker task closes the shared memory handles it attached"""
+    attached = []
+
+    class RecordingBlock(parallel.shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            attached.append(self)
+
+    close = make_panel()
+    spec, block = parallel._share(close)
+    try:
+        monkeypatch.setattr(parallel.shared_memory, "SharedMemory", RecordingBlock)
+        outcomes = parallel._run_chunk(last_close, [("SYM2", {}), ("MISSING", {})], {},
+                                       {"close": spec})
+    finally:
+        block.close()
+        block.unlink()
+
+    assert outcomes[0] == (pytest.approx(close["SYM2"].iloc[-1]), None)
+    assert outcomes[1][1].startswith("KeyError")
+    assert len(attached) == 1 and attached[0].buf is None
+
+
+def test_memmap_input(tmp_path):
+    """Test memory-mapped inputs are re-opened read-only in the workers"""
+    values = np.arange(40, dtype=np.float64).reshape(10, 4)
+    mapped = np.memmap(tmp_path / "values.dat", dtype=np.float64, mode="w+", shape=values.shape)
+    mapped[:] = values
+    mapped.flush()
+
+    results, errors = run_per_symbol(column_sum, ["SYM0", "SYM3"],
+                                     shared={"values": mapped}, n_jobs=2)
+
+    assert not errors
+    assert results == {"SYM0": values[:, 0].sum(), "SYM3": values[:, 3].sum()}
+
+
+def test_memmap_views(tmp_path):
+    """Test row slices re-open at their own offset and strided views are copied"""
+    values = np.arange(400, dtype=np.float64).reshape(100, 4)
+    path = tmp_path / "values.dat"
+    mapped = np.memmap(path, dtype=np.float64, mode="w+", shape=values.shape)
+    mapped[:] = values
+    mapped.flush()
+    reopened = np.memmap(path, dtype=np.float64, mode="r", shape=(90, 4), offset=10 * 4 * 8)
+
+    for view, expected in [(mapped[37:], values[37:]), (reopened[5:], values[15:]),
+                           (mapped[::3], values[::3]), (mapped[:, 1:], values[:, 1:])]:
+        results, errors = run_per_symbol(column_sum, ["SYM0", "SYM2"],
+                                         shared={"values": view}, n_jobs=2)
+        assert not errors
+        assert results == {"SYM0": expected[:, 0].sum(), "SYM2": expected[:, 2].sum()}
+
+
+def test_resolve_n_jobs():
+    """Test worker count resolution"""
+    assert resolve_n_jobs(1) == 1
+    assert resolve_n_jobs(-1) >= 1
+    with pytest.raises(ValueError):
+        resolve_n_jobs(0)
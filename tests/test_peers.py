@@ -0,0 +1,87 @@
+"""
+Tests for sector and industry peer statistics
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils import analysis, database
+from app.utils.peers import compute_peer_ranks, describe_peer_rank, get_peer_ranks, update_peer_ranks
+
+
+def make_universe() -> pd.DataFrame:
+    """Six companies in two sectors and three industries"""
+    return pd.DataFrame({
+        "sector": ["Technology"] * 4 + ["Energy"] * 2,
+        "industry": ["Semiconductors"] * 3 + ["Software", "Oil & Gas", "Oil & Gas"],
+        "pe_ratio": [10.0, 20.0, 30.0, 40.0, 8.0, np.nan],
+        "roe": [0.1, 0.2, 0.3, 0.4, 0.1, 0.2],
+    }, index=["AMD", "NVDA", "INTC", "MSFT", "XOM", "CVX"])
+
+
+def test_grouped_ranks_match_per_group_statistics():
+    """Test percentiles, medians and z-scores against one group computed by hand"""
+    universe = make_universe()
+
+    ranks = compute_peer_ranks(universe[["pe_ratio", "roe"]], universe[["sector", "industry"]])
+    ranks = ranks.set_index(["symbol", "metric", "level"])
+
+    semis = universe.loc[["AMD", "NVDA", "INTC"], "pe_ratio"]
+    nvda = ranks.loc[("NVDA", "pe_ratio", "industry")]
+    assert nvda["group_name"] == "Semiconductors"
+    assert nvda["percentile"] == pytest.approx(100 * 2 / 3)
+    assert nvda["median"] == pytest.approx(semis.median())
+    assert ranks.loc[("AMD", "pe_ratio", "industry"), "zscore"] == pytest.approx(
+        (10.0 - semis.mean()) / semis.std()
+    )
+    assert ranks.loc[("MSFT", "pe_ratio", "sector"), "percentile"] == pytest.approx(100.0)
+
+    # Groups below min_peers and missing values are left out
+    assert ("MSFT", "pe_ratio", "industry") not in ranks.index
+    assert ("CVX", "pe_ratio", "sector") not in ranks.index
+    assert ("XOM", "roe", "sector") not in ranks.index
+
+
+def test_stored_ranks_lookup(tmp_path, monkeypatch):
+    """Test the stored table serves one symbol's ranks and describes them"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    database.init_db()
+
+    assert update_peer_ranks(make_universe()) > 0
+    ranks = get_peer_ranks("amd")
+
+    assert set(ranks) == {"pe_ratio", "roe"}
+    assert set(ranks["pe_ratio"]) == {"sector", "industry"}
+    assert describe_peer_rank("pe_ratio", ranks["pe_ratio"]["sector"]) == \
+        "P/E in 25th percentile of Technology"
+
+
+def test_ranks_from_ticker_universe(tmp_path, monkeypatch):
+    """Test the nightly refresh fills fundamentals for the universe before ranking"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    database.init_db()
+    universe = make_universe()
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO tickers (symbol, sector, industry, is_active) VALUES (?, ?, ?, 1)",
+                     [(symbol, row.sector, row.industry) for symbol, row in universe.iterrows()])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(analysis, "get_filings", lambda form, filing_date: None)
+    monkeypatch.setattr(analysis, "get_company_financials", lambda symbol, form, timeframe: [])
+    monkeypatch.setattr(analysis, "calculate_growth_rates", lambda symbol: {})
+    monkeypatch.setattr(analysis, "fetch_fundamental_data", lambda symbol: {"info": {
+        "symbol": symbol, "trailingPE": universe.loc[symbol, "pe_ratio"],
+        "returnOnEquity": universe.loc[symbol, "roe"],
+    }})
+
+    assert database.get_fundamentals() == {}
+    analysis.refresh_fundamentals(since="2025-01-01")
+    assert update_peer_ranks() > 0
+
+    expected = compute_peer_ranks(universe[["pe_ratio", "roe"]], universe[["sector", "industry"]])
+    nvda = expected[(expected["symbol"] == "NVDA") & (expected["metric"] == "pe_ratio")
+                    & (expected["level"] == "industry")].iloc[0]
+    assert get_peer_ranks("NVDA")["pe_ratio"]["industry"]["percentile"] == pytest.approx(nvda["percentile"])
+    assert set(get_peer_ranks("MSFT")["pe_ratio"]) == {"sector"}
+    assert get_peer_ranks("XOM") == {}
@@ -0,0 +1,59 @@
+"""
+Tests for the micro-batched prediction queue
+"""
+
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.model_registry import ModelRegistry
+from app.utils.prediction_queue import PredictionQueue
+
+
+class CountingModel:
+    """Linear model recording the size of every predict call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X.sum(axis=1)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry holding a CountingModel (kept loaded by register)"""
+    registry = ModelRegistry(tmp_path)
+    registry.register("linear", CountingModel())
+    return registry
+
+
+def test_concurrent_rows_share_batches(registry):
+    """Test concurrent requests are batched and each gets its own rows back"""
+    queue = PredictionQueue(registry, max_batch_size=16, max_wait_ms=20)
+    X = np.arange(300, dtype=float).reshape(100, 3)
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(lambda i: queue.predict("linear", X[i]), range(100)))
+    queue.close()
+
+    np.testing.assert_array_equal(np.concatenate(results), X.sum(axis=1))
+    calls = registry.load("linear").calls
+    assert sum(calls) == 100 and max(calls) <= 16
+    assert len(calls) < 50
+
+
+def test_multi_row_requests_and_errors(registry):
+    """Test multi-row requests stay whole and a failing batch fails its futures"""
+    queue = PredictionQueue(registry, max_batch_size=4, max_wait_ms=1)
+
+    matrix = np.ones((6, 3))
+    np.testing.assert_array_equal(queue.predict("linear", matrix), np.full(6, 3.0))
+
+    future = queue.submit("missing", np.ones(3))
+    with pytest.raises(KeyError):
+        future.result(timeout=5)
+
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.submit("linear", np.ones(3))
@@ -0,0 +1,73 @@
+"""
+Tests for multi-timeframe resampling and the aggregate store
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.indicator_cache import IndicatorCache
+from app.utils.resampling import AggregateStore, resample_ohlcv, timeframe_rule
+from app.utils.technical_analysis import add_rsi, get_cached_indicators
+
+
+def make_daily(rows: int) -> pd.DataFrame:
+    """Deterministic business-day OHLCV frame with a Date column"""
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))[:rows]
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=rows, freq="B"),
+        "Open": close * 0.99,
+        "High": close * 1.01,
+        "Low": close * 0.98,
+        "Close": close,
+        "Volume": np.arange(rows, dtype=np.int64) + 1000,
+    })
+
+
+def test_weekly_ohlcv_semantics():
+    """Test weekly bars take first open, max high, min low, last close, summed volume"""
+    daily = make_daily(10)
+    weekly = resample_ohlcv(daily, "weekly")
+
+    first_week = daily.iloc[:5]
+    assert len(weekly) == 2
+    assert weekly.loc[0, "Date"] == pd.Timestamp("2024-01-05")
+    assert weekly.loc[0, "Open"] == first_week["Open"].iloc[0]
+    assert weekly.loc[0, "High"] == first_week["High"].max()
+    assert weekly.loc[0, "Low"] == first_week["Low"].min()
+    assert weekly.loc[0, "Close"] == first_week["Close"].iloc[-1]
+    assert weekly.loc[0, "Volume"] == first_week["Volume"].sum()
+
+
+def test_unknown_timeframe():
+    """Test timeframe names and custom aliases are resolved or rejected"""
+    assert timeframe_rule("daily") is None
+    assert timeframe_rule("monthly") == "ME"
+    assert timeframe_rule("2W-FRI") == "2W-FRI"
+    with pytest.raises(ValueError):
+        timeframe_rule("fortnightly")
+
+
+@pytest.mark.parametrize("timeframe", ["weekly", "monthly", "3D"])
+def test_incremental_update_matches_full_resample(tmp_path, timeframe):
+    """Test appending daily bars rebuilds only the tail and matches a full resample"""
+    store = AggregateStore(tmp_path)
+
+    store.get("AAPL", make_daily(101), timeframe)
+    result = store.get("AAPL", make_daily(117), timeframe)
+
+    pd.testing.assert_frame_equal(result, resample_ohlcv(make_daily(117), timeframe))
+    pd.testing.assert_frame_equal(store.get("AAPL", make_daily(117), timeframe), result)
+
+
+def test_weekly_indicators_from_aggregates(tmp_path):
+    """Test cached weekly indicators match indicators on resampled bars"""
+    daily = make_daily(300)
+    spec = {"add_rsi": {"period": 14}}
+
+    result = get_cached_indicators("AAPL", daily, spec, cache=IndicatorCache(tmp_path / "ind"),
+                                   timeframe="weekly", aggregates=AggregateStore(tmp_path / "agg"))
+
+    expected = add_rsi(daily, period=14, timeframe="weekly")
+    pd.testing.assert_frame_equal(result, expected)
+    assert (tmp_path / "agg" / "AAPL" / "weekly.parquet").exists()
@@ -0,0 +1,104 @@
+"""
+Tests for the indexed screening engine
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.screening import ScreeningIndex, compile_screen
+
+
+def make_snapshot(rows: int = 20000, seed: int = 4) -> pd.DataFrame:
+    """Random fundamentals snapshot with some missing values"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "pe_ratio": rng.lognormal(3, 0.5, rows),
+        "roe": rng.normal(0.12, 0.08, rows),
+        "debt_to_equity": rng.uniform(0, 200, rows),
+        "market_cap": rng.lognormal(22, 2, rows),
+    }, index=[f"S{i}" for i in range(rows)])
+    data.iloc[rng.choice(rows, rows // 20, replace=False), 1] = np.nan
+    return data
+
+
+@pytest.mark.parametrize("nan_policy", ["exclude", "include"])
+def test_query_matches_boolean_masks(nan_policy):
+    """Test indexed results equal plain boolean filtering"""
+    data = make_snapshot()
+    index = ScreeningIndex(data)
+    criteria = {"pe_ratio": (None, 15.0), "roe": (0.1, None), "debt_to_equity": (20, 80)}
+
+    result = index.screen(criteria, nan_policy=nan_policy)
+
+    roe_ok = data["roe"] >= 0.1
+    if nan_policy == "include":
+        roe_ok |= data["roe"].isna()
+    expected = data[(data["pe_ratio"] <= 15.0) & roe_ok & data["debt_to_equity"].between(20, 80)]
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_top_k_without_full_sort():
+    """Test top-k rows match a full sort of the filtered rows"""
+    data = make_snapshot()
+    index = ScreeningIndex(data)
+
+    top = index.screen({"roe": (0.15, None)}, sort_by="market_cap", ascending=False, top_k=25)
+
+    expected = data[data["roe"] >= 0.15].sort_values("market_cap", ascending=False).head(25)
+    pd.testing.assert_frame_equal(top, expected)
+
+
+def test_invalid_criteria():
+    """Test bad criteria and NaN policies are rejected"""
+    index = ScreeningIndex(make_snapshot(10))
+    with pytest.raises(ValueError):
+        index.query({"roe": 0.1})
+    with pytest.raises(ValueError):
+        index.query({"roe": (0.1, None)}, nan_policy="drop")
+    with pytest.raises(KeyError):
+        index.query({"missing": (0, 1)})
+
+
+def test_expression_matches_pandas():
+    """Test a compiled expression against the same filter in pandas"""
+    data = make_snapshot()
+    data["current_ratio"] = np.random.default_rng(9).uniform(0.5, 3, len(data))
+    index = ScreeningIndex(data)
+
+    result = index.screen_expression(
+        "pe_ratio < 15 and roe > 0.12 and (debt_to_equity < 50 or current_ratio > 2)"
+    )
+
+    expected = data[(data["pe_ratio"] < 15) & (data["roe"] > 0.12)
+                    & ((data["debt_to_equity"] < 50) | (data["current_ratio"] > 2))]
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_derived_expression_sorted():
+    """Test derived definitions become columns and can drive top-k"""
+    data = make_snapshot()
+    index = ScreeningIndex(data)
+
+    result = index.screen_expression(
+        "earnings_yield = 1 / pe_ratio; earnings_yield > 0.08 and 0 < roe",
+        sort_by="earnings_yield", ascending=False, top_k=10,
+    )
+
+    yields = 1 / data["pe_ratio"]
+    expected = data[(yields > 0.08) & (data["roe"] > 0)].assign(earnings_yield=yields)
+    expected = expected.sort_values("earnings_yield", ascending=False).head(10)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_compiled_plans_are_cached_and_safe():
+    """Test plans are reused by text, use the indices, and reject unsafe input"""
+    text = "pe_ratio <= 20 and -1 < roe and abs(roe) < 0.5"
+    plan = compile_screen(text)
+
+    assert compile_screen(text) is plan
+    assert [r[0] for r in plan.ranges] == ["pe_ratio", "roe"]
+    assert plan.columns == ["roe"]
+
+    for unsafe in ["__import__('os').system('ls')", "pe_ratio.real > 1", "x = 1", "pe_ratio < 'a'"]:
+        with pytest.raises(ValueError):
+            compile_screen(unsafe)
@@ -0,0 +1,104 @@
+"""
+Tests for out-of-core training on pooled feature data
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.utils.feature_store import FeatureStore
+from app.utils.model_registry import ModelRegistry
+from app.utils.streaming import iter_batches, parquet_blocks, store_blocks, train_streaming
+
+
+DEFINITION = {
+    "version": 1,
+    "returns": [1, 5],
+    "lags": [1, 2],
+    "indicators": {"add_rsi": {"period": 14}},
+    "fundamentals": [],
+    "targets": [5],
+}
+
+
+def make_daily(rows: int, seed: int) -> pd.DataFrame:
+    """Business-day OHLCV frame with a Date column"""
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=rows, freq="B"),
+        "Open": close * 0.99,
+        "High": close * 1.01,
+        "Low": close * 0.98,
+        "Close": close,
+        "Volume": np.full(rows, 1_000_000),
+    })
+
+
+def write_linear_parquet(path, rows=2000, row_group_size=100):
+    """Parquet feature file with a linear target, in row groups"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, 3)).astype(np.float32)
+    frame = pd.DataFrame(X, columns=["a", "b", "c"])
+    frame["symbol"] = "AAA"
+    frame["target_return_5"] = X @ np.array([0.5, -1.0, 2.0], dtype=np.float32)
+    pq.write_table(pa.Table.from_pandas(frame), path, row_group_size=row_group_size)
+
+
+def test_store_blocks_shuffle_within_bounded_buffers(tmp_path):
+    """Test every row with a target is served once, a few blocks at a time"""
+    store = FeatureStore(tmp_path, DEFINITION)
+    symbols = ["AAA", "BBB", "CCC"]
+    for seed, symbol in enumerate(symbols):
+        store.build(symbol, make_daily(230, seed))
+
+    blocks = store_blocks(symbols, store, block_rows=50)
+    assert len(blocks) == 15
+
+    fill = np.zeros(len(store.columns("AAA")) - 1)
+    batches = list(iter_batches(blocks, batch_size=32, buffer_blocks=2, fill=fill, seed=0))
+    y = np.concatenate([batch[1] for batch in batches])
+    expected = np.concatenate([store.training_data(symbol)[1] for symbol in symbols])
+
+    assert [len(batch[1]) for batch in batches[:-1]] == [32] * (len(batches) - 1)
+    assert not any(np.isnan(batch[0]).any() for batch in batches)
+    np.testing.assert_allclose(np.sort(y), np.sort(expected))
+    assert not np.allclose(y, expected)
+
+
+def test_train_streaming_sgd_from_parquet_row_groups(tmp_path):
+    """Test an incremental model learns from row groups and is registered"""
+    path = tmp_path / "features.parquet"
+    write_linear_parquet(path)
+    blocks = parquet_blocks([path], target="target_return_5")
+    assert len(blocks) == 20
+
+    registry = ModelRegistry(tmp_path / "models")
+    model, metrics = train_streaming(blocks[:16], model_type="sgd", epochs=3, batch_size=64,
+                                     buffer_blocks=4, validation_blocks=blocks[16:],
+                                     register_as="pooled", registry=registry)
+
+    assert metrics["rows"] == 1600
+    assert metrics["validation_rows"] == 400
+    assert metrics["validation_r2"] > 0.99
+    assert registry.metadata("pooled")["model_type"] == "sgd"
+    X, _ = blocks[16]()
+    np.testing.assert_allclose(registry.predict("pooled", X), model.predict(X))
+
+
+def test_train_streaming_neural_network(tmp_path):
+    """Test a network trains on the tf.data pipeline and standardizes inside"""
+    path = tmp_path / "features.parquet"
+    write_linear_parquet(path, rows=600)
+    blocks = parquet_blocks([path], target="target_return_5")
+
+    registry = ModelRegistry(tmp_path / "models")
+    model, metrics = train_streaming(blocks, model_type="neural_network", epochs=2, batch_size=32,
+                                     params={"dropout_rate": 0.0}, register_as="pooled_nn",
+                                     registry=registry)
+
+    assert metrics["rows"] == 600
+    X, _ = blocks[0]()
+    registry.clear_cache()
+    np.testing.assert_allclose(registry.predict("pooled_nn", X),
+                               np.asarray(model.predict_on_batch(X)).reshape(-1), rtol=1e-5)
@@ -0,0 +1,88 @@
+"""
+Tests for technical analysis signal utilities
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.technical_analysis import (
+    add_moving_averages,
+    add_rsi,
+    add_bollinger_bands,
+    get_signal_summary,
+    scan_signals,
+)
+from app.utils.panel_indicators import calculate_panel_indicators, latest_values
+
+
+def test_get_signal_summary_default_columns():
+    """Test signals from default add_* columns despite NaNs in other columns"""
+    close = np.linspace(100, 200, 120)
+    data = pd.DataFrame({"Close": close, "Dividends": np.nan})
+    data = add_bollinger_bands(add_rsi(add_moving_averages(data)))
+
+    signals = get_signal_summary(data)
+
+    assert signals["RSI"] == "Overbought"
+    assert signals["EMA"] == "Bullish"
+    assert signals["BB"] in ("Within Bands", "Above Upper Band")
+    assert signals["Date"] == "119"
+
+
+def test_get_signal_summary_reads_one_common_row():
+    """Test a stale indicator moves every signal back to its last valid bar"""
+    close = np.linspace(100, 200, 120)
+    data = pd.DataFrame({"Close": close}, index=pd.bdate_range("2024-01-01", periods=120))
+    data = add_rsi(add_moving_averages(data))
+    data.iloc[-3:, data.columns.get_loc("RSI_14")] = np.nan
+    data.iloc[-3:, data.columns.get_loc("EMA_20")] = 1.0
+
+    signals = get_signal_summary(data)
+
+    assert signals["Date"] == str(data.index[-4])
+    assert signals["RSI"] == "Overbought"
+    assert signals["EMA"] == "Bullish"
+
+
+def test_scan_signals_typed_output():
+    """Test the scanner's dtypes and filtering for oversold below lower band"""
+    latest = pd.DataFrame({
+        "Close": [90.0, 105.0, 120.0, np.nan],
+        "RSI_14": [25.0, 50.0, 80.0, 40.0],
+        "EMA_12": [95.0, 104.0, 110.0, 1.0],
+        "EMA_26": [100.0, 100.0, 100.0, np.nan],
+        "BBL_20_2.0_2.0": [92.0, 95.0, 100.0, 1.0],
+        "BBU_20_2.0_2.0": [110.0, 115.0, 118.0, 2.0],
+    }, index=["AAA", "BBB", "CCC", "DDD"])
+
+    signals = scan_signals(latest)
+
+    assert isinstance(signals["rsi_signal"].dtype, pd.CategoricalDtype)
+    assert signals["rsi"].dtype == np.float64
+    assert list(signals["rsi_signal"]) == ["Oversold", "Neutral", "Overbought", "Neutral"]
+    assert signals.loc["DDD", ["ema_signal", "bb_signal"]].isna().all()
+
+    screen = signals[(signals["rsi_signal"] == "Oversold")
+                     & (signals["bb_signal"] == "Below Lower Band")]
+    assert list(screen.index) == ["AAA"]
+    assert signals.sort_values("rsi").index[0] == "AAA"
+
+
+def test_scan_from_panel_latest_values():
+    """Test scanning a universe from panel indicators"""
+    rng = np.random.default_rng(3)
+    symbols = [f"SYM{i}" for i in range(50)]
+    close = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (200, 50)), axis=0)),
+        columns=symbols
+    )
+    close.iloc[-5:, 0] = np.nan
+
+    panels = calculate_panel_indicators(close)
+    latest = latest_values({"Close": close, **panels})
+    signals = scan_signals(latest)
+
+    assert list(signals.index) == symbols
+    assert latest.loc["SYM0", "Close"] == pytest.approx(close["SYM0"].iloc[-6])
+    assert signals["rsi_signal"].notna().all()
+    assert signals["ema_signal"].notna().all()
@@ -0,0 +1,70 @@
+"""
+Tests for background training jobs
+"""
+
+import time
+
+import pytest
+import numpy as np
+from sklearn.datasets import make_regression
+from app.utils.model_registry import ModelRegistry
+from app.utils.models import create_sklearn_model
+from app.utils.training_jobs import TrainingJobs
+
+
+def test_job_streams_progress_and_registers_model(tmp_path):
+    """Test a job reports its folds and its model becomes the latest version"""
+    X, y = make_regression(n_samples=200, n_features=5, random_state=0) # type: ignore
+    registry = ModelRegistry(tmp_path)
+    registry.register("demo", create_sklearn_model("gradient_boosting").fit(X, y))
+    assert registry.latest_version("demo") == 1
+
+    jobs = TrainingJobs(registry)
+    job_id = jobs.submit("demo", X, y, model_type="gradient_boosting",
+                         validation="walk_forward", n_splits=3, features=list("abcde"))
+    assert jobs.status(job_id)["status"] in ("queued", "running")
+
+    job = jobs.wait(job_id, timeout=120)
+
+    assert job["status"] == "done", job["error"]
+    assert (job["stage"], job["step"], job["total"]) == ("fold", 3, 3)
+    assert job["version"] == 2
+    assert registry.latest_version("demo") == 2
+    assert registry.metadata("demo")["features"] == list("abcde")
+    assert job["metrics"]["test_score"] == registry.metadata("demo")["metrics"]["test_score"]
+
+
+def test_cancel_stops_training_between_epochs(tmp_path):
+    """Test a cancelled neural network stops at an epoch and registers nothing"""
+    X, y = make_regression(n_samples=200, n_features=5, random_state=0) # type: ignore
+    registry = ModelRegistry(tmp_path)
+    jobs = TrainingJobs(registry, cancel_grace=30)
+    job_id = jobs.submit("demo_nn", X, y, model_type="neural_network", params={"epochs": 1000})
+
+    deadline = time.time() + 120
+    job = jobs.status(job_id)
+    while time.time() < deadline and (job["stage"] != "epoch" or job["step"] < 2):
+        time.sleep(0.1)
+        job = jobs.status(job_id)
+    assert job["stage"] == "epoch" and job["total"] == 1000
+
+    jobs.cancel(job_id)
+    job = jobs.wait(job_id, timeout=60)
+
+    assert job["status"] == "cancelled"
+    assert job["step"] < 1000
+    assert registry.versions("demo_nn") == []
+
+
+def test_job_processes_can_run_parallel_folds(tmp_path):
+    """Test jobs run in non-daemonic processes and shutdown stops them"""
+    X, y = make_regression(n_samples=200, n_features=5, random_state=0) # type: ignore
+    jobs = TrainingJobs(ModelRegistry(tmp_path))
+    job_id = jobs.submit("demo", X, y, validation="walk_forward", n_splits=3, n_jobs=2)
+
+    assert not jobs._processes[job_id].daemon
+    assert jobs.wait(job_id, timeout=120)["status"] == "done"
+
+    job_id = jobs.submit("demo_nn", X, y, model_type="neural_network", params={"epochs": 1000})
+    jobs.shutdown()
+    assert jobs.status(job_id)["status"] == "cancelled"
@@ -0,0 +1,58 @@
+"""
+Tests for hyperparameter search
+"""
+
+import pytest
+import numpy as np
+from sklearn.datasets import make_regression
+from app.utils.model_registry import ModelRegistry
+from app.utils.tuning import _budgets, sample_candidates, successive_halving, tune_model
+
+
+SPACE = {"n_estimators": [10, 20], "max_depth": [2, 4, 8], "min_samples_leaf": [1, 5]}
+
+
+def test_budgets_and_sampling():
+    """Test rounds grow by eta up to the full budget and samples are distinct"""
+    assert _budgets(30, 810, 3) == [30, 90, 270, 810]
+    assert _budgets(100, 100, 3) == [100]
+
+    candidates = sample_candidates(SPACE, 100, seed=0)
+    assert len(candidates) == 12
+    assert len({tuple(sorted(c.items())) for c in candidates}) == 12
+
+
+def test_successive_halving_prunes_candidates():
+    """Test each round keeps the best 1/eta on a growing row budget"""
+    X, y = make_regression(n_samples=400, n_features=5, noise=1.0, random_state=0) # type: ignore
+    candidates = sample_candidates(SPACE, 9, seed=0)
+
+    history = successive_halving(candidates, "random_forest", X[:300], y[:300], X[300:], y[300:],
+                                 min_budget=33, max_budget=300, eta=3, n_jobs=1)
+
+    rounds = [[record for record in history if record["round"] == r] for r in range(3)]
+    assert [len(records) for records in rounds] == [9, 3, 1]
+    assert [records[0]["budget"] for records in rounds] == [33, 100, 300]
+
+    best_first = sorted(rounds[0], key=lambda record: record["score"], reverse=True)[:3]
+    assert {record["candidate"] for record in rounds[1]} == {record["candidate"] for record in best_first}
+
+
+@pytest.mark.parametrize("method", ["successive_halving", "hyperband"])
+def test_tune_model_registers_best(tmp_path, method):
+    """Test the refitted best model is registered with its parameters"""
+    X, y = make_regression(n_samples=300, n_features=5, noise=1.0, random_state=0) # type: ignore
+    registry = ModelRegistry(tmp_path)
+
+    model, results = tune_model(X, y, model_type="random_forest", method=method,
+                                search_space=SPACE, n_candidates=9, n_jobs=1,
+                                register_as="demo_tuned", registry=registry, seed=0)
+
+    assert results["version"] == 1
+    assert results["best_score"] == max(record["score"] for record in results["history"]
+                                        if record["budget"] == 240)
+    meta = registry.metadata("demo_tuned")
+    assert meta["params"] == results["best_params"]
+    assert meta["metrics"]["validation_score"] == results["best_score"]
+    assert model.max_depth == results["best_params"]["max_depth"]
+    np.testing.assert_allclose(registry.predict("demo_tuned", X[:5]), model.predict(X[:5]))
@@ -0,0 +1,90 @@
+"""
+Tests for the vectorized valuation models and scenario grid
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils import valuation
+from app.utils.analysis import analyze_fundamentals, calculate_price_to_buy
+
+INFO = {
+    "symbol": "AAPL", "currentPrice": 150.0, "trailingEps": 6.0, "trailingPE": 25.0,
+    "earningsGrowth": 0.10, "freeCashflow": 1.0e11, "sharesOutstanding": 1.6e10,
+}
+
+
+def test_models_on_known_values():
+    """Test the models against hand-computed values"""
+    cap = valuation.ten_year_cap_price(6.0, 0.10, 25.0)
+    assert cap == pytest.approx(6.0 * 1.1 ** 10 * 20.0)
+    assert valuation.fair_market_value(6.0, 0.10, 0.15, 25.0) == pytest.approx(cap / 1.15 ** 10)
+    assert np.isnan(valuation.ten_year_cap_price(-1.0, 0.10))
+
+    # Cumulative discounted cash flow reaches the price after the payback years
+    years = float(valuation.payback_years(100.0, 8.0, 0.10, 0.05))
+    q = 1.10 / 1.05
+    assert sum(8.0 * q ** t for t in range(1, int(years) + 1)) <= 100.0
+    assert sum(8.0 * q ** t for t in range(1, int(years) + 2)) > 100.0
+    assert valuation.payback_years(100.0, 5.0, 0.05, 0.05) == pytest.approx(20.0)
+    assert np.isinf(valuation.payback_years(100.0, 1.0, 0.0, 0.2))
+
+
+def test_grid_shape_and_consistency():
+    """Test the grid broadcast against scenario-by-scenario evaluation"""
+    info = pd.DataFrame([INFO, {**INFO, "symbol": "MSFT", "trailingEps": 10.0}]).set_index("symbol")
+    inputs = valuation.valuation_inputs(info)
+    rates, growth, margins = [0.08, 0.10, 0.15], [0.05, 0.10, 0.20, 0.25], [0.25, 0.5]
+
+    grid = valuation.valuation_grid(inputs, rates, growth, margins)
+
+    assert grid["price_to_buy"].shape == (2, 24)
+    assert grid["price_to_buy"].columns.names == valuation.SCENARIO_LEVELS
+    expected = valuation.price_to_buy(valuation.fair_market_value(10.0, 0.20, 0.10, 25.0), 0.25)
+    assert grid["price_to_buy"].loc["MSFT", (0.10, 0.20, 0.25)] == pytest.approx(expected)
+
+    base = valuation.valuation_grid(inputs, [0.15], None, [0.5])
+    assert base["price_to_buy"].shape == (2, 1)
+    assert base["price_to_buy"].loc["AAPL"].item() == pytest.approx(calculate_price_to_buy(INFO))
+
+
+def test_analyze_fundamentals_valuations():
+    """Test analyze_fundamentals fills valuations from the models"""
+    results = analyze_fundamentals(INFO)
+
+    assert results["valuations"]["fair_market_value"] == pytest.approx(
+        valuation.fair_market_value(6.0, 0.10, 0.15, 25.0)
+    )
+    assert results["valuations"]["price_to_buy"] == pytest.approx(
+        0.5 * results["valuations"]["fair_market_value"]
+    )
+    assert results["valuations"]["discounted_cash_flow"] > 0
+
+
+def test_simulation_percentiles():
+    """Test Monte Carlo percentiles are reproducible, ordered and match fixed inputs"""
+    result = valuation.simulate_intrinsic_value(6.0, 0.10, 25.0, n_paths=20_000,
+                                                chunk_size=7_000, seed=1)
+    again = valuation.simulate_intrinsic_value(6.0, 0.10, 25.0, n_paths=20_000,
+                                               chunk_size=7_000, seed=1)
+
+    pd.testing.assert_frame_equal(result, again)
+    assert list(result.index) == list(valuation.SIMULATION_PERCENTILES)
+    assert result["fair_market_value"].is_monotonic_increasing
+    assert (result["price_to_buy"] < result["fair_market_value"]).all()
+
+    fixed = {
+        "growth_rate": {"dist": "normal", "std": 0.0},
+        "discount_rate": {"dist": "uniform", "low": 0.15, "high": 0.15},
+        "margin_of_safety": {"dist": "uniform", "low": 0.5, "high": 0.5},
+    }
+    exact = valuation.simulate_intrinsic_value(6.0, 0.10, 25.0, n_paths=100, distributions=fixed)
+    expected = valuation.fair_market_value(6.0, 0.10, 0.15, 25.0)
+    assert np.allclose(exact["fair_market_value"], expected)
+    assert np.allclose(exact["price_to_buy"], 0.5 * expected)
+
+
+def test_growth_seed():
+    """Test the growth seed is the median of the non-zero EDGAR rates"""
+    assert valuation.growth_seed({"growth_rates": {"sales": 0.1, "equity": 0.3, "cash_flow": 0.0}}) == pytest.approx(0.2)
+    assert np.isnan(valuation.growth_seed({"growth_rates": {}}))